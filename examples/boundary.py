@@ -31,6 +31,6 @@ plt.axis('equal')
 plt.grid(True)
 plt.xlabel('x')
 plt.ylabel('y')
-plt.title('Object boundaries in a mesh via Delaunay triangulation')
+plt.title('Object boundaries in a mesh via ray crossings')
 plt.savefig(os.path.join(ubem.__plot_dir, 'boundary.pdf'))
 plt.show()
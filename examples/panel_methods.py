@@ -0,0 +1,31 @@
+import time
+import numpy as np
+import ubem2d as ubem
+
+if __name__ == '__main__':
+    '''
+    Compare the lift coefficient, solve time, and (for the Morino method)
+    GMRES iteration count of the steady panel methods, as the number of
+    panels grows.
+    '''
+    code = '2412'   # NACA 4-digit code number
+    aoa_deg = 8     # angle of attack (degrees)
+    uinf = (1,0)    # Onset flow
+    methods = [('Hess-Smith', ubem.HessSmithSystem),
+        ('Linear vortex', ubem.LinearVortexSystem),
+        ('Morino', ubem.MorinoSystem)]
+    print('{:>14} {:>6} {:>10} {:>10} {:>6}'.format('Method', 'Panels',
+        'CL', 'Time (s)', 'Iters'))
+    for npan in [40,80,160,320,640]:
+        foil = ubem.naca4(code,npan).pitch(aoa_deg*np.pi/180)
+        for (name,cls) in methods:
+            t0 = time.time()
+            system = cls(foil)
+            soln = system.solve(uinf)
+            t1 = time.time()
+            cp = system.pressure_self(uinf, soln)[0]
+            CD,CL,CM = ubem.airfoil_cdclcm(uinf, foil, cp)
+            iters = (system.info.iterations if cls is ubem.MorinoSystem
+                else '-')
+            print('{:>14} {:>6} {:>10.5f} {:>10.4f} {:>6}'.format(name, npan,
+                CL, t1-t0, iters))
@@ -0,0 +1,51 @@
+import math
+from collections import namedtuple
+from ubem2d.aerodynamics.ForceAndMoment import airfoil_cdclcm
+from ubem2d.aerodynamics.ForceAndMoment import body_cdclcm
+from ubem2d.geometry.Repaneling import paneling_density
+from ubem2d.geometry.Repaneling import repanel
+from ubem2d.solvers.HessSmithSystem import HessSmithSystem
+
+__all__ = ['adaptive_repanel']
+
+def adaptive_repanel(body, uinf, tol = 1.e-3, npan = 40, growth = 1.5,
+    max_panels = 2000, targets = ('CL','CM'), pp = .25, curvature = .5,
+    gradient = 1., solver = HessSmithSystem):
+    '''
+    Repanel a body (see repanel) with as few panels as are needed to fix the
+    given targets, any of 'CL', 'CM' and 'cp_min' (the peak suction), to an
+    absolute tolerance tol.  The first paneling has npan panels spaced by
+    the body's curvature; each subsequent one has growth times as many
+    panels, spaced by curvature and by the pressure gradient of the previous
+    solution (see paneling_density), until successive values of every
+    target agree to within tol or max_panels is reached.
+
+    The steady flow is found by solver(body).solve(uinf), for any of the
+    steady solvers with a pressure_self method.  Moments of an airfoil are
+    taken about chord_point(pp); those of another body about the origin.
+    Return the final body and solution, whether the targets converged, and
+    the history of (panels, targets) pairs.
+    '''
+    airfoil = hasattr(body, 'le')
+    history = []
+    density = paneling_density(body, curvature=curvature, gradient=0.)
+    n = int(npan)
+    while (True):
+        paneled = repanel(body, n, density)
+        system = solver(paneled)
+        soln = system.solve(uinf)
+        cp = system.pressure_self(uinf, soln)[0]
+        if (airfoil):
+            (CD,CL,CM) = airfoil_cdclcm(uinf, paneled, cp, pp)
+        else:
+            (CD,CL,CM) = body_cdclcm(uinf, paneled, cp)
+        values = dict(CL=CL, CM=CM, cp_min=cp.min())
+        history.append((n, tuple(values[k] for k in targets)))
+        converged = (len(history) > 1 and all(abs(a - b) <= tol for (a,b) in
+            zip(history[-1][1], history[-2][1])))
+        if (converged or n >= max_panels):
+            break
+        density = paneling_density(paneled, cp, curvature, gradient)
+        n = min(int(math.ceil(growth*n)), max_panels)
+    return namedtuple('adaptive','body,system,soln,converged,history')(
+        paneled, system, soln, converged, history)
@@ -62,11 +62,8 @@ class Airfoil(Body):
             raise ValueError('Bad path: {}'.format(path))
         with open(path,'r') as fid:
             (n,le) = [int(x) for x in fid.readline().split()]
-            x, y = np.zeros(n), np.zeros(n)
-            for i in range(n):
-                x[i], y[i] = [float(x) for x in fid.readline().split()]
-            fid.close()
-        return Airfoil(x,y,le)
+            data = np.loadtxt(fid, max_rows=n, ndmin=2)
+        return Airfoil(data[:,0].copy(),data[:,1].copy(),le)
     
     def export_to_file(self, path):
         '''
@@ -74,7 +71,7 @@ class Airfoil(Body):
         described in load_from_file().
         '''
         with open(path,'w') as fid:
-            n = len(self)
+            n = len(self._x)
             fid.write('{}\t{}\n'.format(n,self._le))
             for i in range(n):
                 fid.write('{}\t{}\n'.format(self._x[i],self._y[i]))
@@ -124,6 +121,20 @@ class Airfoil(Body):
         else:
             return self.glide(SE2(-alpha),xp,yp) 
 
+    def pitch_heave_velocity(self, pitch_rate, heave_rate, a = 0., X = None,
+        Y = None):
+        '''
+        Return the velocity of the points (X,Y) of this airfoil (by default
+        its panel midpoints) as it pitches up at pitch_rate radians per unit
+        time about self.chord_point(a) and heaves in the y direction at
+        heave_rate, as in pitch and heave.
+        '''
+        if (X is None):
+            (X,Y) = (self.xmid,self.ymid)
+        (xp,yp) = self.chord_point(a)
+        w = pitch_rate if (self._pitch_up == Orientation.CCW) else -pitch_rate
+        return (-w*(Y - yp), w*(X - xp) + heave_rate)
+
     def surge(self, dx):
         '''
         Translate by dx in the x direction.
@@ -0,0 +1,145 @@
+import numpy as np
+from ubem2d.aerodynamics.Airfoil import Airfoil
+from ubem2d.geometry.Orientation import Orientation
+from ubem2d.Errors import SizeMismatchError
+
+__all__ = ['AirfoilBatch']
+
+class AirfoilBatch:
+    '''
+    This class stores the corners of many airfoils in flat arrays, the
+    corners of the kth airfoil being x[offsets[k]:offsets[k+1]] (and the
+    same of y), so that a batch of sections of differing panel counts is
+    held without padding.  Panel data of the whole batch are concatenated
+    in the same way (see panels), as by the solvers for several bodies.
+    '''
+    def __init__(self, x, y, offsets, le, pitch_up = Orientation.CW,
+        names = None):
+        '''
+        x,y:     Coordinates of the corners of all airfoils, concatenated.
+        offsets: Start index of each airfoil's corners, and the total number
+                 of corners.
+        le:      Index of each airfoil's leading-edge corner, counted from
+                 its first corner.
+        pitch_up: Pitch-up orientation common to all airfoils.
+        names:   Optional name (e.g. NACA code) of each airfoil.
+        '''
+        self._x = np.asarray(x, dtype=float)
+        self._y = np.asarray(y, dtype=float)
+        self._offsets = np.asarray(offsets, dtype=int)
+        self._le = np.asarray(le, dtype=int)
+        if (len(self._x) != len(self._y) or self._offsets[-1] != len(self._x)
+            or len(self._le) != len(self._offsets) - 1):
+            raise SizeMismatchError()
+        if (np.any(np.diff(self._offsets) < 4)):
+            raise ValueError('Each airfoil must have at least three panels')
+        self._pitch_up = pitch_up
+        self._names = None if names is None else list(names)
+
+    @classmethod
+    def stack(cls, foils, names = None):
+        '''
+        Build a batch from a sequence of airfoils.
+        '''
+        foils = list(foils)
+        offsets = np.concatenate([[0], np.cumsum([len(f.x) for f in foils])])
+        return cls(np.concatenate([f.x for f in foils]),
+            np.concatenate([f.y for f in foils]), offsets,
+            [f.le for f in foils], foils[0].pitch_up, names)
+
+    @property
+    def x(self):
+        return self._x
+
+    @property
+    def y(self):
+        return self._y
+
+    @property
+    def offsets(self):
+        return self._offsets
+
+    @property
+    def le(self):
+        return self._le
+
+    @property
+    def pitch_up(self):
+        return self._pitch_up
+
+    @property
+    def names(self):
+        return self._names
+
+    @property
+    def npan(self):
+        '''
+        Number of panels of each airfoil.
+        '''
+        return np.diff(self._offsets) - 1
+
+    def __len__(self):
+        return len(self._le)
+
+    def corners(self, k):
+        '''
+        Return views of the corners of the kth airfoil.
+        '''
+        (a,b) = self._offsets[k], self._offsets[k+1]
+        return (self._x[a:b], self._y[a:b])
+
+    def __getitem__(self, k):
+        '''
+        Return the kth airfoil as an Airfoil object.
+        '''
+        if (k < 0):
+            k += len(self)
+        if (k < 0 or k >= len(self)):
+            raise IndexError('Airfoil index out of range')
+        (x,y) = self.corners(k)
+        return Airfoil(x.copy(), y.copy(), int(self._le[k]), self._pitch_up)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def airfoils(self):
+        '''
+        Return a list of the airfoils as Airfoil objects.
+        '''
+        return list(self)
+
+    def stacked(self):
+        '''
+        Return the corners as arrays of shape (airfoils, corners), which
+        requires every airfoil to have the same number of panels.
+        '''
+        n = np.diff(self._offsets)
+        if (np.any(n != n[0])):
+            raise SizeMismatchError('Airfoils differ in their panel counts')
+        return (self._x.reshape(len(self), n[0]),
+            self._y.reshape(len(self), n[0]))
+
+    def panel_offsets(self):
+        '''
+        Return the start index of each airfoil's panels in the arrays
+        returned by panels, and the total number of panels.
+        '''
+        return self._offsets - np.arange(len(self) + 1)
+
+    def panels(self):
+        '''
+        Return the first corner, unit tangent and normal vectors, length and
+        midpoint of every panel, concatenated over the airfoils as
+        (x1,y1,tx,ty,nx,ny,edge,xmid,ymid).  As for an Airfoil, normal
+        vectors are the tangent vectors rotated clockwise.
+        '''
+        # Corners which begin a panel: all but the last of each airfoil
+        first = np.ones(len(self._x), dtype=bool)
+        first[self._offsets[1:] - 1] = False
+        x1, y1 = self._x[first], self._y[first]
+        dx = np.roll(self._x, -1)[first] - x1
+        dy = np.roll(self._y, -1)[first] - y1
+        edge = np.sqrt(dx**2 + dy**2)
+        tx, ty = dx/edge, dy/edge
+        return (x1, y1, tx, ty, ty, -tx, edge, x1 + .5*dx, y1 + .5*dy)
@@ -0,0 +1,219 @@
+import os
+import glob
+import json
+import numpy as np
+from ubem2d.aerodynamics.Airfoil import Airfoil
+from ubem2d.aerodynamics.AirfoilBatch import AirfoilBatch
+from ubem2d.geometry.Orientation import Orientation
+
+__all__ = ['read_airfoil_coordinates', 'AirfoilDatabase']
+
+def coordinate_pairs(lines):
+    '''
+    Return the rows of two numbers among the given lines of text, as an
+    array of shape (rows, 2), skipping any other lines.
+    '''
+    rows = []
+    for line in lines:
+        words = line.replace(',', ' ').split()
+        if (len(words) != 2):
+            continue
+        try:
+            rows.append((float(words[0]), float(words[1])))
+        except ValueError:
+            continue
+    return np.array(rows).reshape(-1, 2)
+
+def read_airfoil_coordinates(path):
+    '''
+    Read airfoil coordinates from a text file in the Selig format (a title
+    line, then the corners from the trailing edge over the upper surface to
+    the leading edge and back under the lower surface) or the Lednicer
+    format (a title line, a line with the numbers of corners on the upper
+    and lower surfaces, then each surface from the leading edge to the
+    trailing edge).  The format is recognized from the second line.
+
+    Return the title and the corners (x,y) ordered as for an Airfoil, with
+    repeated corners removed, and the index of the leading edge: the corner
+    shared by the surfaces of a Lednicer file, and otherwise the corner
+    farthest from the trailing edge.
+    '''
+    with open(path, 'r', errors='replace') as fid:
+        text = fid.read()
+    (title, _, body) = text.partition('\n')
+    try:
+        xy = np.array(body.replace(',', ' ').split(), dtype=float)
+        xy = xy.reshape(-1, 2) if (len(xy)%2 == 0) else None
+    except ValueError:
+        xy = None
+    if (xy is None):
+        xy = coordinate_pairs(body.splitlines())
+    if (len(xy) == 0):
+        raise ValueError('No coordinates in {}'.format(path))
+    le = None
+    if (xy[0,0] > 1.5 and xy[0,1] > 1.5):
+        # Lednicer: both surfaces run from the leading edge
+        (nu,nl) = int(xy[0,0]), int(xy[0,1])
+        if (nu + nl + 1 != len(xy)):
+            raise ValueError('Bad corner counts in {}'.format(path))
+        xy = np.concatenate([xy[nu:0:-1], xy[nu+1:]])
+        le = nu - 1
+    # Remove repeated corners, and order the corners counterclockwise
+    keep = np.concatenate([[True], np.any(np.diff(xy, axis=0) != 0, axis=1)])
+    xy = xy[keep]
+    (x,y) = xy[:,0], xy[:,1]
+    if (le is None):
+        (xt,yt) = .5*(x[0] + x[-1]), .5*(y[0] + y[-1])
+        le = int(np.argmax((x - xt)**2 + (y - yt)**2))
+    else:
+        le = int(np.cumsum(keep)[le] - 1)
+    if (np.sum(x[:-1]*y[1:] - x[1:]*y[:-1]) < 0):
+        (x,y) = x[::-1], y[::-1]
+        le = len(x) - 1 - le
+    if (le == 0 or le == len(x) - 1):
+        raise ValueError('Bad leading edge in {}'.format(path))
+    return title.strip(), np.ascontiguousarray(x), np.ascontiguousarray(y), le
+
+class AirfoilDatabase:
+    '''
+    This class holds a library of airfoil coordinates in a directory of
+    binary files: the corners of all airfoils concatenated in x.npy and
+    y.npy, the start of each airfoil's corners (and the total number of
+    corners) in offsets.npy, the leading-edge indices in le.npy, and the
+    names and titles in index.json.  The coordinate arrays are opened as
+    read-only memory maps, so an airfoil is read from disk only when it is
+    used, and without copying (see corners).
+    '''
+    def __init__(self, path):
+        '''
+        Open the database in the directory path (see build).
+        '''
+        if (not os.path.isdir(path)):
+            raise ValueError('Bad path: {}'.format(path))
+        self._path = path
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode='r')
+        self._x, self._y = load('x.npy'), load('y.npy')
+        self._offsets = np.load(os.path.join(path, 'offsets.npy'))
+        self._le = np.load(os.path.join(path, 'le.npy'))
+        with open(os.path.join(path, 'index.json'), 'r') as fid:
+            index = json.load(fid)
+        self._names = index['names']
+        self._titles = index['titles']
+        self._lookup = {name: k for (k,name) in enumerate(self._names)}
+
+    @classmethod
+    def build(cls, path, sources, pattern = '*.dat', skip_errors = True):
+        '''
+        Import coordinate files in the Selig or Lednicer format (see
+        read_airfoil_coordinates) into a new database in the directory path,
+        and open it.  Each source is a file, or a directory whose files
+        matching pattern are imported.  Airfoils are named by their file
+        names without extension.  Files which cannot be read are skipped if
+        skip_errors, and otherwise raise ValueError.
+        '''
+        if (type(sources) not in [list,tuple]):
+            sources = [sources]
+        files = []
+        for source in sources:
+            if (os.path.isdir(source)):
+                files += sorted(glob.glob(os.path.join(source, pattern)))
+            else:
+                files.append(source)
+        names, titles, xs, ys, les = [], [], [], [], []
+        for f in files:
+            try:
+                (title,x,y,le) = read_airfoil_coordinates(f)
+            except (ValueError, OSError):
+                if (skip_errors):
+                    continue
+                raise
+            names.append(os.path.splitext(os.path.basename(f))[0])
+            titles.append(title)
+            xs.append(x)
+            ys.append(y)
+            les.append(le)
+        if (len(set(names)) != len(names)):
+            raise ValueError('Airfoil names must be unique')
+        os.makedirs(path, exist_ok=True)
+        offsets = np.concatenate([[0], np.cumsum([len(x) for x in xs])])
+        np.save(os.path.join(path, 'x.npy'), np.concatenate(xs + [[]]))
+        np.save(os.path.join(path, 'y.npy'), np.concatenate(ys + [[]]))
+        np.save(os.path.join(path, 'offsets.npy'), offsets.astype(np.int64))
+        np.save(os.path.join(path, 'le.npy'), np.array(les, dtype=np.int64))
+        with open(os.path.join(path, 'index.json'), 'w') as fid:
+            json.dump(dict(names=names, titles=titles), fid)
+        return cls(path)
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def names(self):
+        return self._names
+
+    @property
+    def titles(self):
+        return self._titles
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._lookup
+
+    def index(self, key):
+        '''
+        Return the index of the airfoil of the given name (or index).
+        '''
+        if (isinstance(key, str)):
+            if (key not in self._lookup):
+                raise KeyError('No airfoil named {}'.format(key))
+            return self._lookup[key]
+        k = int(key)
+        if (k < 0):
+            k += len(self)
+        if (k < 0 or k >= len(self)):
+            raise IndexError('Airfoil index out of range')
+        return k
+
+    def corners(self, key):
+        '''
+        Return read-only views of the corners of the airfoil of the given
+        name or index, backed by the memory-mapped files.
+        '''
+        k = self.index(key)
+        (a,b) = self._offsets[k], self._offsets[k+1]
+        return (self._x[a:b].view(np.ndarray), self._y[a:b].view(np.ndarray))
+
+    def __getitem__(self, key):
+        '''
+        Return the airfoil of the given name or index as an Airfoil, whose
+        corners are views of the memory-mapped files until it is moved.
+        '''
+        (x,y) = self.corners(key)
+        return Airfoil(x, y, int(self._le[self.index(key)]))
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def batch(self, keys = None):
+        '''
+        Return the airfoils of the given names or indices (all if not given)
+        as an AirfoilBatch.
+        '''
+        ks = range(len(self)) if keys is None else [self.index(key) for key
+            in keys]
+        ks = np.array(ks, dtype=int)
+        if (len(ks) == len(self) and np.all(ks == np.arange(len(self)))):
+            (x,y) = np.asarray(self._x), np.asarray(self._y)
+            offsets = self._offsets
+        else:
+            idx = np.concatenate([np.arange(self._offsets[k],
+                self._offsets[k+1]) for k in ks] + [np.zeros(0, dtype=int)])
+            (x,y) = self._x[idx], self._y[idx]
+            offsets = np.concatenate([[0], np.cumsum(np.diff(
+                self._offsets)[ks])])
+        return AirfoilBatch(x, y, offsets, self._le[ks], Orientation.CW,
+            [self._names[k] for k in ks])
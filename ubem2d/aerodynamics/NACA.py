@@ -1,8 +1,25 @@
 import numpy as np
 from ubem2d.aerodynamics.Airfoil import Airfoil
+from ubem2d.aerodynamics.AirfoilBatch import AirfoilBatch
 from ubem2d.geometry.Orientation import Orientation
 
-__all__ = ['naca4']
+__all__ = ['naca4', 'naca4_modified', 'naca5', 'naca', 'naca_batch']
+
+# Coefficients of the thickness polynomial (highest power first), without
+# and with the closed trailing edge
+_thickness_coefs = (np.array([-.1015, .2843, -.3516, -.1260, 0.]),
+    np.array([-.1036, .2843, -.3516, -.1260, 0.]))
+_sqrt_coef = .2969
+# Slope of the half thickness (per 5*thickness) at the trailing edge of a
+# modified 4-digit section, by position of maximum thickness (tenths chord)
+_modified_te_slope = {2: .200, 3: .234, 4: .315, 5: .465, 6: .700}
+# Mean-line constants of the 5-digit series for a design lift coefficient of
+# 0.3, by position of maximum camber (twentieths chord): r and k1, and for
+# the reflexed lines also k2/k1
+_camber5 = {1: (.0580, 361.4), 2: (.1260, 51.64), 3: (.2025, 15.957),
+    4: (.2900, 6.643), 5: (.3910, 3.230)}
+_camber5_reflexed = {2: (.1300, 51.99, .000764), 3: (.2170, 15.793, .00677),
+    4: (.3180, 6.520, .0303), 5: (.4410, 3.191, .1355)}
 
 def parse_naca4_code(code):
     if (len(code) != 4):
@@ -16,80 +33,283 @@ def parse_naca4_code(code):
         raise ValueError('p must lie in the interval (0,1) when m != 0')
     return m, p, th
 
-def naca4(code, npan, clamp = True, uniform = False):
+def parse_naca5_code(code):
+    if (len(code) != 5 or not code.isdigit()):
+        raise ValueError('NACA code must be five digits')
+    (L,P,Q) = [int(d) for d in code[:3]]
+    th = .01*float(code[3:])
+    table = _camber5_reflexed if (Q == 1) else _camber5
+    if (Q > 1 or P not in table):
+        raise ValueError('Unsupported NACA 5-digit mean line: {}'.format(
+            code[:3]))
+    (r,k1) = table[P][:2]
+    k21 = table[P][2] if (Q == 1) else 0.
+    return r, k1*L/2., k21, Q == 1, th
+
+def parse_naca_code(code):
     '''
-    This method returns an Airfoil object which represents a NACA airfoil of
-    the given type and number of panels.  For more details, refer to the
-    literature, or to: https://en.wikipedia.org/wiki/NACA_airfoil
+    Return the family ('4', '4m' or '5') of a NACA code, and its mean-line
+    and thickness parameters: (m,p) and th for the 4-digit series, (m,p)
+    and (th,I,T) for the modified 4-digit series (codes such as 0012-64),
+    and (r,k1,k2/k1,reflexed) and th for the 5-digit series.
     '''
+    code = str(code).strip().upper().replace('NACA', '').strip()
+    if ('-' in code):
+        (digits,mod) = code.split('-')
+        if (len(mod) != 2 or not mod.isdigit()):
+            raise ValueError('Bad modified 4-digit suffix: {}'.format(mod))
+        (m,p,th) = parse_naca4_code(digits)
+        (I,T) = int(mod[0]), int(mod[1])
+        if (T not in _modified_te_slope):
+            raise ValueError('Position of maximum thickness must be 0.2 to '
+                '0.6 chord')
+        return '4m', (m,p), (th,I,T)
+    if (len(code) == 5):
+        params = parse_naca5_code(code)
+        return '5', params[:4], params[4]
     (m,p,th) = parse_naca4_code(code)
-    if (npan != int(npan)):
-        raise ValueError('Number of panels must be an integer')
-    c = 1.
-    # Check input
-    if (npan < 4):
-        raise Valueerror('Must specify at least four panels')
-    # Polynomial coefficients for NACA 4-digit series
-    coefs = np.array([-.1015, .2843, -.3516, -.1260, 0.])
-    if (clamp):
-        coefs[0] = -.1036
-    sqrtCoef = .2969
-    # Corner counts
+    return '4', (m,p), th
+
+def naca_abscissae(npan, uniform = False, c = 1.):
+    '''
+    Return the abscissae of the corners along the upper surface (trailing
+    edge to leading edge) and the lower surface (onward to the trailing
+    edge) of a NACA airfoil with npan panels, cosine-spaced unless uniform.
+    '''
     n = npan + 1         # number of corners along entire airfoil
     nu = int(n/2) + n%2  # number of corners along upper surface
     nl = n-nu            # number of corners along lower surface
-    # Abcissa along upper surface
     if (uniform):
         xu = np.linspace(c, 0, nu)
     else:
         t = np.linspace(.5*np.pi, 0, nu)
         xu = c*(1-np.cos(t))
     # Abcissa along lower surface determined by those along upper surface
-    xl = np.zeros(nl)
     if (npan % 2 == 0):
-        for i in range(nl):
-            xl[i] = xu[-(i+2)]
+        xl = xu[::-1][1:nl+1].copy()
     else:
         dxu = np.diff(xu)
-        for i in range(nl-1):
-            xl[i] = xu[-(i+1)]-.5*dxu[-(i+1)]
+        xl = np.zeros(nl)
+        xl[:-1] = xu[::-1][:nl-1] - .5*dxu[::-1][:nl-1]
         xl[-1] = xu[0]
-    # Construct thickness distribution along upper and lower surfaces
-    ytu = 5*th*c*(sqrtCoef*np.sqrt(xu/c) + np.polyval(coefs, xu/c))
-    ytl = 5*th*c*(sqrtCoef*np.sqrt(xl/c) + np.polyval(coefs, xl/c))
-    # Compute upper and lower surfaces
-    if (m == 0):
-        x = np.concatenate((xu, xl))
-        y = np.concatenate((ytu, -1.*ytl))
+    return xu, xl
+
+def thickness4(x, th, clamp = True, c = 1.):
+    '''
+    Half thickness of the 4-digit series at abscissae x, for thickness th
+    (and clamp, the closed trailing edge) broadcast against x.
+    '''
+    coefs = np.where(np.asarray(clamp)[...,None], _thickness_coefs[1],
+        _thickness_coefs[0])
+    # Horner's rule, as np.polyval, for coefficients broadcast against x
+    poly = np.zeros(np.broadcast(x, coefs[...,0]).shape)
+    for k in range(coefs.shape[-1]):
+        poly = poly*(x/c) + coefs[...,k]
+    return 5*th*c*(_sqrt_coef*np.sqrt(x/c) + poly)
+
+def thickness4_modified(x, th, I, T, clamp = True, c = 1.):
+    '''
+    Half thickness of the modified 4-digit series at abscissae x, for
+    thickness th, leading-edge radius index I and position of maximum
+    thickness T (tenths chord), broadcast against x.  The forward part
+    a0*sqrt(x) + a1*x + a2*x^2 + a3*x^3 and the aft part d0 + d1*(1-x) +
+    d2*(1-x)^2 + d3*(1-x)^3 meet with zero slope and equal curvature at the
+    maximum thickness; the trailing edge is closed if clamp (d0 = 0, and
+    otherwise 0.002).
+    '''
+    I, T = np.asarray(I), np.asarray(T)
+    M = .1*T
+    s = 1. - M
+    d0 = np.where(clamp, 0., .002)
+    d1 = np.vectorize(_modified_te_slope.get, otypes=[float])(T)
+    # Aft: value .1 and zero slope at x = M
+    det = s**2*3*s**2 - s**3*2*s
+    r1, r2 = .1 - d0 - d1*s, -d1
+    d2 = (r1*3*s**2 - s**3*r2)/det
+    d3 = (s**2*r2 - 2*s*r1)/det
+    # Forward: value, slope and curvature match the aft part at x = M
+    a0 = _sqrt_coef*np.where(I == 9, np.sqrt(3.), I/6.)
+    A = np.zeros(np.shape(M) + (3,3))
+    A[...,0,:] = np.stack([M, M**2, M**3], -1)
+    A[...,1,:] = np.stack([np.ones(np.shape(M)), 2*M, 3*M**2], -1)
+    A[...,2,:] = np.stack([np.zeros(np.shape(M)), 2*np.ones(np.shape(M)),
+        6*M], -1)
+    b = np.stack([.1 - a0*np.sqrt(M), -.5*a0/np.sqrt(M),
+        2*d2 + 6*d3*s + .25*a0*M**-1.5], -1)
+    (a1,a2,a3) = np.moveaxis(np.linalg.solve(A, b[...,None])[...,0], -1, 0)
+    xc, sc = x/c, 1. - x/c
+    fwd = a0*np.sqrt(xc) + a1*xc + a2*xc**2 + a3*xc**3
+    aft = d0 + d1*sc + d2*sc**2 + d3*sc**3
+    return 5*th*c*np.where(xc <= M, fwd, aft)
+
+def camber4(x, m, p, c = 1.):
+    '''
+    Mean line of the 4-digit series, and its slope, at abscissae x for
+    maximum camber m at p chord, broadcast against x.
+    '''
+    m, p = np.asarray(m, dtype=float), np.asarray(p, dtype=float)
+    # Sections without camber have p == 0; any p then gives zero camber
+    p = np.where(m == 0, .5, p)
+    fwd = (x <= p*c)
+    yc = np.where(fwd, m*x/(p*p)*(2*p-x/c),
+        m*(c-x)/((1-p)**2)*(1+x/c-2*p))
+    dyc = np.where(fwd, 2*m/(p*p)*(p-x/c), 2*m/((1-p)**2)*(p-x/c))
+    return yc, dyc
+
+def camber5(x, r, k1, k21, reflexed, c = 1.):
+    '''
+    Mean line of the 5-digit series, and its slope, at abscissae x for the
+    constants r, k1 and (reflexed lines) k2/k1, broadcast against x.
+    '''
+    xc = x/c
+    reflexed = np.asarray(reflexed, dtype=bool)
+    fwd = (xc < r)
+    # Standard mean lines
+    yc = np.where(fwd, k1/6*(xc**3 - 3*r*xc**2 + r**2*(3 - r)*xc),
+        k1*r**3/6*(1 - xc))
+    dyc = np.where(fwd, k1/6*(3*xc**2 - 6*r*xc + r**2*(3 - r)),
+        -k1*r**3/6*np.ones(np.shape(xc)))
+    # Reflexed mean lines
+    e = (1 - r)**3
+    cubic = np.where(fwd, 1., k21)
+    ycr = k1/6*(cubic*(xc - r)**3 - k21*e*xc - r**3*xc + r**3)
+    dycr = k1/6*(3*cubic*(xc - r)**2 - k21*e - r**3)
+    return c*np.where(reflexed, ycr, yc), np.where(reflexed, dycr, dyc)
+
+def naca_corners(xu, xl, ytu, ytl, ycu, dycu, ycl, dycl):
+    '''
+    Return the corners of NACA airfoils from the abscissae, half thickness,
+    mean line and slope along their upper and lower surfaces (the last axis
+    running along each surface).
+    '''
+    thu = np.arctan(dycu)
+    thl = np.arctan(dycl)
+    xU = xu - ytu*np.sin(thu)
+    yU = ycu + ytu*np.cos(thu)
+    xL = xl + ytl*np.sin(thl)
+    yL = ycl - ytl*np.cos(thl)
+    return np.concatenate((xU, xL), -1), np.concatenate((yU, yL), -1)
+
+def check_npan(npan):
+    if (npan != int(npan)):
+        raise ValueError('Number of panels must be an integer')
+    if (npan < 4):
+        raise ValueError('Must specify at least four panels')
+    return int(npan)
+
+def naca_section(family, camber, thickness, npan, clamp, uniform):
+    '''
+    Return the corners of NACA airfoils of one family (see parse_naca_code),
+    all with npan panels, given arrays of their mean-line and thickness
+    parameters (one per airfoil) and clamp options.  The corners are arrays
+    of shape (airfoils, npan+1).
+    '''
+    (xu,xl) = naca_abscissae(npan, uniform)
+    col = lambda a: np.asarray(a)[:,None]
+    if (family == '4m'):
+        (th,I,T) = thickness
+        t = lambda x: thickness4_modified(x, col(th), col(I), col(T),
+            col(clamp))
+    else:
+        t = lambda x: thickness4(x, col(thickness), col(clamp))
+    if (family == '5'):
+        (r,k1,k21,reflexed) = camber
+        cam = lambda x: camber5(x, col(r), col(k1), col(k21), col(reflexed))
     else:
-        ycu = np.zeros(len(xu))
-        dycudx = np.zeros(len(xu))
-        ycl = np.zeros(len(xl))
-        dycldx = np.zeros(len(xl))
-        for i in range(len(ycu)):
-            if (xu[i] <= p*c):
-                ycu[i] = m*xu[i]/(p*p)*(2*p-xu[i]/c)
-                dycudx[i] = 2*m/(p*p)*(p-xu[i]/c)
-            else:
-                ycu[i] = m*(c-xu[i])/((1-p)**2)*(1+xu[i]/c-2*p)
-                dycudx[i] = 2*m/((1-p)**2)*(p-xu[i]/c)
-        for i in range(len(ycl)):
-            if (xl[i] <= p*c):
-                ycl[i] = m*xl[i]/(p*p)*(2*p-xl[i]/c)
-                dycldx[i] = 2*m/(p*p)*(p-xl[i]/c)
-            else:
-                ycl[i] = m*(c-xl[i])/((1-p)**2)*(1+xl[i]/c-2*p)
-                dycldx[i] = 2*m/((1-p)**2)*(p-xl[i]/c)
-        thu = np.arctan(dycudx)
-        thl = np.arctan(dycldx)
-        xU = xu - ytu*np.sin(thu)
-        yU = ycu + ytu*np.cos(thu)
-        xL = xl + ytl*np.sin(thl)
-        yL = ycl - ytl*np.cos(thl)
-        x = np.concatenate((xU, xL))
-        y = np.concatenate((yU, yL))
-
-    return Airfoil(x, y, nu-1, Orientation.CW)
+        (m,p) = camber
+        cam = lambda x: camber4(x, col(m), col(p))
+    (ycu,dycu), (ycl,dycl) = cam(xu), cam(xl)
+    shape = (len(np.atleast_1d(clamp)), len(xu))
+    return naca_corners(np.broadcast_to(xu, shape),
+        np.broadcast_to(xl, (shape[0], len(xl))), t(xu), t(xl), ycu, dycu,
+        ycl, dycl)
+
+def naca(code, npan, clamp = True, uniform = False):
+    '''
+    This method returns an Airfoil object which represents a NACA airfoil of
+    the 4-digit (e.g. 2412), modified 4-digit (e.g. 0012-64) or 5-digit
+    (e.g. 23012) series with the given number of panels.  For the details of
+    each series, refer to Abbott and von Doenhoff, Theory of Wing Sections.
+    '''
+    npan = check_npan(npan)
+    (family,camber,thickness) = parse_naca_code(code)
+    if (family == '4m'):
+        thickness = [[v] for v in thickness]
+    else:
+        thickness = [thickness]
+    (x,y) = naca_section(family, [[v] for v in camber], thickness, npan,
+        [clamp], uniform)
+    nu = int((npan + 1)/2) + (npan + 1)%2
+    return Airfoil(x[0], y[0], nu-1, Orientation.CW)
+
+def naca4(code, npan, clamp = True, uniform = False):
+    '''
+    This method returns an Airfoil object which represents a NACA airfoil of
+    the given type and number of panels.  For more details, refer to the
+    literature, or to: https://en.wikipedia.org/wiki/NACA_airfoil
+    '''
+    parse_naca4_code(code)
+    return naca(code, npan, clamp, uniform)
+
+def naca4_modified(code, npan, clamp = True, uniform = False):
+    '''
+    Return an Airfoil of the NACA modified 4-digit series, the code being of
+    the form MPTT-IT (e.g. 0012-64): I is the leading-edge radius index (6
+    gives the radius of the 4-digit series) and T the position of maximum
+    thickness in tenths of the chord.  If clamp, the trailing edge is
+    closed.
+    '''
+    if ('-' not in code):
+        raise ValueError('Modified 4-digit code must be of the form MPTT-IT')
+    return naca(code, npan, clamp, uniform)
+
+def naca5(code, npan, clamp = True, uniform = False):
+    '''
+    Return an Airfoil of the NACA 5-digit series, the code being of the form
+    LPQTT (e.g. 23012): the design lift coefficient is 0.15*L, the maximum
+    camber lies near 0.05*P chord, the mean line is reflexed if Q is 1, and
+    the thickness is TT percent of the chord.
+    '''
+    parse_naca5_code(code)
+    return naca(code, npan, clamp, uniform)
+
+def naca_batch(codes, npan, clamp = True, uniform = False, thickness = None):
+    '''
+    Return an AirfoilBatch of the NACA airfoils of the given codes (any of
+    the series accepted by naca), with the given numbers of panels, clamp
+    and uniform options, and optionally thicknesses (fractions of the chord,
+    overriding those of the codes); each may be a scalar or one value per
+    code.  Airfoils of one family with the same number of panels and
+    spacing are generated together with array operations.
+    '''
+    codes = [str(code) for code in codes]
+    m = len(codes)
+    npan = np.broadcast_to(npan, m)
+    clamp = np.broadcast_to(clamp, m)
+    uniform = np.broadcast_to(uniform, m)
+    npans = [check_npan(n) for n in npan]
+    parsed = [parse_naca_code(code) for code in codes]
+    if (thickness is not None):
+        thickness = np.broadcast_to(thickness, m)
+        parsed = [(f, cam, (thickness[k],) + th[1:] if (f == '4m') else
+            thickness[k]) for (k,(f,cam,th)) in enumerate(parsed)]
+    offsets = np.concatenate([[0], np.cumsum(np.array(npans) + 1)])
+    x, y = np.zeros(offsets[-1]), np.zeros(offsets[-1])
+    le = np.array([int((n + 1)/2) + (n + 1)%2 - 1 for n in npans])
+    groups = {}
+    for (k,(family,cam,th)) in enumerate(parsed):
+        key = (family, npans[k], bool(uniform[k]))
+        groups.setdefault(key, []).append(k)
+    for ((family,n,unif),ks) in groups.items():
+        cam = list(zip(*[parsed[k][1] for k in ks]))
+        if (family == '4m'):
+            th = list(zip(*[parsed[k][2] for k in ks]))
+        else:
+            th = [parsed[k][2] for k in ks]
+        (xs,ys) = naca_section(family, cam, th, n, clamp[ks], unif)
+        idx = offsets[ks][:,None] + np.arange(n + 1)
+        x[idx], y[idx] = xs, ys
+    return AirfoilBatch(x, y, offsets, le, Orientation.CW, codes)
 
 if __name__  == '__main__':
     import sys
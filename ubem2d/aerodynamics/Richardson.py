@@ -0,0 +1,84 @@
+import math
+from collections import namedtuple
+import numpy as np
+from ubem2d.aerodynamics.ForceAndMoment import airfoil_cdclcm
+from ubem2d.aerodynamics.ForceAndMoment import body_cdclcm
+from ubem2d.solvers.HessSmithSystem import HessSmithSystem
+
+__all__ = ['observed_order', 'richardson_extrapolate', 'richardson_ladder']
+
+def observed_order(f0, f1, f2, ratio, order = 1., bounds = (.5, 4.)):
+    '''
+    Return the observed order of convergence of the values f0, f1, f2 of
+    some quantities at successive resolutions refined by the given ratio,
+    from the ratio of successive changes.  Where the changes vanish or
+    alternate in sign (so the values are not yet in the asymptotic range),
+    the formal order is used instead; the observed order is clipped to
+    the given bounds.
+    '''
+    d1 = np.asarray(f1, dtype=float) - f0
+    d2 = np.asarray(f2, dtype=float) - f1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = np.log(d1/d2)/math.log(ratio)
+    monotone = (d1*d2 > 0) & np.isfinite(p)
+    return np.where(monotone, np.clip(p, *bounds), order)
+
+def richardson_extrapolate(f1, f2, ratio, p):
+    '''
+    Return the Richardson extrapolation of the values f1, f2 of some
+    quantities at successive resolutions refined by the given ratio, which
+    converge with order p, and an estimate of the error in f2 (the
+    difference between it and the extrapolated value).
+    '''
+    f1, f2 = np.asarray(f1, dtype=float), np.asarray(f2, dtype=float)
+    err = (f2 - f1)/(ratio**p - 1.)
+    return (f2 + err, np.abs(err))
+
+def richardson_ladder(make_body, uinf, panels = (50,100,200), pp = .25,
+    order = 1., solver = HessSmithSystem, cache = None):
+    '''
+    Solve the steady flow past the bodies make_body(n) for n in a geometric
+    ladder of panel counts (e.g. make_body = lambda n: naca4(code,n)), and
+    extrapolate the drag, lift and moment coefficients to infinitely many
+    panels.  The order of convergence is observed from the finest three
+    levels (see observed_order; order is the formal order of the method,
+    used where the values are not yet in the asymptotic range), and the
+    estimated error of the extrapolated coefficients is the change from
+    the finest level.  Moments of an airfoil are taken about
+    chord_point(pp); those of another body about the origin.
+
+    The flow is found by solver(body).solve(uinf).  If cache, a dict, is
+    given, the bodies and solvers (with their factored matrices) of each
+    level are kept in it keyed by n and reused, so that a sweep of onset
+    flows refactors nothing after the first.
+
+    Return the extrapolated (CD,CL,CM), their error estimates and observed
+    orders, and the history of (panels, (CD,CL,CM)) pairs.
+    '''
+    panels = [int(n) for n in panels]
+    if (len(panels) < 3):
+        raise ValueError('Must specify at least three levels')
+    ratios = np.array(panels[1:])/np.array(panels[:-1])
+    if (np.any(ratios <= 1) or np.ptp(ratios) > 1.e-12*ratios.max()):
+        raise ValueError('Panel counts must increase geometrically')
+    r = ratios[0]
+    if (cache is None):
+        cache = {}
+    history = []
+    for n in panels:
+        if (n not in cache):
+            body = make_body(n)
+            cache[n] = (body, solver(body))
+        (body, system) = cache[n]
+        soln = system.solve(uinf)
+        cp = system.pressure_self(uinf, soln)[0]
+        if (hasattr(body, 'le')):
+            coefs = airfoil_cdclcm(uinf, body, cp, pp)
+        else:
+            coefs = body_cdclcm(uinf, body, cp)
+        history.append((n, tuple(float(c) for c in coefs)))
+    (f0, f1, f2) = [np.array(h[1]) for h in history[-3:]]
+    p = observed_order(f0, f1, f2, r, order)
+    (coefs, err) = richardson_extrapolate(f1, f2, r, p)
+    return namedtuple('richardson','coefs,error,order,history')(
+        tuple(coefs), err, p, history)
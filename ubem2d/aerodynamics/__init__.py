@@ -1,4 +1,8 @@
 from ubem2d.aerodynamics.Airfoil import *
+from ubem2d.aerodynamics.AirfoilBatch import *
+from ubem2d.aerodynamics.AirfoilDatabase import *
+from ubem2d.aerodynamics.AdaptivePaneling import *
 from ubem2d.aerodynamics.ForceAndMoment import *
 from ubem2d.aerodynamics.NACA import *
+from ubem2d.aerodynamics.Richardson import *
 from ubem2d.aerodynamics.SteadyLift import *
@@ -0,0 +1,76 @@
+import numpy as np
+from ubem2d.fluids.PointVortexWake import PointVortexWake
+from ubem2d.Errors import SizeMismatchError
+from ubem2d.util.arrayify import arrayify
+
+__all__ = ['PeriodicPointVortexWake']
+
+class PeriodicPointVortexWake(PointVortexWake):
+    '''
+    This class extends PointVortexWake to the wake of a cascade of blades:
+    each vortex stands for an infinite row of equal vortices offset by
+    integer multiples of pitch = (px,py).  With T = px + i*py, the complex
+    velocity of a row through z0 is -i*gam/(2T) cot(pi(z-z0)/T), summed in
+    closed form; the vortex at z0 itself keeps its desingularized core.
+    '''
+    _block_entries = 1 << 20    # Point-vortex pairs per block in velocity
+
+    def __init__(self, pitch, gam = None, x = None, y = None, eps = 1.e-6):
+        T = pitch[0] + 1j*pitch[1]
+        if (T == 0):
+            raise ValueError('Pitch must be nonzero')
+        super().__init__(gam, x, y, eps)
+        self._pitch = (pitch[0], pitch[1])
+        self._T = T
+
+    @property
+    def pitch(self):
+        return self._pitch
+
+    def velocity(self, x, y):
+        '''
+        Compute the velocity induced by the wake and all its periodic copies
+        at the points (x,y), where x and y are scalars or numpy arrays of
+        arbitrary positive dimension and equal shape.
+        '''
+        x,y = arrayify(x,y)
+        if (x.shape != y.shape):
+            raise SizeMismatchError()
+        (u,v) = super().velocity(x,y)
+        T = self._T
+        sz = ((x + 1j*y)/T)[...,None]
+        sk = (self._x + 1j*self._y)/T
+        ck = -.5j*self._gam/T
+        # Copies other than the vortex itself: cot(w) - 1/w is smooth.  The
+        # vortices are taken in blocks to bound the size of the temporaries
+        block = max(1, self._block_entries//max(1, x.size))
+        for a in range(0, len(sk), block):
+            c = (cot_minus_inverse(sz, sk[a:a+block])*ck[a:a+block]).sum(-1)
+            u += c.real
+            v -= c.imag
+        return (u,v)
+
+def cot_minus_inverse(s, sk):
+    '''
+    Return cot(w) - 1/w for w = pi*(s - sk), broadcasting the complex arrays
+    s and sk, evaluated without overflow for large imaginary parts and by
+    its Taylor series near w = 0.  Since cot(w) = -i(1+q)/(1-q) with q =
+    exp(2iw) (and cot(w) = -cot(-w), used where Im(w) < 0 so that |q| <= 1),
+    q is formed from the phases exp(2i*pi*Re(s)) and exp(-2i*pi*Re(sk)) of
+    each array, and the real exponential of the difference of imaginary
+    parts, rather than by an exponential of each complex entry.
+    '''
+    s, sk = np.asarray(s, dtype=complex), np.asarray(sk, dtype=complex)
+    phase = np.exp(2j*np.pi*s.real)*np.exp(-2j*np.pi*sk.real)
+    d = s.imag - sk.imag
+    up = (d >= 0)
+    q = np.where(up, phase, phase.conj())*np.exp(-2*np.pi*np.abs(d))
+    w = np.pi*(s - sk)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cot = -1j*(1 + q)/(1 - q)
+        f = np.where(up, cot, -cot) - 1/w
+    small = np.abs(w) < 1.e-3
+    if (small.any()):
+        ws = w[small]
+        f[small] = -ws/3. - ws**3/45.
+    return f
@@ -0,0 +1,156 @@
+from collections import namedtuple
+import numpy as np
+from ubem2d.Errors import SizeMismatchError
+from ubem2d.geometry.MeshHelper import exterior
+
+__all__ = ['trace_streamlines']
+
+# Dormand-Prince 5(4) coefficients: the stages A (the last row being the
+# weights of the fifth-order solution, so that the last stage is evaluated
+# there and reused as the first stage of the next step), their nodes C, and
+# the weights E of the fifth- less those of the embedded fourth-order one
+_A = [[],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84]]
+_C = [0, 1/5, 3/10, 4/5, 8/9, 1, 1]
+_E = [71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40]
+
+def trace_streamlines(velocity, x0, y0, length = 1., bodies = None,
+    box = None, tol = 1.e-6, h0 = None, hmax = None, max_steps = 10000,
+    stop_speed = 1.e-8, direction = 1, t0 = None):
+    '''
+    Trace the streamlines from the seeds (x0,y0) for an arc length length,
+    all seeds advancing together, each by adaptive steps of the Dormand-
+    Prince Runge-Kutta 5(4) method with local error at most tol in
+    position.  velocity(x,y) returns the velocity U,V at the 1-d arrays of
+    points x,y; it is called once per stage with the seeds still being
+    traced, e.g. system.flow_external(uinf, soln, x, y).  If a time t0 is
+    given, velocity is instead called as velocity(x,y,t), and the pathlines
+    are traced from time t0 for a duration length.  If direction is -1,
+    lines are traced upstream (backward in time).
+
+    A seed stops when it enters one of the given bodies, leaves the box
+    (xmin,xmax,ymin,ymax), reaches a speed below stop_speed (streamlines
+    only), or after max_steps steps.  Steps are at most hmax (by default
+    length/50), so that a step does not jump over a thin body.
+
+    Return a namedtuple with the points of the lines packed in arrays x,y,
+    the points of line k being x[offsets[k]:offsets[k+1]], and the reason
+    each line stopped: 'length', 'body', 'domain', 'stagnation' or 'steps'.
+    Points inside a body or outside the box are not included.
+    '''
+    x0 = np.array(x0, dtype=float).ravel()
+    y0 = np.array(y0, dtype=float).ravel()
+    if (x0.shape != y0.shape):
+        raise SizeMismatchError()
+    if (direction not in [1,-1]):
+        raise ValueError('Direction must be 1 or -1')
+    if (bodies is not None and type(bodies) not in [list,tuple]):
+        bodies = [bodies]
+    hmax = length/50 if hmax is None else hmax
+    h0 = min(hmax, length/1000) if h0 is None else h0
+    n = len(x0)
+
+    def field(x, y, s):
+        '''
+        Return the rates of change of x,y with arc length (or time) s, and
+        the speed.
+        '''
+        if (t0 is None):
+            (u,v) = velocity(x, y)
+        else:
+            (u,v) = velocity(x, y, t0 + direction*s)
+        (u,v) = np.asarray(u, dtype=float), np.asarray(v, dtype=float)
+        q = np.hypot(u, v)
+        if (t0 is None):
+            scale = direction/np.maximum(q, np.finfo(float).tiny)
+            return (u*scale, v*scale, q)
+        return (direction*u, direction*v, q)
+
+    def outside(x, y):
+        '''
+        Return a boolean array, True where the points leave the domain.
+        '''
+        out = np.zeros(len(x), dtype=bool)
+        if (box is not None):
+            out |= ((x < box[0]) | (x > box[1]) | (y < box[2]) |
+                (y > box[3]))
+        return out
+
+    def blocked(x, y):
+        if (bodies is None or len(x) == 0):
+            return np.zeros(len(x), dtype=bool)
+        return ~exterior(bodies, x, y)
+
+    reason = np.full(n, 'steps', dtype=object)
+    (x,y) = x0.copy(), y0.copy()
+    s, h = np.zeros(n), np.full(n, float(h0))
+    # Seeds starting in a body or out of the domain produce no points
+    start_body, start_out = blocked(x, y), outside(x, y)
+    reason[start_body] = 'body'
+    reason[start_out & ~start_body] = 'domain'
+    active = np.flatnonzero(~(start_body | start_out))
+    (kx,ky) = np.zeros(n), np.zeros(n)
+    # Points are recorded as (seed, x, y), and packed at the end
+    ids, xs, ys = [active], [x[active]], [y[active]]
+    if (len(active) > 0):
+        (kx[active],ky[active],q) = field(x[active], y[active], s[active])
+        if (t0 is None):
+            still = q < stop_speed
+            reason[active[still]] = 'stagnation'
+            active = active[~still]
+    for step in range(max_steps):
+        if (len(active) == 0):
+            break
+        (xa,ya,sa) = x[active], y[active], s[active]
+        ha = np.minimum(h[active], length - sa)
+        K = [(kx[active], ky[active])]
+        for i in range(1, 7):
+            dx = ha*sum(a*k[0] for (a,k) in zip(_A[i], K) if a != 0)
+            dy = ha*sum(a*k[1] for (a,k) in zip(_A[i], K) if a != 0)
+            (fx,fy,q) = field(xa + dx, ya + dy, sa + _C[i]*ha)
+            K.append((fx,fy))
+        # The last stage is at the fifth-order solution
+        (xn,yn) = xa + dx, ya + dy
+        ex = ha*sum(e*k[0] for (e,k) in zip(_E, K) if e != 0)
+        ey = ha*sum(e*k[1] for (e,k) in zip(_E, K) if e != 0)
+        err = np.hypot(ex, ey)/tol
+        with np.errstate(divide='ignore'):
+            factor = np.clip(.9*err**-.2, .2, 5.)
+        h[active] = np.minimum(ha*factor, hmax)
+        ok = err <= 1
+        acc = active[ok]
+        (xn,yn,q) = xn[ok], yn[ok], q[ok]
+        x[acc], y[acc], s[acc] = xn, yn, sa[ok] + ha[ok]
+        kx[acc], ky[acc] = K[6][0][ok], K[6][1][ok]
+        # Stop seeds entering bodies or leaving the domain, before
+        # recording their points
+        hit, out = blocked(xn, yn), outside(xn, yn)
+        reason[acc[hit]] = 'body'
+        reason[acc[out & ~hit]] = 'domain'
+        keep = ~(hit | out)
+        ids.append(acc[keep])
+        xs.append(xn[keep])
+        ys.append(yn[keep])
+        done = hit | out
+        done_length = keep & (s[acc] >= length*(1 - 1.e-12))
+        reason[acc[done_length]] = 'length'
+        done |= done_length
+        if (t0 is None):
+            still = keep & ~done_length & (q < stop_speed)
+            reason[acc[still]] = 'stagnation'
+            done |= still
+        stopped = np.zeros(n, dtype=bool)
+        stopped[acc[done]] = True
+        active = active[~stopped[active]]
+    ids = np.concatenate(ids)
+    order = np.argsort(ids, kind='stable')
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(ids,
+        minlength=n))])
+    return namedtuple('streamlines','x,y,offsets,reason')(
+        np.concatenate(xs)[order], np.concatenate(ys)[order], offsets,
+        reason.astype(str))
@@ -1,2 +1,4 @@
 from ubem2d.fluids.BasicFlows import *
 from ubem2d.fluids.PointVortexWake import *
+from ubem2d.fluids.PeriodicPointVortexWake import *
+from ubem2d.fluids.Streamlines import *
@@ -45,6 +45,8 @@ class Body(BrokenLine):
     
     @property
     def beta(self):
+        if (self._beta is None):
+            self._beta = np.arctan2(self._ny,self._nx)
         return self._beta
     
     def update_body(self):
@@ -54,27 +56,41 @@ class Body(BrokenLine):
         else:
             self._nx = self._ty
             self._ny = -self._tx
-        self._beta = np.arctan2(self._ny,self._nx)
+        self._beta = None  # Computed when needed
         return self
     
-    def glide(self, g, x0 = None, y0 = None):
-        super().glide(g,x0,y0)    
-        return self.update_body()
+    def rotational_symmetry(self, tol = 1.e-9):
+        '''
+        Return the largest m such that rotating this (closed) body through
+        2*pi/m about its centroid maps each corner onto the corner nedge/m
+        places further along, or 1 if there is no such symmetry.  The
+        influence matrices of a body with m-fold symmetry are block-circulant
+        with blocks of size nedge/m (see BlockCirculant).  Corners must match
+        to within tol times the body's radius.
+        '''
+        if (not self.closed):
+            return 1
+        n = self.nedge
+        (cx,cy) = self.centroid
+        z = (self._x[:-1] - cx) + 1j*(self._y[:-1] - cy)
+        tol = tol*np.abs(z).max()
+        for m in range(n, 1, -1):
+            if (n % m != 0):
+                continue
+            zp = np.roll(z, -(n//m))
+            for sign in [1,-1]:
+                if (np.abs(zp - z*np.exp(sign*2j*np.pi/m)).max() <= tol):
+                    return m
+        return 1
+
+    def update_rigid(self, g, x0, y0):
+        '''
+        A rigid motion rotates the normal vectors with the tangent vectors.
+        '''
+        (self._nx,self._ny) = g.map_vector(self._nx,self._ny)
+        self._beta = None
+        return super().update_rigid(g,x0,y0)
 
-    def scale(self, scale):
-        super().scale(scale)
-        return self.update_body()
-    
-    def translate(self, x0, y0):
-        return super().translate(x0,y0)
-    
-    def rotate(self, theta, x0 = None, y0 = None):
-        super().rotate(theta,x0,y0)
-        return self.update_body()
-    
-    def center(self):
-        return super().center()
-    
     def set_corners(self,x,y):
         super().set_corners(x,y)
         return self.update_body()
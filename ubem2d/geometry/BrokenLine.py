@@ -41,6 +41,8 @@ class BrokenLine(Scatter):
 
     @property
     def theta(self):
+        if (self._theta is None):
+            self._theta = np.arctan2(self._ty,self._tx)
         return self._theta
 
     @property
@@ -77,31 +79,22 @@ class BrokenLine(Scatter):
         self._edge = np.sqrt(dx**2 + dy**2)
         self._tx = dx/self._edge
         self._ty = dy/self._edge
-        self._theta = np.arctan2(self._ty,self._tx)
+        self._theta = None  # Computed when needed
         self._xmid = self._x[:-1] + .5*dx
         self._ymid = self._y[:-1] + .5*dy
         self._perimeter = np.sum(self._edge)
         return self
 
-    def glide(self, g, x0 = None, y0 = None):
-        super().glide(g,x0,y0)
-        return self.update_broken_line()
-
-    def scale(self, scale):
-        super().scale(scale)
-        return self.update_broken_line()
-
-    def translate(self, x0, y0):
-        super().translate(x0,y0)
-        return self.update_broken_line()
-
-    def rotate(self, theta, x0 = None, y0 = None):
-        super().rotate(theta,x0,y0)
-        return self.update_broken_line()
-
-    def center(self):
-        super().center()
-        return self.update_broken_line()
+    def update_rigid(self, g, x0, y0):
+        '''
+        A rigid motion preserves the lengths of the segments, and rotates
+        their tangent vectors and moves their midpoints as it does the
+        points.
+        '''
+        (self._tx,self._ty) = g.map_vector(self._tx,self._ty)
+        (self._xmid,self._ymid) = g.map_point(self._xmid,self._ymid,x0,y0)
+        self._theta = None
+        return super().update_rigid(g,x0,y0)
 
     def set_corners(self,x,y):
         super().set_corners(x,y)
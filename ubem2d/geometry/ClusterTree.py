@@ -0,0 +1,155 @@
+import numpy as np
+from ubem2d.Errors import SizeMismatchError
+from ubem2d.util.arrayify import arrayify
+
+__all__ = ['ClusterTree', 'block_partition']
+
+class ClusterTree():
+    '''
+    This class represents a binary space-partitioning tree over a cloud of
+    points in the plane.  Each node owns a contiguous range of the permuted
+    points, and is split in two at the median of its longer bounding-box
+    side until it holds no more than leaf_size points.
+
+    Each node is enclosed by a disk, whose center and radius are stored.  If
+    the points are the centers of objects of nonzero extent (e.g. the
+    midpoints of panels), then the optional argument r gives the extent of
+    each object, and the node radii are enlarged so that each disk encloses
+    its objects entirely.
+    '''
+    def __init__(self, x, y, leaf_size = 32, r = None):
+        x,y = arrayify(x,y)
+        x,y = x.ravel(), y.ravel()
+        if (len(x) != len(y)):
+            raise SizeMismatchError()
+        if (len(x) == 0):
+            raise ValueError('Cannot build a tree over an empty point set')
+        if (leaf_size < 1):
+            raise ValueError('Leaf size must be at least 1')
+        if (r is None):
+            r = np.zeros(len(x))
+        else:
+            r = np.broadcast_to(arrayify(r).ravel(), x.shape)
+        self._leaf_size = int(leaf_size)
+        perm = np.arange(len(x))
+        start, stop, left, right = [0], [len(x)], [-1], [-1]
+        stack = [0]
+        while (stack):
+            k = stack.pop()
+            i0, i1 = start[k], stop[k]
+            if (i1 - i0 <= self._leaf_size):
+                continue
+            idx = perm[i0:i1]
+            xk, yk = x[idx], y[idx]
+            if (np.ptp(xk) >= np.ptp(yk)):
+                key = xk
+            else:
+                key = yk
+            half = (i1 - i0)//2
+            perm[i0:i1] = idx[np.argpartition(key, half)]
+            for (j0,j1) in [(i0,i0+half), (i0+half,i1)]:
+                start.append(j0)
+                stop.append(j1)
+                left.append(-1)
+                right.append(-1)
+                stack.append(len(start)-1)
+            left[k], right[k] = len(start)-2, len(start)-1
+        self._perm = perm
+        self._start = np.array(start)
+        self._stop = np.array(stop)
+        self._left = np.array(left)
+        self._right = np.array(right)
+        # Bounding disks of each node
+        nn = len(start)
+        self._cx, self._cy, self._radius = np.zeros(nn), np.zeros(nn), \
+            np.zeros(nn)
+        for k in range(nn):
+            idx = perm[start[k]:stop[k]]
+            xk, yk = x[idx], y[idx]
+            cx = .5*(xk.min() + xk.max())
+            cy = .5*(yk.min() + yk.max())
+            self._cx[k], self._cy[k] = cx, cy
+            self._radius[k] = np.max(np.hypot(xk-cx, yk-cy) + r[idx])
+
+    def __len__(self):
+        '''
+        Return the number of nodes in the tree.
+        '''
+        return len(self._start)
+
+    @property
+    def perm(self):
+        return self._perm
+
+    @property
+    def npoints(self):
+        return len(self._perm)
+
+    @property
+    def leaf_size(self):
+        return self._leaf_size
+
+    @property
+    def cx(self):
+        return self._cx
+
+    @property
+    def cy(self):
+        return self._cy
+
+    @property
+    def radius(self):
+        return self._radius
+
+    def is_leaf(self, k):
+        return self._left[k] < 0
+
+    def children(self, k):
+        return (self._left[k], self._right[k])
+
+    def range(self, k):
+        '''
+        Return the start/stop positions of node k in the permuted ordering.
+        '''
+        return (self._start[k], self._stop[k])
+
+    def indices(self, k):
+        '''
+        Return the (unpermuted) indices of the points owned by node k.
+        '''
+        return self._perm[self._start[k]:self._stop[k]]
+
+    def size(self, k):
+        return self._stop[k] - self._start[k]
+
+    def leaves(self):
+        return [k for k in range(len(self)) if self.is_leaf(k)]
+
+def block_partition(rows, cols, eta = .5):
+    '''
+    Partition the product of two cluster trees into admissible ('far') and
+    inadmissible ('near') pairs of nodes.  A pair of nodes is admissible if
+    the sum of their radii is at most eta times the distance between their
+    centers, so that multipole or low-rank approximations of the interaction
+    converge geometrically with ratio eta.  Inadmissible pairs are split
+    until both nodes are leaves.
+
+    Return two lists of (row node, column node) tuples: far and near.
+    '''
+    if (eta <= 0 or eta >= 1):
+        raise ValueError('Admissibility parameter must lie in (0,1)')
+    far, near = [], []
+    stack = [(0,0)]
+    while (stack):
+        (s,t) = stack.pop()
+        d = np.hypot(rows.cx[s]-cols.cx[t], rows.cy[s]-cols.cy[t])
+        if (rows.radius[s] + cols.radius[t] <= eta*d):
+            far.append((s,t))
+        elif (rows.is_leaf(s) and cols.is_leaf(t)):
+            near.append((s,t))
+        elif (cols.is_leaf(t) or (not rows.is_leaf(s) and
+            rows.radius[s] >= cols.radius[t])):
+            stack.extend([(c,t) for c in rows.children(s)])
+        else:
+            stack.extend([(s,c) for c in cols.children(t)])
+    return (far, near)
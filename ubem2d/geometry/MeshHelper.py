@@ -1,46 +1,136 @@
 import numpy as np
 from ubem2d.Errors import SizeMismatchError
-from scipy.spatial import Delaunay
+from ubem2d.util.tiled_field import evaluate_tiled
 
-__all__ = ['boundary', 'boundary_to_string', 'mesh']
+__all__ = ['interior', 'exterior', 'evaluate_masked', 'boundary',
+    'boundary_to_string', 'mesh']
 
-def boundary(bodies,X,Y):
+def interior_polygon(x, y, px, py):
     '''
-    Return a list I of indicator matrices, one for each body in bodies.  Each
-    I[k] has the same size as X and Y, and has values:
+    Return a boolean array which is True where the points (px,py) (1-d
+    arrays) lie inside the polygon with corners (x,y), closed if need be, by
+    counting the crossings of a ray from each point in the +x direction with
+    the edges.  Only points in the bounding box of the polygon are tested.
+    These are sorted by y, so the points at the height of an edge, which
+    are those its crossing can change, form a contiguous run located by
+    binary search, and each edge is paired only with its run.
+    '''
+    inside = np.zeros(len(px), dtype=bool)
+    x, y = np.append(x, x[0]), np.append(y, y[0])
+    box = np.flatnonzero((px >= x.min()) & (px <= x.max()) &
+        (py >= y.min()) & (py <= y.max()))
+    if (len(box) == 0):
+        return inside
+    order = np.argsort(py[box], kind='stable')
+    (qx,qy) = px[box][order], py[box][order]
+    # The points qy[lo:hi] satisfy min(ya,yb) <= qy < max(ya,yb)
+    (xa,ya,xb,yb) = x[:-1], y[:-1], x[1:], y[1:]
+    lo = np.searchsorted(qy, np.minimum(ya, yb), 'left')
+    hi = np.searchsorted(qy, np.maximum(ya, yb), 'left')
+    counts = hi - lo
+    e = np.repeat(np.arange(len(xa)), counts)
+    first = np.cumsum(counts) - counts
+    q = lo[e] + np.arange(len(e)) - np.repeat(first, counts)
+    xcross = xa[e] + (qy[q] - ya[e])*(xb[e] - xa[e])/(yb[e] - ya[e])
+    crossings = np.bincount(q[qx[q] < xcross], minlength=len(qx))
+    inside[box[order]] = (crossings % 2 == 1)
+    return inside
 
-    0: if the corresponding mesh point is on or inside body k,
-    1: if the corresponding mesh point is outside body k.
+def boundary_cells(x, y, xmin, ymin, h, shape, near = 1):
+    '''
+    Return a boolean array of the given shape, True for the cells of the
+    square grid of cell size h with lower left corner (xmin,ymin) which
+    are within near cells (in each direction) of a cell crossed by an edge
+    of the polygon with corners (x,y), closed if need be.  The cells met by
+    points spaced at most h/2 along the edges are found first; with near at
+    least 1 this covers every cell an edge crosses.  The polygon must lie
+    within the grid.
+    '''
+    x, y = np.append(x, x[0]), np.append(y, y[0])
+    (dx,dy) = np.diff(x), np.diff(y)
+    counts = np.ceil(2*np.hypot(dx, dy)/h).astype(int) + 1
+    e = np.repeat(np.arange(len(dx)), counts)
+    s = (np.arange(len(e)) - np.repeat(np.cumsum(counts) - counts,
+        counts))/(counts[e] - 1).clip(1)
+    i = ((y[e] + s*dy[e] - ymin)/h).astype(int)
+    j = ((x[e] + s*dx[e] - xmin)/h).astype(int)
+    cells = np.zeros(shape, dtype=bool)
+    cells[i,j] = True
+    for k in range(near):
+        grown = cells.copy()
+        grown[1:] |= cells[:-1]
+        grown[:-1] |= cells[1:]
+        grown[:,1:] |= grown[:,:-1].copy()
+        grown[:,:-1] |= grown[:,1:].copy()
+        cells = grown
+    return cells
 
-    If the first arugment is a single body (i.e. not a list of bodies), its
-    indicator matrix, rather than a 1-element list of such, is returned.
+def interior(bodies, X, Y):
+    '''
+    Return a list of boolean arrays, one for each body in bodies, of the
+    shape of X and Y and True where the corresponding point lies inside the
+    body (the polygon of its corners).  The points may be scattered rather
+    than on a mesh, and the bodies need not be convex.  Points on the
+    boundary of a body may fall either way.
 
-    This function works for arbitrary bodies, even non-convex ones, by 
-    computing the Delaunay triangulation of the body, which partitions the 
-    body into triangular simplicies in a nice way.  Once the body is 
-    triangulated, it is a simple matter to check if a given point lies in 
-    any of the body's simplices.
+    If the first argument is a single body (i.e. not a list of bodies), its
+    array, rather than a 1-element list of such, is returned.
     '''
+    (X,Y) = np.asarray(X, dtype=float), np.asarray(Y, dtype=float)
     if (X.shape != Y.shape):
         raise SizeMismatchError()
     list_input = True
     if (type(bodies) not in [list,tuple]):
         list_input = False
         bodies = [bodies]
+    (px,py) = X.ravel(), Y.ravel()
+    masks = [interior_polygon(np.asarray(b.x, dtype=float),
+        np.asarray(b.y, dtype=float), px, py).reshape(X.shape)
+        for b in bodies]
+    if (not list_input):
+        return masks[0]
+    return masks
 
-    mesh_points = np.array([[[x,y] for x in X[0,:]] for y in Y[:,0]])
-    nb = len(bodies)
-    I = nb*[None]
-    for i in range(nb):
-        xmid,ymid,nedge = bodies[i].xmid, bodies[i].ymid, bodies[i].nedge
-        xy = np.array([[xmid[j],ymid[j]] for j in range(nedge)])
-        J = Delaunay(xy).find_simplex(mesh_points)
-        J[np.where(J>=0)] = 0
-        I[i] = (-1)*J
+def exterior(bodies, X, Y):
+    '''
+    Return a boolean array of the shape of X and Y, True where the
+    corresponding point lies outside all of the bodies (see interior).
+    '''
+    if (type(bodies) not in [list,tuple]):
+        bodies = [bodies]
+    mask = np.ones(np.shape(X), dtype=bool)
+    for m in interior(bodies, X, Y):
+        mask &= ~m
+    return mask
 
-    if (not list_input):
-        I = I[0]
-    return I
+def evaluate_masked(f, X, Y, mask = None, fill = np.nan):
+    '''
+    Evaluate the field f(X,Y), which returns a tuple of arrays of the shape
+    of X, only at the points where mask is True (e.g. mask=exterior(bodies,
+    X,Y)), and fill the other entries of the arrays with fill.
+    '''
+    if (mask is None):
+        return f(X, Y)
+    return evaluate_tiled(f, X, Y, mask, tile=None, workers=1, fill=fill)
+
+def boundary(bodies,X,Y):
+    '''
+    Return a list I of indicator matrices, one for each body in bodies.  Each
+    I[k] has the same size as X and Y, and has values:
+
+    0: if the corresponding mesh point is inside body k,
+    1: if the corresponding mesh point is outside body k.
+
+    If the first arugment is a single body (i.e. not a list of bodies), its
+    indicator matrix, rather than a 1-element list of such, is returned.
+
+    This function works for arbitrary bodies, even non-convex ones; see
+    interior, which returns the same information as boolean arrays.
+    '''
+    I = interior(bodies, X, Y)
+    if (type(bodies) not in [list,tuple]):
+        return (~I).astype(int)
+    return [(~m).astype(int) for m in I]
 
 def boundary_to_string(I, inside='O ', outside='. '):
     '''
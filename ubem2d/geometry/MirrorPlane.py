@@ -0,0 +1,77 @@
+import numpy as np
+
+__all__ = ['MirrorPlane']
+
+class MirrorPlane():
+    '''
+    This class represents a line of mirror symmetry of a flow, through the
+    point (x0,y0) and inclined at angle theta to the +x-axis.  It models a
+    ground plane by the method of images, or a configuration which is its
+    own mirror image (e.g. a symmetric biplane), without explicit image
+    panels: only one half of the configuration is discretized.
+
+    In a flow symmetric about the line, each source has an image source of
+    equal strength and each vortex an image vortex of opposite strength.  In
+    both cases the velocity induced at P by the images is R*u(R*P), where R
+    is the reflection and u the velocity induced by the originals, so any
+    velocity evaluator can be mirrored without knowing what it contains.
+    '''
+    def __init__(self, x0 = 0., y0 = 0., theta = 0.):
+        self._x0 = float(x0)
+        self._y0 = float(y0)
+        self._theta = float(theta)
+        self._c = np.cos(2*self._theta)
+        self._s = np.sin(2*self._theta)
+
+    @property
+    def x0(self):
+        return self._x0
+
+    @property
+    def y0(self):
+        return self._y0
+
+    @property
+    def theta(self):
+        return self._theta
+
+    def reflect(self, x, y):
+        '''
+        Return the mirror images of the points x,y.
+        '''
+        dx, dy = x - self._x0, y - self._y0
+        return (self._x0 + self._c*dx + self._s*dy,
+            self._y0 + self._s*dx - self._c*dy)
+
+    def reflect_vector(self, u, v):
+        '''
+        Return the mirror images of the vectors u,v.
+        '''
+        return (self._c*u + self._s*v, self._s*u - self._c*v)
+
+    def image_velocity(self, velocity, X, Y):
+        '''
+        Return the velocity at X,Y induced by the mirror image of a flow
+        whose velocity is given by the callable velocity(X,Y).
+        '''
+        (Xr,Yr) = self.reflect(X, Y)
+        (u,v) = velocity(Xr, Yr)
+        return self.reflect_vector(u, v)
+
+    def symmetric_velocity(self, velocity, X, Y):
+        '''
+        Return the velocity at X,Y induced by a flow, given by the callable
+        velocity(X,Y), together with its mirror image.
+        '''
+        (u,v) = velocity(X, Y)
+        (ui,vi) = self.image_velocity(velocity, X, Y)
+        return (u + ui, v + vi)
+
+    def check_onset(self, uinf, tol = 1.e-12):
+        '''
+        Raise ValueError unless the onset flow uinf is parallel to the line,
+        as a flow symmetric about the line requires.
+        '''
+        normal = np.dot((-np.sin(self._theta), np.cos(self._theta)), uinf)
+        if (np.abs(normal) > tol*max(np.linalg.norm(uinf), 1.)):
+            raise ValueError('Onset flow must be parallel to mirror plane')
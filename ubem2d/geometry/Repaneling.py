@@ -0,0 +1,138 @@
+import numpy as np
+from scipy.interpolate import CubicSpline
+from ubem2d.geometry.Body import Body
+
+__all__ = ['corner_curvature', 'paneling_density', 'repanel']
+
+def corner_turns(body):
+    '''
+    Return the turning angle at each corner of a body, and the mean length
+    of the panels meeting there.  The end corners of an open body do not
+    turn; for a closed body the first and last corners, which coincide,
+    share their values.
+    '''
+    theta = body.theta
+    edge = body.edge
+    turn = np.zeros(body.nedge + 1)
+    h = np.concatenate([[edge[0]], .5*(edge[1:] + edge[:-1]), [edge[-1]]])
+    turn[1:-1] = np.angle(np.exp(1j*np.diff(theta)))
+    if (body.closed):
+        turn[0] = turn[-1] = np.angle(np.exp(1j*(theta[0] - theta[-1])))
+        h[0] = h[-1] = .5*(edge[0] + edge[-1])
+    return (turn, h)
+
+def corner_curvature(body):
+    '''
+    Return the discrete curvature at each corner of a body: the turning
+    angle between adjacent panels divided by their mean length.
+    '''
+    (turn, h) = corner_turns(body)
+    return turn/h
+
+def paneling_density(body, cp = None, curvature = .5, gradient = 1.,
+    corner_angle = np.pi/6):
+    '''
+    Return a panel density, a callable of the normalized arc length u in
+    [0,1] along the body, suited to the body's shape and, if the pressure
+    coefficients cp at its panel midpoints are given, to its flow.  The
+    density is one plus curvature times sqrt(|kappa|) plus gradient times
+    |dcp/ds|, each of the latter normalized by its mean along the body.
+    Panels whose length makes the polygonal error in the shape (~kappa*h^2)
+    or in a constant pressure (~h*dcp/ds) uniform are thereby favoured.
+    Sharp corners, where the turning angle exceeds corner_angle, do not
+    contribute curvature.
+    '''
+    edge = body.edge
+    P = body.perimeter
+    s = np.cumsum(edge) - .5*edge
+    w = np.ones(body.nedge)
+    (turn, h) = corner_turns(body)
+    kappa = np.where(np.abs(turn) > corner_angle, 0., turn/h)
+    wk = np.sqrt(.5*(np.abs(kappa[:-1]) + np.abs(kappa[1:])))
+    wg = np.zeros(body.nedge)
+    if (cp is not None):
+        wg = np.abs(np.gradient(cp, s))
+    for (c,wc) in [(curvature,wk), (gradient,wg)]:
+        mean = np.sum(wc*edge)/P
+        if (c != 0 and mean > 0):
+            w += c*wc/mean
+    # Smooth so that adjacent panel lengths vary gradually
+    for k in range(3):
+        w[1:-1] = .25*w[:-2] + .5*w[1:-1] + .25*w[2:]
+    return lambda u: np.interp(u, s/P, w)
+
+def repanel(body, n, density = None, corner_angle = np.pi/6):
+    '''
+    Return a new body with n panels whose corners lie on a cubic spline
+    through the corners of the given body, parameterized by arc length,
+    and are spaced according to density, a callable of the normalized arc
+    length u in [0,1] (uniform spacing if not given; see paneling_density).
+
+    The end corners, sharp corners (turning angle above corner_angle) and,
+    for an airfoil, the leading edge are kept; the spline is broken at
+    sharp corners and is periodic along a closed body without any.  Panels
+    are shared among the segments between kept corners in proportion to
+    their integrated density.  An airfoil is returned as the same class of
+    airfoil; any other body as a Body with the same orientation.
+    '''
+    n = int(n)
+    if (n < 3):
+        raise ValueError('Must specify at least three panels')
+    x, y = body.x, body.y
+    m = body.nedge
+    t = np.concatenate([[0], np.cumsum(body.edge)])
+    P = t[-1]
+    # Corners to keep, and corners at which to break the spline
+    (turn, h) = corner_turns(body)
+    sharp = list(np.nonzero(np.abs(turn[:-1]) > corner_angle)[0])
+    closed = body.closed
+    breaks = sorted(set([0, m] + sharp))
+    keep = set(breaks)
+    airfoil = hasattr(body, 'le')
+    if (airfoil):
+        keep.add(body.le)
+    keep = sorted(keep)
+    # Spline pieces between breaks
+    if (closed and len(sharp) == 0):
+        splines = [(0, m, CubicSpline(t, np.array([x,y]).T,
+            bc_type='periodic'))]
+    else:
+        splines = []
+        for (i0,i1) in zip(breaks[:-1], breaks[1:]):
+            bc = 'not-a-knot' if (i1 - i0 > 3) else 'natural'
+            splines.append((i0, i1, CubicSpline(t[i0:i1+1],
+                np.array([x[i0:i1+1], y[i0:i1+1]]).T, bc_type=bc)))
+    if (len(keep) - 1 > n):
+        raise ValueError('Too few panels for the corners to be kept')
+    # Cumulative density at fine resolution in arc length
+    if (density is None):
+        density = lambda u: np.ones(np.shape(u))
+    tf = np.unique(np.concatenate([np.linspace(0, P, 20*max(m,n) + 1), t]))
+    wf = np.maximum(density(tf/P), 1.e-12)
+    W = np.concatenate([[0], np.cumsum(.5*(wf[1:] + wf[:-1])*np.diff(tf))])
+    # Share panels among segments by largest remainder (at least one each)
+    Wk = np.interp(t[keep], tf, W)
+    share = n*np.diff(Wk)/W[-1]
+    counts = np.maximum(np.floor(share).astype(int), 1)
+    while (counts.sum() < n):
+        counts[np.argmax(share - counts)] += 1
+    while (counts.sum() > n):
+        i = np.argmax(np.where(counts > 1, counts - share, -np.inf))
+        counts[i] -= 1
+    # New corner parameters equidistribute the cumulative density
+    tn = [np.interp(np.linspace(Wk[k], Wk[k+1], counts[k] + 1)[:-1], W, tf)
+        for k in range(len(counts))]
+    tn = np.concatenate(tn + [[P]])
+    j = np.concatenate([[0], np.cumsum(counts)])
+    tn[j] = t[keep]
+    xn, yn = np.zeros(n+1), np.zeros(n+1)
+    for (i0,i1,spline) in splines:
+        i = (tn >= t[i0]) & (tn <= t[i1])
+        xy = spline(tn[i])
+        xn[i], yn[i] = xy[:,0], xy[:,1]
+    # Kept corners are reproduced exactly
+    xn[j], yn[j] = x[keep], y[keep]
+    if (airfoil):
+        le = int(j[keep.index(body.le)])
+        return type(body)(xn, yn, le, body.pitch_up)
+    return Body(xn, yn, body.rot)
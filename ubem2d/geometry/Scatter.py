@@ -1,5 +1,6 @@
 import numpy as np
 from ubem2d.Errors import SizeMismatchError
+from ubem2d.math.convex_hull import hull_diameter
 from ubem2d.motion.SE2 import SE2
 from ubem2d.util.arrayify import arrayify
 
@@ -26,42 +27,56 @@ class Scatter():
     def diameter(self):
         '''
         The diameter of a collection of points is the maximum value of the 
-        distance between any two points.  Computing this is O(n^2), where n 
-        is the number of corners, so it is computed only when needed.
+        distance between any two points.  It is found from the convex hull of
+        the points (see hull_diameter) in O(n log n) time, where n is the
+        number of corners, and only when needed.
         '''
         if (self._diameter < 0):
-            d2 = 0.  # square of the diameter
-            n = len(self)
-            for i in range(n):
-                for j in range(i+1,n):
-                    dx = self._x[j]-self._x[i]
-                    dy = self._y[j]-self._y[i]
-                    dij2 = dx*dx + dy*dy
-                    if (dij2 > d2):
-                        d2 = dij2
-            self._diameter = np.sqrt(d2)
+            self._diameter = hull_diameter(self._x, self._y)[0]
         return self._diameter
     
     @property
     def centroid(self):
         return (np.mean(self._x),np.mean(self._y))
     
-    def glide(self, g, x0 = None, y0 = None):
-        '''
-        Apply the rigid Euclidean motion g to all points of this body, 
-        with rotations taken about the axis (x0,y0).  If the axis is
-        not specified, it is taken to be the centroid.
-        '''
-        diam = self._diameter # Store diameter: unaffected by rigid motions
+    def _axis(self, x0, y0):
         if ((x0 is None and y0 is not None) or (x0 is not None and y0 is None)):
             raise ValueError('Must specify both axis coordinates, or neither')
         if (x0 is None):
             (x0,y0) = self.centroid
-        (xx,yy) = g.map_point(self._x,self._y,x0,y0)
-        self.set_corners(xx,yy)
-        self._diameter = diam # Restore diameter
+        return (x0,y0)
+
+    def glide(self, g, x0 = None, y0 = None):
+        '''
+        Apply the rigid Euclidean motion g (an SE2, or a 0-dimensional
+        SE2Array) to all points of this body, with rotations taken about
+        the axis (x0,y0).  If the axis is not specified, it is taken to be
+        the centroid.
+        '''
+        if (getattr(g, 'ndim', 0) != 0):
+            raise ValueError('Use trajectory() for arrays of rigid motions')
+        (x0,y0) = self._axis(x0, y0)
+        # The diameter is unaffected by rigid motions
+        (self._x,self._y) = g.map_point(self._x,self._y,x0,y0)
+        return self.update_rigid(g, x0, y0)
+
+    def update_rigid(self, g, x0, y0):
+        '''
+        Update data derived from the points after the rigid motion g about
+        the axis (x0,y0) has been applied to them.  Subclasses transform
+        their cached data here rather than recomputing it.
+        '''
         return self
     
+    def trajectory(self, g, x0 = None, y0 = None):
+        '''
+        Return the points moved by each element of an SE2Array g, as arrays
+        of shape g.shape + (n,), without moving this body.  Rotations are
+        taken about the axis (x0,y0), as in glide.
+        '''
+        (x0,y0) = self._axis(x0, y0)
+        return g.map_point(self._x, self._y, x0, y0)
+
     def scale(self, scale):
         '''
         Scales the cloud of points about its centroid by the given amount.
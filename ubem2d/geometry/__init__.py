@@ -1,9 +1,13 @@
 from ubem2d.geometry.Body import *
 from ubem2d.geometry.BrokenLine import *
 from ubem2d.geometry.CircularCylinder import *
+from ubem2d.geometry.ClusterTree import *
 from ubem2d.geometry.Cylinder import *
 from ubem2d.geometry.Ellipse import *
+from ubem2d.geometry.InteriorMaskCache import *
 from ubem2d.geometry.MeshHelper import *
+from ubem2d.geometry.MirrorPlane import *
 from ubem2d.geometry.Orientation import *
 from ubem2d.geometry.Rectangle import *
+from ubem2d.geometry.Repaneling import *
 from ubem2d.geometry.Scatter import *
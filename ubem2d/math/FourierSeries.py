@@ -71,16 +71,46 @@ class FourierSeries():
         ndarray t.  If modes is None, all modes are evaluated.  Otherwise,
         modes is expected to be a list of mode indices to include in the sum.
         '''
-        if (np.isscalar(t)):
-            y = 0.
-        else:
-            t = arrayify(t)
-            y = np.zeros(t.shape)
+        return self.derivative(t, 0, modes)
+
+    def _check_modes(self, modes):
         if (not modes):
-            modes = range(len(self))
+            return np.arange(len(self))
         for n in modes:
             if (not n==int(n) or n < 0 or n >= len(self)):
                 raise ValueError('Bad mode index: {}'.format(n))
-            y += self._amplitudes[n]*np.sin(
-                2*np.pi*(n+1)*self._base_frequency*t - self._phases[n])
-        return y
+        return np.array(modes, dtype=int)
+
+    def modes(self, t, orders = (0,), modes = None):
+        '''
+        Evaluate the given time derivatives (order 0 being the modes
+        themselves) of each mode at the times t, all at once: the phases of
+        all modes at all times are formed as one outer product, and their
+        sines and cosines shared among the orders.  Return a list with an
+        array of shape t.shape + (number of modes,) for each order.
+        '''
+        n = self._check_modes(modes)
+        t = np.asarray(t, dtype=float)
+        omega = 2*np.pi*(n+1)*self._base_frequency
+        phase = np.multiply.outer(t, omega) - self._phases[n]
+        (s,c) = np.sin(phase), np.cos(phase)
+        # The kth derivative of sin(phase) is omega^k*sin(phase + k*pi/2)
+        trig = [s, c, -s, -c]
+        return [self._amplitudes[n]*omega**k*trig[k%4] for k in orders]
+
+    def derivative(self, t, order = 1, modes = None):
+        '''
+        Sum the time derivative of the given order of the modes (all modes
+        if None) at the scalar, list, tuple, or numpy ndarray t.
+        '''
+        y = self.modes(t, (order,), modes)[0].sum(-1)
+        return float(y) if np.isscalar(t) else y
+
+    def evaluate(self, t, orders = (0,1), modes = None):
+        '''
+        Return a tuple of the sums of the modes and of their time derivatives
+        of the given orders at the times t, from a single evaluation of the
+        modes (see modes).
+        '''
+        ys = [y.sum(-1) for y in self.modes(t, orders, modes)]
+        return tuple(float(y) for y in ys) if np.isscalar(t) else tuple(ys)
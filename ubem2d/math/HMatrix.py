@@ -0,0 +1,211 @@
+import numpy as np
+import numpy.linalg as nla
+from ubem2d.Errors import SizeMismatchError
+from ubem2d.geometry.ClusterTree import block_partition
+
+__all__ = ['HMatrix', 'aca']
+
+def aca(row, col, m, n, tol = 1.e-8, max_rank = None):
+    '''
+    Adaptive cross approximation, with partial pivoting, of an m-by-n matrix
+    whose entries are available only one row or column at a time.  The
+    callables row(i) and col(j) return the ith row and jth column.
+
+    Return factors U,V of shapes (m,r) and (r,n) such that U.dot(V)
+    approximates the matrix to relative accuracy tol in the Frobenius norm,
+    or None if the approximation fails to reach that accuracy with rank
+    below max_rank (in which case the matrix should be stored densely).
+    '''
+    if (max_rank is None):
+        max_rank = min(m,n)//2
+    U, V = [], []
+    norm2 = 0.
+    unused = np.ones(m, dtype=bool)
+    i = 0
+    while (len(U) < max_rank):
+        unused[i] = False
+        r = row(i)
+        for (u,v) in zip(U,V):
+            r = r - u[i]*v
+        j = np.argmax(np.abs(r))
+        if (np.abs(r[j]) == 0.):
+            # Row is already reproduced exactly; try another one
+            if (not unused.any()):
+                break
+            i = np.argmax(unused)
+            continue
+        v = r/r[j]
+        u = col(j)
+        for (uk,vk) in zip(U,V):
+            u = u - vk[j]*uk
+        # Update Frobenius norm estimate of the approximation
+        un, vn = nla.norm(u), nla.norm(v)
+        norm2 += (un*vn)**2 + 2*sum(np.dot(u,uk)*np.dot(v,vk)
+            for (uk,vk) in zip(U,V))
+        U.append(u)
+        V.append(v)
+        if (un*vn <= tol*np.sqrt(abs(norm2))):
+            return recompress(np.array(U).T, np.array(V), tol)
+        w = np.abs(u)
+        w[~unused] = -1
+        if (w.max() < 0):
+            break
+        i = np.argmax(w)
+    if (len(U) > 0 and len(U) == min(m,n)):
+        return recompress(np.array(U).T, np.array(V), tol)
+    return None
+
+def recompress(U, V, tol):
+    '''
+    Reduce the rank of the low-rank product U.dot(V) by truncating its
+    singular value decomposition at relative accuracy tol.
+    '''
+    (Qu,Ru) = nla.qr(U)
+    (Qv,Rv) = nla.qr(V.T)
+    (W,s,Zt) = nla.svd(Ru.dot(Rv.T))
+    if (s[0] == 0):
+        return (U[:,:1]*0., V[:1,:])
+    tail = np.sqrt(np.cumsum(s[::-1]**2))[::-1]
+    k = max(1, np.sum(tail > tol*tail[0]))
+    return (Qu.dot(W[:,:k]*s[:k]), Zt[:k,:].dot(Qv.T))
+
+class HMatrix():
+    '''
+    This class represents a hierarchical matrix (H-matrix) in which each
+    block coupling a well-separated pair of row and column clusters is
+    stored in low-rank form U*V, built by adaptive cross approximation, and
+    the remaining blocks are stored densely.  For matrices arising from
+    smooth kernels (such as panel influence matrices) the storage and the
+    cost of a matrix-vector product are nearly O(N log N), rather than
+    O(N^2).
+
+    The matrix is specified by two cluster trees, whose permutations define
+    the row and column ordering, and by a callable entries(I,J) which
+    returns the dense block with rows I and columns J of the matrix (I,J
+    being integer arrays in the original ordering).  Several matrices which
+    share a kernel may be compressed at once, by having entries return a
+    tuple of blocks; see HMatrix.compress.
+    '''
+    def __init__(self, shape, near, far):
+        '''
+        shape: shape of the full matrix
+        near: list of tuples (I, J, D) of dense blocks
+        far: list of tuples (I, J, U, V) of low-rank blocks
+        Construct instances with HMatrix.compress.
+        '''
+        self._shape = shape
+        self._near = near
+        self._far = far
+
+    @classmethod
+    def compress(cls, rows, cols, entries, eta = .5, tol = 1.e-8):
+        '''
+        Return an H-matrix, or a list of H-matrices if entries returns a
+        tuple of blocks, compressed to relative accuracy tol block by block.
+        '''
+        far, near = block_partition(rows, cols, eta)
+        shape = (rows.npoints, cols.npoints)
+        test = entries(rows.indices(0)[:1], cols.indices(0)[:1])
+        single = (type(test) is not tuple)
+        count = 1 if single else len(test)
+        pick = (lambda B,c: B) if single else (lambda B,c: B[c])
+        nears = [[] for c in range(count)]
+        fars = [[] for c in range(count)]
+        for (s,t) in near:
+            I, J = rows.indices(s), cols.indices(t)
+            B = entries(I,J)
+            for c in range(count):
+                nears[c].append((I, J, pick(B,c)))
+        for (s,t) in far:
+            I, J = rows.indices(s), cols.indices(t)
+            # Rows and columns are shared by the matrices, so cache them
+            rcache, ccache = {}, {}
+            def row(i, c):
+                if (i not in rcache):
+                    rcache[i] = entries(I[i:i+1],J)
+                return pick(rcache[i],c)[0,:]
+            def col(j, c):
+                if (j not in ccache):
+                    ccache[j] = entries(I,J[j:j+1])
+                return pick(ccache[j],c)[:,0]
+            for c in range(count):
+                UV = aca(lambda i: row(i,c), lambda j: col(j,c), len(I),
+                    len(J), tol)
+                if (UV is None):
+                    nears[c].append((I, J, pick(entries(I,J),c)))
+                else:
+                    fars[c].append((I, J, UV[0], UV[1]))
+        H = [cls(shape, nears[c], fars[c]) for c in range(count)]
+        return H[0] if single else H
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def nbytes(self):
+        '''
+        Return the number of bytes used to store the matrix entries.
+        '''
+        return (sum(D.nbytes for (I,J,D) in self._near) +
+            sum(U.nbytes + V.nbytes for (I,J,U,V) in self._far))
+
+    @property
+    def compression(self):
+        '''
+        Return the ratio of the storage of this H-matrix to that of the
+        equivalent dense matrix.
+        '''
+        return self.nbytes/(8.*self._shape[0]*self._shape[1])
+
+    def dot(self, x):
+        '''
+        Return the product of this matrix with the vector x.
+        '''
+        if (len(x) != self._shape[1]):
+            raise SizeMismatchError()
+        y = np.zeros(self._shape[0], dtype=np.result_type(x, float))
+        for (I,J,D) in self._near:
+            y[I] += D.dot(x[J])
+        for (I,J,U,V) in self._far:
+            y[I] += U.dot(V.dot(x[J]))
+        return y
+
+    def __matmul__(self, x):
+        return self.dot(x)
+
+    def row(self, i):
+        '''
+        Return the ith row of this matrix.
+        '''
+        r = np.zeros(self._shape[1])
+        for (I,J,D) in self._near:
+            k = np.nonzero(I == i)[0]
+            if (len(k) > 0):
+                r[J] = D[k[0],:]
+        for (I,J,U,V) in self._far:
+            k = np.nonzero(I == i)[0]
+            if (len(k) > 0):
+                r[J] = U[k[0],:].dot(V)
+        return r
+
+    def diagonal_blocks(self):
+        '''
+        Return the dense blocks (I, D) whose row and column indices coincide,
+        which for a square matrix built over a single cluster tree are the
+        diagonal blocks of the leaves.  These are useful for block-Jacobi
+        preconditioning.
+        '''
+        return [(I,D) for (I,J,D) in self._near if (len(I) == len(J) and
+            np.array_equal(I,J))]
+
+    def to_dense(self):
+        '''
+        Return the dense matrix represented by this H-matrix.
+        '''
+        A = np.zeros(self._shape)
+        for (I,J,D) in self._near:
+            A[np.ix_(I,J)] = D
+        for (I,J,U,V) in self._far:
+            A[np.ix_(I,J)] = U.dot(V)
+        return A
@@ -1,3 +1,6 @@
+from ubem2d.math.circulant import *
+from ubem2d.math.convex_hull import *
 from ubem2d.math.FourierSeries import *
+from ubem2d.math.HMatrix import *
 from ubem2d.math.ramps import *
 from ubem2d.math.turning_angle import *
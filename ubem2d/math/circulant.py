@@ -0,0 +1,113 @@
+import numpy as np
+from ubem2d.Errors import SizeMismatchError
+
+__all__ = ['BlockCirculant']
+
+class BlockCirculant():
+    '''
+    This class represents an N-by-N block-circulant matrix made of m-by-m
+    blocks of size p-by-p (N = m*p), in which block (r,s) depends only on
+    (s-r) mod m.  Such matrices arise as the influence matrices of bodies
+    with m-fold rotational symmetry (p = 1 for a regular polygon, e.g. a
+    CircularCylinder, in which case the matrix is circulant).
+
+    The matrix is specified by its first p rows.  The discrete Fourier
+    transform over the block index diagonalizes it into m independent p-by-p
+    blocks, so products and solves cost O(N log N + N p^2) operations.
+    '''
+    def __init__(self, rows, p = 1):
+        '''
+        rows: array of shape (p, N) holding the first p rows of the matrix
+        '''
+        rows = np.asarray(rows, dtype=float)
+        if (rows.ndim != 2 or rows.shape[0] != p or rows.shape[1] % p != 0):
+            raise SizeMismatchError()
+        m = rows.shape[1]//p
+        self._p, self._m = p, m
+        self._rows = rows
+        # Fourier transform of the blocks over the block index
+        G = rows.reshape(p, m, p).transpose(1,0,2)
+        self._Ghat = m*np.fft.ifft(G, axis=0)
+        self._Ginv = None
+
+    @property
+    def shape(self):
+        return (self._m*self._p, self._m*self._p)
+
+    @property
+    def block_size(self):
+        return self._p
+
+    @property
+    def order(self):
+        '''
+        Number of blocks along each side of the matrix.
+        '''
+        return self._m
+
+    @property
+    def rows(self):
+        return self._rows
+
+    def row(self, i):
+        '''
+        Return the ith row of this matrix.
+        '''
+        (r,q) = divmod(i % self.shape[0], self._p)
+        return np.roll(self._rows[q], r*self._p)
+
+    def row_sums(self):
+        '''
+        Return the sum of each row of this matrix.
+        '''
+        return np.tile(self._rows.sum(1), self._m)
+
+    def dot(self, x):
+        '''
+        Return the product of this matrix with the vector x.
+        '''
+        if (len(x) != self.shape[1]):
+            raise SizeMismatchError()
+        X = np.fft.fft(np.reshape(x, (self._m, self._p)), axis=0)
+        Y = np.einsum('kij,kj->ki', self._Ghat, X)
+        return np.fft.ifft(Y, axis=0).real.ravel()
+
+    def __matmul__(self, x):
+        return self.dot(x)
+
+    def solve(self, b):
+        '''
+        Return the solution x of the linear system A*x = b.
+        '''
+        if (len(b) != self.shape[0]):
+            raise SizeMismatchError()
+        if (self._Ginv is None):
+            self._Ginv = np.linalg.inv(self._Ghat)
+        B = np.fft.fft(np.reshape(b, (self._m, self._p)), axis=0)
+        X = np.einsum('kij,kj->ki', self._Ginv, B)
+        return np.fft.ifft(X, axis=0).real.ravel()
+
+    def solve_bordered(self, u, v, d, r, s):
+        '''
+        Return the solution (x, y) of the bordered system
+
+        [A   u] [x]   [r]
+        [v^T d] [y] = [s]
+
+        where u, v, r are vectors and d, s, y are scalars, by block
+        elimination with two solves involving A.
+        '''
+        xr = self.solve(r)
+        xu = self.solve(u)
+        y = (s - np.dot(v, xr))/(d - np.dot(v, xu))
+        return (xr - y*xu, y)
+
+    def to_dense(self):
+        '''
+        Return the dense matrix represented by this object.
+        '''
+        N, p = self.shape[0], self._p
+        A = np.zeros((N,N))
+        for r in range(self._m):
+            A[r*p:(r+1)*p,:] = np.roll(self._rows, r*p, axis=1)
+        return A
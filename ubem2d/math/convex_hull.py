@@ -0,0 +1,72 @@
+import numpy as np
+
+__all__ = ['convex_hull', 'hull_diameter']
+
+def convex_hull(x, y):
+    '''
+    Return the indices of the vertices of the convex hull of the points
+    (x,y), in counterclockwise order starting from the leftmost (then
+    lowest) point, by Andrew's monotone chain algorithm in O(n log n) time.
+    Points lying on the edges of the hull, and repeated points, are left
+    out.
+    '''
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    order = np.lexsort((y, x))
+    # Drop repeated points (adjacent once sorted)
+    keep = np.concatenate([[True], (np.diff(x[order]) != 0) |
+        (np.diff(y[order]) != 0)])
+    order = order[keep]
+    if (len(order) < 3):
+        return order
+    px, py = x[order].tolist(), y[order].tolist()
+    def chain(indices):
+        hull = []
+        for k in indices:
+            while (len(hull) >= 2):
+                (i,j) = hull[-2], hull[-1]
+                cross = ((px[j] - px[i])*(py[k] - py[i]) -
+                    (py[j] - py[i])*(px[k] - px[i]))
+                if (cross > 0):
+                    break
+                hull.pop()
+            hull.append(k)
+        return hull
+    n = len(order)
+    lower = chain(range(n))
+    upper = chain(range(n-1, -1, -1))
+    return order[np.array(lower[:-1] + upper[:-1])]
+
+def hull_diameter(x, y):
+    '''
+    Return the diameter of the points (x,y), the greatest distance between
+    any two of them, and the indices of two points that far apart.  The
+    farthest pair are vertices of the convex hull, which are found by
+    rotating calipers about it in time linear in its number of vertices.
+    '''
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    h = convex_hull(x, y)
+    m = len(h)
+    if (m == 0):
+        return (0., None, None)
+    if (m == 1):
+        return (0., int(h[0]), int(h[0]))
+    hx, hy = x[h].tolist(), y[h].tolist()
+    def d2(i, j):
+        dx = hx[j] - hx[i]
+        dy = hy[j] - hy[i]
+        return dx*dx + dy*dy
+    def area(i, j, k):
+        return ((hx[j] - hx[i])*(hy[k] - hy[i]) -
+            (hy[j] - hy[i])*(hx[k] - hx[i]))
+    best, pair = d2(0, 1), (0, 1)
+    j = 1
+    for i in range(m):
+        i1 = (i + 1) % m
+        # Advance the opposite caliper while it moves away from edge i
+        while (area(i, i1, (j + 1) % m) > area(i, i1, j)):
+            j = (j + 1) % m
+        for (a,b) in [(i,j), (i1,j)]:
+            d = d2(a, b)
+            if (d > best):
+                best, pair = d, (a, b)
+    return (float(np.sqrt(best)), int(h[pair[0]]), int(h[pair[1]]))
@@ -1,5 +1,5 @@
 import numpy as np
-from .SE2 import SE2
+from .SE2Array import SE2Array
 from ubem2d.util.arrayify import arrayify
 
 __all__ = ['RigidMotion']
@@ -9,11 +9,16 @@ class RigidMotion():
     This class represents a parameterized path in the Lie group SE(2) of
     rigid motions of the Euclidean plane.
     '''
-    def __init__(self, ftheta = None, fx = None, fy = None):
+    def __init__(self, ftheta = None, fx = None, fy = None, dtheta = None,
+        dx = None, dy = None, h = 1.e-6):
         '''
         ftheta: callable which returns theta, given the time
         fx: callable which returns x, given the time
         fy: callable which returns y, given the time
+        dtheta, dx, dy: callables which return the time derivatives of theta,
+            x and y.  If not given, the derivative method of ftheta, fx or fy
+            is used if it has one (as a FourierSeries does), and otherwise
+            a central difference with time step h.
         '''
         if (ftheta is None):
             ftheta = lambda t: np.zeros(arrayify(t).shape)
@@ -28,6 +33,18 @@ class RigidMotion():
         self._ftheta = ftheta
         self._fx = fx
         self._fy = fy
+        self._h = h
+        self._dtheta = self._derivative(ftheta, dtheta)
+        self._dx = self._derivative(fx, dx)
+        self._dy = self._derivative(fy, dy)
+
+    def _derivative(self, f, df):
+        if (df is not None):
+            return df
+        if (callable(getattr(f, 'derivative', None))):
+            return f.derivative
+        h = self._h
+        return lambda t: (f(t + h) - f(t - h))/(2*h)
     
     @property
     def ftheta(self):
@@ -42,6 +59,10 @@ class RigidMotion():
         return self._fy
     
     def __call__(self, t):
+        '''
+        Return the element of SE(2) at time t, or for a 1-dimensional array
+        of times an SE2Array of the elements at those times.
+        '''
         scalar_input = False
         if (np.isscalar(t)):
             scalar_input = True
@@ -53,15 +74,33 @@ class RigidMotion():
         if (len(t) == 0):
             raise ValueError('Must provide at least one time value')
 
-        n = len(t)
-        th = self._ftheta(t)
-        x = self._fx(t)
-        y = self._fy(t)
-        g = n*[None]
-        for i in range(n):
-            g[i] = SE2(th[i],x[i],y[i])
-
+        g = SE2Array(self._ftheta(t), self._fx(t), self._fy(t))
         if (scalar_input):
             return g[0]
         else:
             return g
+
+    def velocity(self, t):
+        '''
+        Return the angular velocity and the velocity (of the origin's image)
+        of the motion at the time or 1-dimensional array of times t.
+        '''
+        if (np.isscalar(t)):
+            (w,u,v) = self.velocity(np.array([t], dtype=np.float64))
+            return (float(w[0]), float(u[0]), float(v[0]))
+        t = np.asarray(t, dtype=np.float64)
+        return (np.asarray(self._dtheta(t)) + np.zeros(t.shape),
+            np.asarray(self._dx(t)) + np.zeros(t.shape),
+            np.asarray(self._dy(t)) + np.zeros(t.shape))
+
+    def point_velocity(self, t, X, Y):
+        '''
+        Return the velocity at the scalar time t of the material points now
+        at (X,Y), for a body moving with this motion: the body is carried by
+        the element g(t) of SE(2), so its points move with the angular
+        velocity of the motion about the image (x(t),y(t)) of the origin.
+        '''
+        (w,u,v) = self.velocity(t)
+        g = self(t)
+        return (u - w*(Y - g.y), v + w*(X - g.x))
+
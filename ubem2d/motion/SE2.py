@@ -25,6 +25,25 @@ class SE2():
     def update(cls,g0,g1):
         return g1*(g0.inv())
 
+    @classmethod
+    def fit(cls, x0, y0, x, y):
+        '''
+        Return the element of SE(2) which best maps the points (x0,y0) onto
+        the points (x,y) in the least-squares sense (the Procrustes problem
+        without scaling or reflection).  If the points (x,y) are a rigid
+        motion of (x0,y0), that motion is recovered up to rounding.
+        '''
+        x0, y0 = np.asarray(x0, dtype=float), np.asarray(y0, dtype=float)
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        if (x0.shape != y0.shape or x.shape != x0.shape or
+            y.shape != x0.shape):
+            raise ValueError('Point sets must have the same shape')
+        (cx0,cy0,cx,cy) = x0.mean(), y0.mean(), x.mean(), y.mean()
+        (ax,ay,bx,by) = x0 - cx0, y0 - cy0, x - cx, y - cy
+        theta = math.atan2(np.sum(ax*by - ay*bx), np.sum(ax*bx + ay*by))
+        (c,s) = math.cos(theta), math.sin(theta)
+        return SE2(theta, cx - c*cx0 + s*cy0, cy - s*cx0 - c*cy0)
+
     @property
     def theta(self):
         return self._theta
@@ -106,6 +125,8 @@ class SE2():
         rot*tr == SE2(pi/4,sqrt(2),sqrt(2)),
         tr*rot == SE2(pi/4,1,0)
         '''
+        if (not isinstance(g, SE2)):
+            return NotImplemented
         return SE2(self._theta + g._theta,
             g.x*self._cth - g.y*self._sth + self.x,
             g.x*self._sth + g.y*self._cth + self.y)
@@ -0,0 +1,167 @@
+import numpy as np
+from .SE2 import SE2
+
+__all__ = ['SE2Array']
+
+class SE2Array():
+    '''
+    This class represents an array of elements of SE(2), such as the samples
+    of a rigid motion at a sequence of times (shape (T,)) or of the motions
+    of several bodies (shape (T,bodies)), by arrays of their local
+    coordinates theta, x and y.  Composition, inversion and the action on
+    points and vectors are carried out elementwise with array operations,
+    broadcasting as numpy does; indexing with an integer (or a tuple of
+    them) returns an SE2.
+    '''
+    def __init__(self, theta = 0., x = 0., y = 0.):
+        (theta,x,y) = np.broadcast_arrays(np.asarray(theta, dtype=float),
+            np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        self._theta = theta.copy()
+        self._x = x.copy()
+        self._y = y.copy()
+        self._cth = np.cos(self._theta)
+        self._sth = np.sin(self._theta)
+
+    @classmethod
+    def id(cls, shape = ()):
+        return SE2Array(np.zeros(shape))
+
+    @classmethod
+    def from_list(cls, gs):
+        '''
+        Return the array of the given sequence of SE2 elements.
+        '''
+        r3 = np.array([g.r3() for g in gs]).reshape(-1, 3)
+        return SE2Array(r3[:,0], r3[:,1], r3[:,2])
+
+    @classmethod
+    def update(cls, g0, g1):
+        return g1*(g0.inv())
+
+    @property
+    def theta(self):
+        return self._theta
+
+    @property
+    def x(self):
+        return self._x
+
+    @property
+    def y(self):
+        return self._y
+
+    @property
+    def cth(self):
+        return self._cth
+
+    @property
+    def sth(self):
+        return self._sth
+
+    @property
+    def shape(self):
+        return self._theta.shape
+
+    @property
+    def ndim(self):
+        return self._theta.ndim
+
+    def __len__(self):
+        if (self.ndim == 0):
+            raise TypeError('len() of a 0-d SE2Array')
+        return self.shape[0]
+
+    def __getitem__(self, i):
+        theta = self._theta[i]
+        if (np.ndim(theta) == 0):
+            return SE2(theta, self._x[i], self._y[i])
+        return SE2Array(theta, self._x[i], self._y[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def inv(self):
+        '''
+        Return the elementwise inverse.
+        '''
+        return SE2Array(-self._theta,
+            -self._x*self._cth - self._y*self._sth,
+            self._x*self._sth - self._y*self._cth)
+
+    def steps(self):
+        '''
+        Return the updates g[i]*g[i-1].inv() between successive elements
+        along the first axis, which move a body from one sample of a
+        trajectory to the next (with rotations about the origin).
+        '''
+        return self[1:]*self[:-1].inv()
+
+    def mat(self):
+        '''
+        Return the matrix representations, of shape self.shape + (3,3).
+        '''
+        m = np.zeros(self.shape + (3,3))
+        m[...,0,0], m[...,0,1], m[...,0,2] = self._cth, -self._sth, self._x
+        m[...,1,0], m[...,1,1], m[...,1,2] = self._sth, self._cth, self._y
+        m[...,2,2] = 1.
+        return m
+
+    def r3(self):
+        '''
+        Return a 3-tuple of the arrays of local coordinates.
+        '''
+        return (self._theta, self._x, self._y)
+
+    def _expand(self, a, points):
+        '''
+        Give an array of the shape of self a trailing axis, against which
+        points (not scalars) are broadcast.
+        '''
+        return a[...,None] if (np.ndim(points) > 0) else a
+
+    def map_vector(self, vx, vy):
+        '''
+        Rotate vectors (vx,vy) by each element.  The last axis of vx,vy runs
+        over the vectors, and the rest broadcast against self.shape, so that
+        the result has shape self.shape + (n,) for vectors of shape (n,).
+        '''
+        c, s = self._expand(self._cth, vx), self._expand(self._sth, vx)
+        return (c*vx - s*vy, s*vx + c*vy)
+
+    def map_point(self, x, y, x0 = 0., y0 = 0.):
+        '''
+        Apply each element to the points (x,y), with rotations about the
+        axis (x0,y0), which may differ from element to element.  Points are
+        broadcast as in map_vector.
+        '''
+        x0 = self._expand(np.asarray(x0, dtype=float), x)
+        y0 = self._expand(np.asarray(y0, dtype=float), x)
+        (u,v) = self.map_vector(x - x0, y - y0)
+        return (u + self._expand(self._x, x) + x0,
+            v + self._expand(self._y, x) + y0)
+
+    def __eq__(self, g):
+        return bool(np.all(self._theta == g.theta) and np.all(self._x == g.x)
+            and np.all(self._y == g.y))
+
+    def __repr__(self):
+        return 'SE2Array(theta={}, x={}, y={})'.format(self._theta, self._x,
+            self._y)
+
+    def __mul__(self, g):
+        '''
+        Elementwise composition, g followed by self (see SE2.__mul__); g may
+        be an SE2 or an SE2Array broadcasting against self.
+        '''
+        return SE2Array(self._theta + g.theta,
+            g.x*self._cth - g.y*self._sth + self._x,
+            g.x*self._sth + g.y*self._cth + self._y)
+
+    def __rmul__(self, g):
+        '''
+        Composition self followed by the SE2 g.
+        '''
+        return SE2Array(g.theta + self._theta,
+            self._x*g.cth - self._y*g.sth + g.x,
+            self._x*g.sth + self._y*g.cth + g.y)
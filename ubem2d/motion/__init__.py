@@ -1,2 +1,3 @@
 from ubem2d.motion.RigidMotion import *
 from ubem2d.motion.SE2 import *
+from ubem2d.motion.SE2Array import *
@@ -4,10 +4,14 @@ from ubem2d.panel.PanelInfluence import velocity_source_panel
 from ubem2d.panel.PanelInfluence import velocity_vortex_panel
 from ubem2d.panel.PanelInfluence import source_influence_matrices
 from ubem2d.panel.PanelInfluence import vortex_influence_matrices
+from ubem2d.panel.PanelInfluence import influence_hmatrices
+from ubem2d.panel.PanelInfluence import influence_matrices_block
+from ubem2d.math.circulant import BlockCirculant
 
 __all__ = ['sf_source_body', 'sf_vortex_body', 'velocity_source_body',
     'velocity_vortex_body', 'source_influence_matrices_body', 
-    'vortex_influence_matrices_body']
+    'vortex_influence_matrices_body', 'influence_hmatrices_body',
+    'circulant_influence_matrices_body']
 
 def sf_source_body(body,s,X,Y,m=5):
     '''
@@ -25,34 +29,71 @@ def sf_vortex_body(body,s,X,Y,m=5):
     return sf_vortex_panel(body.x[:-1],body.y[:-1],body.tx,body.ty,body.edge,
         s,X,Y,m)
 
-def velocity_source_body(body,s,X,Y):
+def velocity_source_body(body,s,X,Y,pitch=None):
     '''
     Return the velocity at X,Y due to source sheets of strength s along the 
-    given body.
+    given body, or along the cascade of its copies offset by multiples of
+    pitch = (px,py) if given.
     '''
     return velocity_source_panel(body.x[:-1],body.y[:-1],body.tx,body.ty,
-        body.edge,s,X,Y)
+        body.edge,s,X,Y,pitch)
 
-def velocity_vortex_body(body,s,X,Y):
+def velocity_vortex_body(body,s,X,Y,pitch=None):
     '''
     Return the velocity at X,Y due to vortex sheets of strength s along the 
-    given body.
+    given body, or along the cascade of its copies offset by multiples of
+    pitch = (px,py) if given.
     '''
     return velocity_vortex_panel(body.x[:-1],body.y[:-1],body.tx,body.ty,
-        body.edge,s,X,Y)
+        body.edge,s,X,Y,pitch)
 
-def source_influence_matrices_body(body):
+def source_influence_matrices_body(body, out=None, mirror=None,
+    pitch=None):
     '''
     Return the self-influence matrices for unit source sheets along the
-    given body.
+    given body, written into the arrays out = (At,An) if given, and
+    including the body's image in the MirrorPlane mirror if given and the
+    other blades of the cascade with the given pitch if given.
     '''
     return source_influence_matrices(body.x[:-1], body.y[:-1], body.tx,
-        body.ty, body.nx, body.ny, body.edge)
+        body.ty, body.nx, body.ny, body.edge, out, mirror=mirror,
+        pitch=pitch)
 
-def vortex_influence_matrices_body(body):
+def vortex_influence_matrices_body(body, out=None, mirror=None,
+    pitch=None):
     '''
     Return the self-influence matrices for unit vortex sheets along the
-    given body.
+    given body, written into the arrays out = (Bt,Bn) if given, and
+    including the body's image in the MirrorPlane mirror if given and the
+    other blades of the cascade with the given pitch if given.
     '''
     return vortex_influence_matrices(body.x[:-1], body.y[:-1], body.tx,
-        body.ty, body.nx, body.ny, body.edge)
+        body.ty, body.nx, body.ny, body.edge, out, mirror=mirror,
+        pitch=pitch)
+
+def influence_hmatrices_body(body, eta=.5, tol=1.e-8, leaf_size=32,
+    mirror=None):
+    '''
+    Return the self-influence matrices At,An,Bt,Bn for unit source and vortex
+    sheets along the given body, as hierarchical matrices.
+    '''
+    return influence_hmatrices(body.x[:-1], body.y[:-1], body.tx, body.ty,
+        body.nx, body.ny, body.edge, eta, tol, leaf_size, mirror)
+
+def circulant_influence_matrices_body(body, order=None):
+    '''
+    Return the self-influence matrices At,An,Bt,Bn for unit source and vortex
+    sheets along a body with rotational symmetry of the given order, as
+    block-circulant matrices (see BlockCirculant).  Only nedge/order rows of
+    each matrix are computed.  If the order is not given, it is detected by
+    Body.rotational_symmetry; a body with no symmetry gives a single block.
+    '''
+    n = body.nedge
+    if (order is None):
+        order = body.rotational_symmetry()
+    if (order < 1 or n % order != 0):
+        raise ValueError('Symmetry order must divide the number of panels')
+    p = n//order
+    blocks = influence_matrices_block(body.x[:-1], body.y[:-1], body.tx,
+        body.ty, body.nx, body.ny, body.edge, slice(0,p), slice(None))
+    return tuple(BlockCirculant(M, p) for M in blocks)
@@ -0,0 +1,68 @@
+import numpy as np
+from ubem2d.util.arrayify import arrayify
+
+__all__ = ['potential_panel_matrices', 'velocity_doublet_panel_matrices',
+    'potential_doublet_wake', 'panel_side']
+
+def panel_side(tx,ty,nx,ny):
+    '''
+    Return +1 for each panel whose normal vector points to the left of its
+    tangent vector, and -1 for each whose normal points to the right.
+    '''
+    return np.sign(-ty*nx + tx*ny)
+
+def potential_panel_matrices(x1,y1,tx,ty,edge,side,X,Y,interior=False):
+    '''
+    Return matrices C,B whose (i,j) entries are the potentials induced at
+    the point (X[i],Y[i]) by a constant-strength doublet panel (C) and
+    source panel (B) of unit strength encoded by x1[j],y1[j],tx[j],ty[j],
+    edge[j].  The doublet potential jumps by one across the panel towards
+    the side given by side[j] (see panel_side), and the source potential is
+    (1/2pi) times the integral of log r.
+
+    With xi the position in the panel's frame and I0 = log(xi/(xi - L)),
+    C = -side Im(I0)/2pi and B = Re(xi log(xi) - (xi - L)log(xi - L) - L)/2pi.
+    If interior is True, the point i is the midpoint of panel i for each
+    i, and the doublet potential is the limit there from the side opposite
+    side[i] (the interior of a body, if the normals point outward).
+    '''
+    x1,y1,tx,ty,edge,side = arrayify(x1,y1,tx,ty,edge,side)
+    e = tx + 1j*ty
+    z = np.reshape(X,(-1,1)) + 1j*np.reshape(Y,(-1,1))
+    xi = (z - (x1 + 1j*y1))/e
+    L = edge
+    with np.errstate(divide='ignore', invalid='ignore'):
+        l1, l2 = np.log(xi), np.log(xi - L)
+        C = (-.5/np.pi)*side*(l1 - l2).imag
+        B = (.5/np.pi)*(xi*l1 - (xi - L)*l2 - L).real
+    if (interior):
+        i = np.arange(len(edge))
+        C[i,i] = -.5
+        B[i,i] = (.5/np.pi)*L*(np.log(.5*L) - 1)
+    return (C,B)
+
+def velocity_doublet_panel_matrices(x1,y1,tx,ty,edge,side,X,Y):
+    '''
+    Return complex matrices Wd,Ws whose (i,j) entries are the complex
+    velocities u - iv at (X[i],Y[i]) of the doublet and source panels of
+    potential_panel_matrices.  A constant doublet panel is equivalent to a
+    pair of opposite point vortices at its corners.
+    '''
+    x1,y1,tx,ty,edge,side = arrayify(x1,y1,tx,ty,edge,side)
+    e = tx + 1j*ty
+    z = np.reshape(X,(-1,1)) + 1j*np.reshape(Y,(-1,1))
+    xi = (z - (x1 + 1j*y1))/e
+    Wd = (.5j/np.pi)*side/e*(1/xi - 1/(xi - edge))
+    Ws = (.5/np.pi)/e*(np.log(xi) - np.log(xi - edge))
+    return (Wd,Ws)
+
+def potential_doublet_wake(x0,y0,dx,dy,side,X,Y):
+    '''
+    Return the potential at X,Y of a semi-infinite doublet sheet of unit
+    strength leaving the point (x0,y0) in the direction (dx,dy), whose
+    potential jumps by one across the sheet towards the given side (+1 for
+    left, -1 for right, looking along the sheet).  Its velocity is that of
+    a point vortex at (x0,y0) of strength -side.
+    '''
+    xi = ((X - x0) + 1j*(Y - y0))/(dx + 1j*dy)
+    return (-.5/np.pi)*side*np.angle(-xi)
@@ -0,0 +1,62 @@
+import numpy as np
+from ubem2d.util.arrayify import arrayify
+
+__all__ = ['velocity_linear_vortex_panel_matrices',
+    'linear_vortex_influence_matrices']
+
+def velocity_linear_vortex_panel_matrices(x1,y1,tx,ty,edge,X,Y,side=None):
+    '''
+    Return complex matrices Wa,Wb whose (i,j) entries are the complex
+    velocities u - iv induced at the point (X[i],Y[i]) by the vortex panel j
+    encoded by x1[j],y1[j],tx[j],ty[j],edge[j], when its strength varies
+    linearly from one at its first corner to zero at its second (Wa), or
+    from zero to one (Wb).
+
+    With e the unit tangent and xi = (z - z1)/e the position in the panel's
+    frame, the panel integrals are Wa = (-i/2pi e)((1 - xi/L)I0 + 1) and
+    Wb = (-i/2pi e)((xi/L)I0 - 1), where I0 = log(xi/(xi - L)).  If side is
+    given, the point i lies at the midpoint of panel i for each i < len(side),
+    and the limit is taken from the side of the panel to its left (side = 1)
+    or right (side = -1) as seen along the tangent.
+    '''
+    x1,y1,tx,ty,edge = arrayify(x1,y1,tx,ty,edge)
+    e = tx + 1j*ty
+    z = np.reshape(X,(-1,1)) + 1j*np.reshape(Y,(-1,1))
+    xi = (z - (x1 + 1j*y1))/e
+    L = edge
+    with np.errstate(divide='ignore', invalid='ignore'):
+        I0 = np.log(xi) - np.log(xi - L)
+    if (side is not None):
+        # On its own panel the log jumps by 2*pi*i; at the midpoint its real
+        # part vanishes
+        i = np.arange(len(side))
+        I0[i,i] = -1j*np.pi*np.asarray(side)
+    c = -.5j/(np.pi*e)
+    Wa = c*((1 - xi/L)*I0 + 1)
+    Wb = c*((xi/L)*I0 - 1)
+    return (Wa,Wb)
+
+def linear_vortex_influence_matrices(x1,y1,tx,ty,nx,ny,edge,nodes):
+    '''
+    Return the tangential and normal influence matrices Ct,Cn at the panel
+    midpoints of linear-strength vortex panels, the strength being
+    continuous and linear on each panel between values at its corners.
+    Panel j runs from corner nodes[0][j] to corner nodes[1][j], so Ct and Cn
+    have one column per corner.  Velocities are evaluated on the side of
+    each panel into which its normal vector points.
+    '''
+    x1,y1,tx,ty,nx,ny,edge = arrayify(x1,y1,tx,ty,nx,ny,edge)
+    n = len(edge)
+    xmid, ymid = x1 + .5*edge*tx, y1 + .5*edge*ty
+    side = np.sign(-ty*nx + tx*ny)
+    (Wa,Wb) = velocity_linear_vortex_panel_matrices(x1,y1,tx,ty,edge,xmid,
+        ymid,side)
+    # Gather the panel contributions to each corner
+    W = np.zeros((n, max(np.max(nodes[0]), np.max(nodes[1])) + 1),
+        dtype=complex)
+    np.add.at(W, (slice(None), nodes[0]), Wa)
+    np.add.at(W, (slice(None), nodes[1]), Wb)
+    U, V = W.real, -W.imag
+    Ct = U*tx[:,None] + V*ty[:,None]
+    Cn = U*nx[:,None] + V*ny[:,None]
+    return (Ct,Cn)
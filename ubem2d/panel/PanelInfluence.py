@@ -9,10 +9,14 @@ from ubem2d.util.arrayify import arrayify
 from ubem2d.fluids.BasicFlows import velocity_source
 from ubem2d.fluids.BasicFlows import sf_source
 from ubem2d.fluids.BasicFlows import sf_vortex
+from ubem2d.geometry.ClusterTree import ClusterTree
+from ubem2d.math.HMatrix import HMatrix
 
 __all__ = ['sf_source_panel', 'sf_vortex_panel', 'velocity_source_panel',
-    'velocity_vortex_panel', 'source_influence_matrices',
-    'vortex_influence_matrices']
+    'velocity_vortex_panel', 'velocity_source_panel_matrices',
+    'source_influence_matrices', 'vortex_influence_matrices',
+    'influence_matrices_block', 'influence_hmatrices',
+    'periodic_correction_panel_matrices', 'log_sinc']
 
 # ------------------------------------------------------------
 # Special panel integrals
@@ -23,7 +27,7 @@ def panel_integral_1(nu,mu,b,c,L):
 
     \int_0^L\frac{nu*s+mu}{s^2+b*s+c}ds.
 
-    nu,L: scalars
+    nu,L: scalars, or numpy arrays which broadcast against mu
     mu,b,c: numpy arrays of arbitrary positive dimension, but of same shape
     Each entry of c must be nonzero.
     '''
@@ -34,10 +38,31 @@ def panel_integral_1(nu,mu,b,c,L):
     z = .5*nu*np.log(np.abs((L*L+b*L+c)/c))
 
     i = np.where(d>0)
+    if (not np.isscalar(L)):
+        L = np.broadcast_to(L,d.shape)[i]
     sdi = np.sqrt(d[i])
     z[i] += t[i]/sdi*(np.arctan((2*L+b[i])/sdi)-np.arctan(b[i]/sdi))
     return z
 
+def log_sinc(a):
+    '''
+    Return log(sin(a)/a) for complex arrays a, modulo 2*pi*i.  The function
+    is evaluated without overflow for large imaginary parts, and by its
+    Taylor series near a = 0.
+    '''
+    g = np.zeros(a.shape, dtype=complex)
+    small = np.abs(a) < 1.e-3
+    a2 = a[small]**2
+    g[small] = -a2/6. - a2*a2/180.
+    b = a[~small]
+    up = (b.imag >= 0)
+    # sin(b) = (i/2)exp(-ib)(1-exp(2ib)) = -(i/2)exp(ib)(1-exp(-2ib))
+    g[~small] = np.where(up,
+        -1j*b + np.log1p(-np.exp(2j*np.where(up,b,1j))) + np.log(.5j),
+        1j*b + np.log1p(-np.exp(-2j*np.where(up,-1j,b))) + np.log(-.5j)) \
+        - np.log(b)
+    return g
+
 # ------------------------------------------------------------
 # Complex potential
 # ------------------------------------------------------------
@@ -89,10 +114,13 @@ def sf_vortex_panel(x1,y1,tx,ty,edge,s,X,Y,m=5):
 # ------------------------------------------------------------
 # Velocity fields
 # ------------------------------------------------------------
-def velocity_source_panel(x1,y1,tx,ty,edge,s,X,Y):
+def velocity_source_panel(x1,y1,tx,ty,edge,s,X,Y,pitch=None):
     '''
     Return the net velocity U,V induced at mesh points X,Y by a source panel
-    or panels encoded by x1,y1,tx,ty,edge and with strengths s.
+    or panels encoded by x1,y1,tx,ty,edge and with strengths s.  If a pitch
+    (px,py) is given, each panel is the member of an infinite row of copies
+    offset by multiples of the pitch, and the velocity of the whole row is
+    returned (see periodic_correction_panel_matrices).
     '''
     x1,y1,tx,ty,edge,s = arrayify(x1,y1,tx,ty,edge,s)
     n = len(edge)
@@ -108,47 +136,175 @@ def velocity_source_panel(x1,y1,tx,ty,edge,s,X,Y):
         C = dX**2 + dY**2
         U += (.5*s[i]/np.pi)*panel_integral_1(-tx[i],dX,B,C,edge[i])
         V += (.5*s[i]/np.pi)*panel_integral_1(-ty[i],dY,B,C,edge[i])
+    if (pitch is not None):
+        (Uc,Vc) = periodic_correction_panel_matrices(x1,y1,tx,ty,edge,X,Y,
+            pitch)
+        U += Uc.dot(s).reshape(X.shape)
+        V += Vc.dot(s).reshape(Y.shape)
     return (U,V)
 
-def velocity_vortex_panel(x1,y1,tx,ty,edge,s,X,Y):
-    (U,V) = velocity_source_panel(x1,y1,tx,ty,edge,s,X,Y)
+def velocity_vortex_panel(x1,y1,tx,ty,edge,s,X,Y,pitch=None):
+    (U,V) = velocity_source_panel(x1,y1,tx,ty,edge,s,X,Y,pitch)
     return (-V,U)
 
+def velocity_source_panel_matrices(x1,y1,tx,ty,edge,X,Y,pitch=None):
+    '''
+    Return matrices U,V whose (i,j) entries are the velocity induced at the
+    point (X[i],Y[i]) by a source panel of unit strength encoded by x1[j],
+    y1[j],tx[j],ty[j],edge[j].  The points X,Y are flattened, so U,V have
+    shape (X.size,len(edge)).  The velocity induced by a unit vortex panel is
+    obtained by rotating (U,V) through 90 degrees, i.e. it is (-V,U).
+
+    No special treatment is given to points lying on a panel; callers
+    evaluating self-influences should overwrite those entries.  If a pitch
+    is given, the matrices are those of infinite rows of panels (see
+    periodic_correction_panel_matrices).
+    '''
+    x1,y1,tx,ty,edge = arrayify(x1,y1,tx,ty,edge)
+    n = len(edge)
+    if (len(x1) != n or len(y1) != n or len(tx) != n or len(ty) != n or
+        X.shape != Y.shape):
+        raise SizeMismatchError()
+    dX = np.reshape(X,(-1,1)) - x1
+    dY = np.reshape(Y,(-1,1)) - y1
+    B = -2*(dX*tx + dY*ty)
+    C = dX**2 + dY**2
+    U = (.5/np.pi)*panel_integral_1(-tx,dX,B,C,edge)
+    V = (.5/np.pi)*panel_integral_1(-ty,dY,B,C,edge)
+    if (pitch is not None):
+        (Uc,Vc) = periodic_correction_panel_matrices(x1,y1,tx,ty,edge,X,Y,
+            pitch)
+        U, V = U + Uc, V + Vc
+    return (U,V)
+
+def periodic_correction_panel_matrices(x1,y1,tx,ty,edge,X,Y,pitch):
+    '''
+    Return matrices U,V whose (i,j) entries are the velocity induced at the
+    point (X[i],Y[i]) by all copies but the original of the unit source
+    panel j, in the infinite row of copies offset by integer multiples of
+    pitch = (px,py), as in a cascade of blades.
+
+    With T = px + i*py, the complex velocity of the row is the closed form
+    (1/2pi) int (pi/T)cot(pi(z-zeta)/T) dt, and subtracting the original
+    panel's contribution leaves (1/2pi e) [G(a) - G(b)], where e is the unit
+    tangent, a and b are pi/T times the offsets of z from the panel's
+    corners, and G(a) = log(sin(a)/a).  The correction is smooth on the
+    original panel, so it may be added to any self-influence.  The logarithm
+    is taken on its principal branch, which requires panels shorter than
+    the pitch.
+    '''
+    x1,y1,tx,ty,edge = arrayify(x1,y1,tx,ty,edge)
+    T = pitch[0] + 1j*pitch[1]
+    if (T == 0):
+        raise ValueError('Pitch must be nonzero')
+    z = np.reshape(X,(-1,1)) + 1j*np.reshape(Y,(-1,1))
+    e = tx + 1j*ty
+    a = (np.pi/T)*(z - (x1 + 1j*y1))
+    b = a - (np.pi/T)*(edge*e)
+    C = log_sinc(a) - log_sinc(b)
+    C = C.real + 1j*np.angle(np.exp(1j*C.imag))
+    w = C/(2*np.pi*e)
+    return (w.real, -w.imag)
+
 # ------------------------------------------------------------
 # Influence matrices
 # ------------------------------------------------------------
-def source_influence_matrices(x1,y1,tx,ty,nx,ny,edge):
-    n = len(edge)
-    xmid = x1 + .5*(tx*edge)
-    ymid = y1 + .5*(ty*edge)
-    At = np.zeros((n,n))
-    An = np.zeros((n,n))
-    # Build influence matrices column by column
-    for j in range(n):
-        (u,v) = velocity_source_panel(x1[j],y1[j],tx[j],ty[j],edge[j],1.,
-            xmid,ymid)
-        At[:,j] = u*tx + v*ty
-        An[:,j] = u*nx + v*ny
-    # Update diagonal entries (based on hand computation)
-    for i in range(n):
-        An[i,i] = .5
-        At[i,i] = 0
-    return (At,An)
+def source_influence_matrices(x1,y1,tx,ty,nx,ny,edge,out=None,block=256,
+    mirror=None,pitch=None):
+    '''
+    Return the tangential and normal influence matrices At,An of unit source
+    panels at the panel midpoints.  The matrices are built a block of
+    columns at a time, and are written into the arrays out = (At,An) if
+    given (e.g. memory maps; see disk_array).  If a MirrorPlane is given,
+    the influence of the image panels is included; if a pitch is given, so
+    is that of the other blades of the cascade.
+    '''
+    return _influence_matrices(x1,y1,tx,ty,nx,ny,edge,out,block,mirror,
+        pitch,False)
+
+def vortex_influence_matrices(x1,y1,tx,ty,nx,ny,edge,out=None,block=256,
+    mirror=None,pitch=None):
+    '''
+    Return the tangential and normal influence matrices Bt,Bn of unit vortex
+    panels at the panel midpoints.  The matrices are built a block of
+    columns at a time, and are written into the arrays out = (Bt,Bn) if
+    given (e.g. memory maps; see disk_array).  If a MirrorPlane is given,
+    the influence of the image panels is included; if a pitch is given, so
+    is that of the other blades of the cascade.
+    '''
+    return _influence_matrices(x1,y1,tx,ty,nx,ny,edge,out,block,mirror,
+        pitch,True)
 
-def vortex_influence_matrices(x1,y1,tx,ty,nx,ny,edge):
+def _influence_matrices(x1,y1,tx,ty,nx,ny,edge,out,block,mirror,pitch,
+    vortex):
     n = len(edge)
+    if (out is None):
+        out = (np.zeros((n,n)), np.zeros((n,n)))
+    if (out[0].shape != (n,n) or out[1].shape != (n,n)):
+        raise SizeMismatchError()
+    # Build influence matrices block by block
+    for j0 in range(0, n, block):
+        cols = slice(j0, min(j0+block, n))
+        (At,An,Bt,Bn) = influence_matrices_block(x1,y1,tx,ty,nx,ny,edge,
+            slice(None),cols,mirror,pitch)
+        if (vortex):
+            out[0][:,cols], out[1][:,cols] = Bt, Bn
+        else:
+            out[0][:,cols], out[1][:,cols] = At, An
+    return tuple(out)
+
+def influence_matrices_block(x1,y1,tx,ty,nx,ny,edge,rows,cols,mirror=None,
+    pitch=None):
+    '''
+    Return the blocks At,An,Bt,Bn of the tangential/normal source/vortex
+    influence matrices coupling the panel midpoints indexed by rows to the
+    panels indexed by cols (index arrays or slices).  If a MirrorPlane is
+    given, each panel is paired with its mirror image, which carries a
+    source of equal strength and a vortex of opposite strength.  If a pitch
+    is given, each panel stands for an infinite row of copies (a cascade).
+    '''
+    if (type(rows) is slice):
+        rows = np.arange(len(edge))[rows]
+    if (type(cols) is slice):
+        cols = np.arange(len(edge))[cols]
+    xmid = x1[rows] + .5*(tx[rows]*edge[rows])
+    ymid = y1[rows] + .5*(ty[rows]*edge[rows])
+    panels = (x1[cols], y1[cols], tx[cols], ty[cols], edge[cols])
+    (u,v) = velocity_source_panel_matrices(*panels, xmid, ymid)
+    if (pitch is not None):
+        (uc,vc) = periodic_correction_panel_matrices(*panels, xmid, ymid,
+            pitch)
+    tr, sr = tx[rows,None], ty[rows,None]
+    nr, mr = nx[rows,None], ny[rows,None]
+    At, An = u*tr + v*sr, u*nr + v*mr
+    Bt, Bn = -v*tr + u*sr, -v*nr + u*mr
+    # Update panel self-influences (based on hand computation)
+    (i,j) = np.nonzero(rows[:,None] == cols[None,:])
+    At[i,j], Bn[i,j] = 0, 0
+    An[i,j], Bt[i,j] = .5, .5
+    if (pitch is not None):
+        At, An = At + uc*tr + vc*sr, An + uc*nr + vc*mr
+        Bt, Bn = Bt - vc*tr + uc*sr, Bn - vc*nr + uc*mr
+    if (mirror is not None):
+        (u,v) = mirror.image_velocity(lambda X,Y:
+            velocity_source_panel_matrices(*panels, X, Y, pitch), xmid, ymid)
+        At, An = At + u*tr + v*sr, An + u*nr + v*mr
+        # Image vortices have opposite strength
+        Bt, Bn = Bt + v*tr - u*sr, Bn + v*nr - u*mr
+    return (At,An,Bt,Bn)
+
+def influence_hmatrices(x1,y1,tx,ty,nx,ny,edge,eta=.5,tol=1.e-8,
+    leaf_size=32,mirror=None):
+    '''
+    Return the influence matrices At,An,Bt,Bn as hierarchical matrices (see
+    HMatrix), compressed to relative accuracy tol over a cluster tree of the
+    panel midpoints.  Storage grows like N log N rather than N^2.  If a
+    MirrorPlane is given, the influence of the image panels is included.
+    '''
+    x1,y1,tx,ty,nx,ny,edge = arrayify(x1,y1,tx,ty,nx,ny,edge)
     xmid = x1 + .5*(tx*edge)
     ymid = y1 + .5*(ty*edge)
-    Bt = np.zeros((n,n))
-    Bn = np.zeros((n,n))
-    # Build influence matrices column by column
-    for j in range(n):
-        (u,v) = velocity_vortex_panel(x1[j],y1[j],tx[j],ty[j],edge[j],1.,
-            xmid,ymid)
-        Bt[:,j] = u*tx + v*ty
-        Bn[:,j] = u*nx + v*ny
-    # Update diagonal entries (based on hand computation)
-    for i in range(n):
-        Bt[i,i] = .5
-        Bn[i,i] = 0
-    return (Bt,Bn)
+    tree = ClusterTree(xmid, ymid, leaf_size, .5*edge)
+    return tuple(HMatrix.compress(tree, tree, lambda I,J:
+        influence_matrices_block(x1,y1,tx,ty,nx,ny,edge,I,J,mirror), eta,
+        tol))
@@ -0,0 +1,186 @@
+'''
+This module provides a treecode for the fast evaluation of the velocity
+induced by many source and vortex panels at many points.  Interactions
+between well-separated clusters of panels and points are evaluated with a
+truncated multipole expansion of the complex velocity, while the remaining
+(near-field) interactions are evaluated exactly, panel by panel.  Neither
+evaluation forms a dense matrix coupling all panels to all points, so both
+the memory and the work grow like N log N rather than N^2.
+'''
+import numpy as np
+from ubem2d.Errors import SizeMismatchError
+from ubem2d.geometry.ClusterTree import ClusterTree, block_partition
+from ubem2d.panel.PanelInfluence import velocity_source_panel_matrices
+from ubem2d.util.arrayify import arrayify
+
+__all__ = ['PanelTreecode']
+
+class PanelTreecode():
+    '''
+    The complex velocity w = u - iv induced at z by source and vortex panels
+    with constant strengths sigma and gamma is
+
+    w(z) = (1/2pi) sum_j (sigma_j - i*gamma_j) int_{panel j} dt/(z - zeta(t)).
+
+    For a cluster of panels enclosed by a disk of center c and radius rho,
+    and for |z - c| > rho, expanding 1/(z - zeta) in powers of (zeta - c)
+    gives w(z) = sum_k b_k (rho/(z-c))^(k+1), where the coefficients b_k
+    are exact moments of the panels' strength distribution.  The expansion
+    is truncated after order terms.
+    '''
+    def __init__(self, x1, y1, tx, ty, edge, order = 24, eta = .5,
+        leaf_size = 32):
+        '''
+        x1,y1,tx,ty,edge: initial corners, unit tangents, and lengths of the
+            panels, as in the functions of PanelInfluence.
+        order: number of terms retained in each multipole expansion
+        eta: admissibility parameter in (0,1); the truncation error of the
+            far-field interactions is of order eta**order.
+        leaf_size: maximum number of panels per leaf of the cluster tree
+        '''
+        x1,y1,tx,ty,edge = arrayify(x1,y1,tx,ty,edge)
+        n = len(edge)
+        if (len(x1) != n or len(y1) != n or len(tx) != n or len(ty) != n):
+            raise SizeMismatchError()
+        if (order < 1):
+            raise ValueError('Expansion order must be at least 1')
+        self._x1, self._y1 = x1, y1
+        self._tx, self._ty = tx, ty
+        self._edge = edge
+        self._xmid = x1 + .5*edge*tx
+        self._ymid = y1 + .5*edge*ty
+        self._order = int(order)
+        self._eta = eta
+        self._leaf_size = leaf_size
+        self._tree = ClusterTree(self._xmid, self._ymid, leaf_size, .5*edge)
+        self._moments = {}   # Multipole moments, computed as needed
+        self._self_plan = None   # Interaction plan for the panel midpoints
+
+    def __len__(self):
+        return len(self._edge)
+
+    @property
+    def tree(self):
+        return self._tree
+
+    @property
+    def order(self):
+        return self._order
+
+    @property
+    def eta(self):
+        return self._eta
+
+    def moments(self, k):
+        '''
+        Return the (normalized) multipole moments of the panels in node k of
+        the cluster tree, as a matrix with one row per panel and one column
+        per term of the expansion.
+        '''
+        if (k not in self._moments):
+            tree = self._tree
+            idx = tree.indices(k)
+            c = tree.cx[k] + 1j*tree.cy[k]
+            rho = tree.radius[k]
+            e = self._tx[idx] + 1j*self._ty[idx]
+            u1 = ((self._x1[idx] + 1j*self._y1[idx]) - c)/rho
+            u2 = u1 + (self._edge[idx]/rho)*e
+            p = np.arange(1, self._order+1)
+            self._moments[k] = (u2[:,None]**p - u1[:,None]**p)/(
+                p*e[:,None])
+        return self._moments[k]
+
+    def plan(self, X, Y):
+        '''
+        Return an interaction plan for the points X,Y (flattened).  The plan
+        records which panel clusters interact with which point clusters via
+        multipole expansions, and holds the exact near-field velocity
+        matrices for the remaining interactions.  A plan may be reused for
+        any number of strength distributions.
+        '''
+        X,Y = arrayify(X,Y)
+        if (X.shape != Y.shape):
+            raise SizeMismatchError()
+        X, Y = X.ravel(), Y.ravel()
+        targets = ClusterTree(X, Y, self._leaf_size)
+        far, near = block_partition(targets, self._tree, self._eta)
+        # Far field: group source nodes by target node
+        far_groups = {}
+        for (s,t) in far:
+            far_groups.setdefault(s, []).append(t)
+        # Near field: exact velocity matrices, grouped by target leaf
+        near_groups = {}
+        for (s,t) in near:
+            near_groups.setdefault(s, []).append(t)
+        near_blocks = []
+        for s, ts in near_groups.items():
+            rows = targets.indices(s)
+            cols = np.concatenate([self._tree.indices(t) for t in ts])
+            (U,V) = velocity_source_panel_matrices(self._x1[cols],
+                self._y1[cols], self._tx[cols], self._ty[cols],
+                self._edge[cols], X[rows], Y[rows])
+            near_blocks.append((rows, cols, U, V))
+        return dict(X=X, Y=Y, targets=targets, far=far_groups,
+            near=near_blocks)
+
+    def self_plan(self):
+        '''
+        Return the interaction plan for the panel midpoints, in which the
+        influence of each panel on its own midpoint is omitted.  Callers add
+        the (hand-computed) self-influence of each panel separately.
+        '''
+        if (self._self_plan is None):
+            plan = self.plan(self._xmid, self._ymid)
+            for (rows, cols, U, V) in plan['near']:
+                (i,j) = np.nonzero(rows[:,None] == cols[None,:])
+                U[i,j], V[i,j] = 0., 0.
+            self._self_plan = plan
+        return self._self_plan
+
+    def velocity(self, sigma, gamma, X = None, Y = None, plan = None):
+        '''
+        Return the velocity U,V induced at the points X,Y by panels with
+        source strengths sigma and vortex strengths gamma (both either
+        scalars or arrays with one entry per panel).  If X,Y are omitted,
+        the velocity is evaluated at the panel midpoints, omitting each
+        panel's influence on its own midpoint.  A precomputed plan may be
+        given in place of X,Y.
+        '''
+        n = len(self)
+        sigma = np.broadcast_to(arrayify(sigma).astype(float), (n,))
+        gamma = np.broadcast_to(arrayify(gamma).astype(float), (n,))
+        if (plan is None):
+            if (X is None and Y is None):
+                plan = self.self_plan()
+                shape = (n,)
+            else:
+                plan = self.plan(X, Y)
+                shape = X.shape
+        else:
+            shape = plan['X'].shape
+        Xf, Yf = plan['X'], plan['Y']
+        targets = plan['targets']
+        w = np.zeros(len(Xf), dtype=complex)
+        # Far field via multipole expansions
+        weight = (.5/np.pi)*(sigma - 1j*gamma)
+        coefs = {}
+        for s, ts in plan['far'].items():
+            for t in ts:
+                if (t not in coefs):
+                    coefs[t] = weight[self._tree.indices(t)].dot(
+                        self.moments(t))
+            rows = targets.indices(s)
+            zt = Xf[rows] + 1j*Yf[rows]
+            c = self._tree.cx[ts] + 1j*self._tree.cy[ts]
+            q = self._tree.radius[ts]/(zt[:,None] - c)
+            b = np.array([coefs[t] for t in ts])
+            acc = np.zeros(q.shape, dtype=complex)
+            for k in range(self._order-1, -1, -1):
+                acc = q*(b[:,k] + acc)
+            w[rows] += acc.sum(1)
+        U, V = w.real, -w.imag
+        # Near field via exact panel integrals
+        for (rows, cols, Us, Vs) in plan['near']:
+            U[rows] += Us.dot(sigma[cols]) - Vs.dot(gamma[cols])
+            V[rows] += Vs.dot(sigma[cols]) + Us.dot(gamma[cols])
+        return (U.reshape(shape), V.reshape(shape))
@@ -1,2 +1,5 @@
 from ubem2d.panel.BodyInfluence import *
+from ubem2d.panel.DoubletInfluence import *
+from ubem2d.panel.LinearVortexInfluence import *
 from ubem2d.panel.PanelInfluence import *
+from ubem2d.panel.PanelTreecode import *
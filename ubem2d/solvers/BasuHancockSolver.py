@@ -1,11 +1,13 @@
+from collections import namedtuple
 import numpy as np
 import numpy.linalg as nla
 import scipy.linalg as sla
+import scipy.sparse.linalg as spla
 from ubem2d.fluids.BasicFlows import velocity_uniform_flow
-from ubem2d.panel.PanelInfluence import velocity_source_panel
 from ubem2d.panel.PanelInfluence import velocity_vortex_panel
 from ubem2d.panel.BodyInfluence import source_influence_matrices_body
 from ubem2d.panel.BodyInfluence import vortex_influence_matrices_body
+from ubem2d.panel.BodyInfluence import influence_hmatrices_body
 from ubem2d.panel.BodyInfluence import velocity_source_body
 from ubem2d.panel.BodyInfluence import velocity_vortex_body
 from ubem2d.Errors import SolverError
@@ -17,12 +19,34 @@ class BasuHancockSolver():
     '''
     This class implements the unsteady boundary-element method, described in
     Basu and Hancock (JFM 1978), for flow past an airfoil.
+
+    If hmatrix is True, the influence matrices are stored as hierarchical
+    matrices (see HMatrix) compressed to accuracy aca_tol, and the source
+    strengths are found by preconditioned GMRES, warm-started from those of
+    the previous iteration, rather than by a dense LU factorization.  This
+    keeps the memory needed for bodies of tens of thousands of panels near
+    O(N log N) rather than O(N^2).
+
+    If a MirrorPlane is given, the airfoil and its wake are paired with their
+    mirror images (e.g. in a ground plane), which are not discretized: image
+    contributions enter the influence matrices and every velocity evaluation
+    implicitly.  Because the airfoil moves relative to the plane, the
+    influence matrices are then rebuilt at each unsteady step.  The onset
+    flow must be parallel to the mirror plane.
+
+    If a pitch (px,py) is given, the airfoil is a blade of an unsteady
+    cascade, all blades moving in phase: every body and wake-panel velocity
+    is that of the infinite row of copies offset by multiples of the pitch,
+    and the wake should be a PeriodicPointVortexWake of the same pitch.
     '''
     def __init__(self, body, wake, xref = -10, yref = 0, nref = 20,
         maxiters = 200, tol = 1.e-6, maxerr = 1.e-5, wakep_free = True,
-        wake_body = True, wake_self = True):
+        wake_body = True, wake_self = True, hmatrix = False,
+        aca_tol = 1.e-10, mirror = None, pitch = None):
 
         super().__init__()
+        if (hmatrix and pitch is not None):
+            raise ValueError('H-matrix storage does not support cascades')
 
         self._steps = 0                 # Number of steps taken thus far
 
@@ -44,32 +68,142 @@ class BasuHancockSolver():
         self._shed_x = None             # x coordinate of last shed vortex
         self._shed_y = None             # y coordinate of last shed vortex
 
-        # Construct body influence matrices and perform LU factorization
-        self._At, self._An = source_influence_matrices_body(self._body)
-        self._Bt, self._Bn = vortex_influence_matrices_body(self._body)
-        self._lup = sla.lu_factor(self._An)
+        self._hmatrix = hmatrix         # Whether to use H-matrix storage
+        self._aca_tol = aca_tol         # H-matrix compression accuracy
+        self._mirror = mirror           # Mirror plane, if any
+        self._pitch = pitch             # Cascade pitch, if any
+        self._xxk, self._yyk = None, None   # GMRES warm starts
+        self.update_influence()
+
+    def update_influence(self):
+        '''
+        Construct body influence matrices and perform LU factorization (or
+        prepare the GMRES solver, for H-matrix storage).
+        '''
+        n = self._body.nedge
+        mirror = self._mirror
+        if (self._hmatrix):
+            (At,An,Bt,Bn) = influence_hmatrices_body(self._body,
+                tol=self._aca_tol, mirror=mirror)
+            # Block-Jacobi preconditioner for GMRES solves with An
+            self._An_blocks = [(I, sla.lu_factor(D)) for (I,D) in
+                An.diagonal_blocks()]
+            self._An_op = spla.LinearOperator((n,n), matvec=An.dot,
+                dtype=float)
+            self._An_pre = spla.LinearOperator((n,n),
+                matvec=self.precondition, dtype=float)
+            self._At_te = np.array([At.row(0), At.row(n-1)])
+        else:
+            At, An = source_influence_matrices_body(self._body, mirror=mirror,
+                pitch=self._pitch)
+            Bt, Bn = vortex_influence_matrices_body(self._body, mirror=mirror,
+                pitch=self._pitch)
+            self._Bt, self._Bn = Bt, Bn
+            self._lup = sla.lu_factor(An)
+            self._At_te = At[[0,-1],:]
+        self._At, self._An = At, An
+        # Vortex matrices enter only via their row sums
+        self._Bt_sum = Bt.dot(np.ones(n))
+        self._Bn_sum = Bn.dot(np.ones(n))
+
+    def precondition(self, x):
+        '''
+        Apply the block-Jacobi preconditioner for the H-matrix An to x.
+        '''
+        y = np.zeros(len(x))
+        for (I,lu) in self._An_blocks:
+            y[I] = sla.lu_solve(lu, x[I])
+        return y
+
+    def solve_source(self, rhs, x0 = None):
+        '''
+        Return the solution x of An*x = rhs, where An is the normal source
+        influence matrix.  The GMRES iteration (H-matrix storage only)
+        starts from x0, if given.
+        '''
+        if (not self._hmatrix):
+            return sla.lu_solve(self._lup, rhs)
+        x, status = spla.gmres(self._An_op, rhs, x0=x0, rtol=1.e-12,
+            atol=0., restart=50, maxiter=20, M=self._An_pre)
+        if (status != 0):
+            raise SolverError('GMRES failed to converge')
+        return x
+
+    def mirrored(self, velocity, X, Y):
+        '''
+        Return the velocity at X,Y given by the callable velocity(X,Y), plus
+        that of its mirror image if there is a mirror plane.
+        '''
+        if (self._mirror is None):
+            return velocity(X, Y)
+        return self._mirror.symmetric_velocity(velocity, X, Y)
+
+    def velocity_body(self, sigk, gamk, X, Y):
+        '''
+        Return the velocity at X,Y due to the source and vortex distributions
+        along the body (not including any mirror image).
+        '''
+        n = self._body.nedge
+        (us,vs) = velocity_source_body(self._body, sigk, X, Y, self._pitch)
+        (uv,vv) = velocity_vortex_body(self._body, gamk*np.ones(n), X, Y,
+            self._pitch)
+        return (us + uv, vs + vv)
 
-    def step(self, dt = 0, uinf=(1,0)):
+    def velocity_wake_panel(self, gamwk, X, Y):
+        '''
+        Return the velocity at X,Y due to the wake panel (not including any
+        mirror image).
+        '''
+        x1 = self._body.x[0]
+        y1 = self._body.y[0]
+        tx = np.cos(self._thk)
+        ty = np.sin(self._thk)
+        return velocity_vortex_panel(x1,y1,tx,ty,self._delk,gamwk,X,Y,
+            self._pitch)
+
+    def step(self, dt = 0, uinf=(1,0), velocity = None):
+        '''
+        Take a step to the body's current position, steady if it is the
+        first.  The velocity of the body enters the Neumann condition of an
+        unsteady step; it is given by velocity, either a callable of the
+        points X,Y returning their velocities U,V or a tuple (U,V) of the
+        velocities of the panel midpoints (e.g. from RigidMotion's
+        point_velocity, or Airfoil's pitch_heave_velocity).  If not given,
+        it is approximated by differencing the midpoints over the step, to
+        first order in dt.
+        '''
+        if (self._mirror is not None):
+            self._mirror.check_onset(uinf)
         if (self._steps == 0):
             return self.steady_step(uinf)
         elif (dt != 0):
-            return self.unsteady_step(dt, uinf)
+            return self.unsteady_step(dt, uinf, velocity)
         else:
             raise ValueError('Unsteady time step must be nonzero')
 
     def steady_step(self, uinf):
-        soln = solve_hess_smith_body(uinf, self._body, self._At, self._An,
-            self._Bt, self._Bn)
+        if (self._hmatrix):
+            soln = self.solve_steady(uinf)
+        else:
+            soln = solve_hess_smith_body(uinf, self._body, self._At,
+                self._An, self._Bt, self._Bn)
         phik = self.compute_potential(uinf, soln.qt, soln.sigma, soln.gamma, 0)
         # Make initial guess for wake panel length and inclination
         self._delk = self._body.perimeter/self._body.nedge
         self._thk = self.trailing_edge_bisector()
         return self.post_step(soln.sigma, soln.gamma, phik, soln.cp, 0, 0, 0)
 
-    def unsteady_step(self, dt, uinf):
+    def unsteady_step(self, dt, uinf, velocity = None):
+        if (self._mirror is not None):
+            self.update_influence()
         # Kinematic update and Kutta condition
-        dxdt = (self._body._xmid - self._xmid)/dt
-        dydt = (self._body._ymid - self._ymid)/dt
+        if (velocity is None):
+            dxdt = (self._body._xmid - self._xmid)/dt
+            dydt = (self._body._ymid - self._ymid)/dt
+        elif (callable(velocity)):
+            (dxdt,dydt) = velocity(self._body.xmid, self._body.ymid)
+        else:
+            (dxdt,dydt) = velocity
         vn = dxdt*self._body.nx + dydt*self._body.ny
         sigk,gamk,uwk,vwk = self.solve_implicit_kutta(uinf,vn,dt)
         # Kelvin circulation theorem
@@ -99,6 +233,25 @@ class BasuHancockSolver():
         self.advect_wake(uinf, sigk, gamk, dt)
         return self.post_step(sigk, gamk, phik, cp, shed_circ, shed_x, shed_y)
 
+    def solve_steady(self, uinf):
+        '''
+        Solve the steady Hess-Smith problem without forming the Hess-Smith
+        matrix.  Source strengths are sought in the form sigma = gamma*xx + yy
+        with An*xx = -sum(Bn) and An*yy = -(normal onset flow), and gamma is
+        then fixed by the Kutta condition qt[0] + qt[-1] = 0.
+        '''
+        (uinft,uinfn) = self.flow_onset(uinf)
+        xx = self.solve_source(-self._Bn_sum)
+        yy = self.solve_source(-uinfn)
+        Att = self._At_te.sum(0)
+        gamma = -(np.dot(Att,yy) + uinft[0] + uinft[-1])/(np.dot(Att,xx) +
+            self._Bt_sum[0] + self._Bt_sum[-1])
+        sigma = gamma*xx + yy
+        qt = self._At.dot(sigma) + gamma*self._Bt_sum + uinft
+        cp = 1. - (qt/nla.norm(uinf))**2
+        self._xxk, self._yyk = xx, yy
+        return namedtuple('soln','sigma,gamma,cp,qt')(sigma,gamma,cp,qt)
+
     def post_step(self, sigk, gamk, phik, cp, shed_circ, shed_x, shed_y):
         '''
         Update values and store for use in the next time step.  Return the 
@@ -127,7 +280,6 @@ class BasuHancockSolver():
         (uinft,uinfn) = self.flow_onset(uinf)
         (Wvt,Wvn) = self.flow_wake()
         L = self._body.perimeter
-        n = self._body.nedge
         if (not self._wakep_free):
             self._thk = self.trailing_edge_bisector()
 
@@ -135,17 +287,19 @@ class BasuHancockSolver():
         converged = False
         for i in range(self._maxiters):
             (Wpt,Wpn) = self.flow_wake_panel(1.)
-            bk = (L/self._delk)*Wpn - np.sum(self._Bn,1)
+            bk = (L/self._delk)*Wpn - self._Bn_sum
             ck = -uinfn - (L/self._delk)*self._gam*Wpn - Wvn + vn
-            xxk = sla.lu_solve(self._lup, bk)
-            yyk = sla.lu_solve(self._lup, ck)
-            alpha1 = np.dot(self._At[0,:],xxk) + np.sum(self._Bt[0,:]) \
+            xxk = self.solve_source(bk, self._xxk)
+            yyk = self.solve_source(ck, self._yyk)
+            if (self._hmatrix):
+                self._xxk, self._yyk = xxk, yyk
+            alpha1 = np.dot(self._At_te[0],xxk) + self._Bt_sum[0] \
                 - (L/self._delk)*Wpt[0]
-            beta1 = np.dot(self._At[0,:],yyk) \
+            beta1 = np.dot(self._At_te[0],yyk) \
                 + (L/self._delk)*self._gam*Wpt[0] + Wvt[0] + uinft[0]
-            alphaN = np.dot(self._At[-1,:],xxk) + np.sum(self._Bt[-1,:]) \
+            alphaN = np.dot(self._At_te[1],xxk) + self._Bt_sum[-1] \
                 - (L/self._delk)*Wpt[-1]
-            betaN = np.dot(self._At[-1,:],yyk) \
+            betaN = np.dot(self._At_te[1],yyk) \
                 + (L/self._delk)*self._gam*Wpt[-1] + Wvt[-1] + uinft[-1]
             zeta = alpha1**2 - alphaN**2
             eta = 2*(alpha1*beta1 - alphaN*betaN - L/dt)
@@ -166,15 +320,17 @@ class BasuHancockSolver():
                 .5*self._delk*np.cos(self._thk)])
             ywkmid = np.array([self._body.y[0] + \
                 .5*self._delk*np.sin(self._thk)])
-            (uv,vv) = velocity_vortex_panel(self._body.x[:-1],
-                self._body.y[:-1], self._body.tx, self._body.ty,
-                self._body.edge, gamk*np.ones(n), xwkmid, ywkmid)
-            (us,vs) = velocity_source_panel(self._body.x[:-1],
-                self._body.y[:-1], self._body.tx, self._body.ty,
-                self._body.edge, sigk, xwkmid, ywkmid)
-            (uw,vw) = self._wake.velocity(xwkmid, ywkmid)
-            uwk = uv + us + uw + uinf[0]
-            vwk = vv + vs + vw + uinf[1]
+            (ub,vb) = self.mirrored(lambda X,Y:
+                self.velocity_body(sigk, gamk, X, Y), xwkmid, ywkmid)
+            (uw,vw) = self.mirrored(self._wake.velocity, xwkmid, ywkmid)
+            uwk = ub + uw + uinf[0]
+            vwk = vb + vw + uinf[1]
+            if (self._mirror is not None):
+                # Image of the wake panel (its own influence is zero)
+                gamwk = (L/self._delk)*(self._gam - gamk)
+                (ui,vi) = self._mirror.image_velocity(lambda X,Y:
+                    self.velocity_wake_panel(gamwk, X, Y), xwkmid, ywkmid)
+                uwk, vwk = uwk + ui, vwk + vi
 
             # Update wake panel geometry and check for convergence
             self._delk = np.sqrt(uwk**2 + vwk**2)[0]*dt
@@ -188,7 +344,7 @@ class BasuHancockSolver():
         # End of wake panel iteration loop
         if (not converged):
             raise SolverError('Unsteady wake panel failed to converge')
-        return sigk,gamk,uwk,vwk
+        return sigk,gamk,uwk[0],vwk[0]
 
     def flow(self, uinf, sigk, gamk, gamwk):
         '''
@@ -216,8 +372,8 @@ class BasuHancockSolver():
         Return the tangential and normal components of the flow at the panel
         midpoints due to the source and vortex distributions.
         '''
-        bodyt = np.dot(self._At,sigk) + gamk*np.sum(self._Bt,1)
-        bodyn = np.dot(self._An,sigk) + gamk*np.sum(self._Bn,1)
+        bodyt = self._At.dot(sigk) + gamk*self._Bt_sum
+        bodyn = self._An.dot(sigk) + gamk*self._Bn_sum
         return (bodyt,bodyn)
 
     def flow_wake_panel(self,gamwk):
@@ -225,12 +381,8 @@ class BasuHancockSolver():
         Return the tangential and normal components of the flow at the panel
         midpoints due to the wake panel.
         '''
-        x1 = self._body.x[0]
-        y1 = self._body.y[0]
-        tx = np.cos(self._thk)
-        ty = np.sin(self._thk)
-        (u,v) = velocity_vortex_panel(x1,y1,tx,ty,self._delk,
-            gamwk, self._body.xmid, self._body.ymid)
+        (u,v) = self.mirrored(lambda X,Y: self.velocity_wake_panel(gamwk,
+            X, Y), self._body.xmid, self._body.ymid)
         return (u*self._body.tx + v*self._body.ty,
             u*self._body.nx + v*self._body.ny)
 
@@ -239,7 +391,8 @@ class BasuHancockSolver():
         Return the tangential and normal components of the flow at the panel
         midpoints due to the wake vortices.
         '''
-        (u,v) = self._wake.velocity(self._body.xmid, self._body.ymid)
+        (u,v) = self.mirrored(self._wake.velocity, self._body.xmid,
+            self._body.ymid)
         return (u*self._body.tx + v*self._body.ty,
             u*self._body.nx + v*self._body.ny)
 
@@ -257,20 +410,15 @@ class BasuHancockSolver():
         ypp = np.linspace(self._yref, yle, self._nref+1)
         # Contributions from onset flow, body source & vortex panels, wake
         (u,v) = velocity_uniform_flow(uinf,xpp[:-1],ypp[:-1])
-        (us,vs) = velocity_source_body(self._body,sigk,xpp[:-1],ypp[:-1])
-        (uv,vv) = velocity_vortex_body(self._body,gamk*np.ones(n),
-            xpp[:-1],ypp[:-1])
-        (uw,vw) = self._wake.velocity(xpp[:-1],ypp[:-1])
+        (ub,vb) = self.mirrored(lambda X,Y: self.velocity_body(sigk, gamk,
+            X, Y), xpp[:-1], ypp[:-1])
+        (uw,vw) = self.mirrored(self._wake.velocity, xpp[:-1], ypp[:-1])
         # Net flow, except wake panel
-        u,v = u+us+uv+uw, v+vs+vv+vw
+        u,v = u+ub+uw, v+vb+vw
         # Contribution from wake panel
         if (self._delk is not None and self._thk is not None):
-            x1 = self._body.x[0]
-            y1 = self._body.y[0]
-            tx = np.cos(self._thk)
-            ty = np.sin(self._thk)
-            (uwp,vwp) = velocity_vortex_panel(x1,y1,tx,ty,self._delk,gamwk,
-                xpp[:-1],ypp[:-1])
+            (uwp,vwp) = self.mirrored(lambda X,Y: self.velocity_wake_panel(
+                gamwk, X, Y), xpp[:-1], ypp[:-1])
             u,v = u+uwp, v+vwp
         # Line integral of flow from reference point to the leading edge
         le = self._body.le   # Index of the airfoil's leading-edge corner
@@ -290,19 +438,21 @@ class BasuHancockSolver():
         Advect the wake vortices with a simple one-step, explicit Euler
         integration scheme.
         '''
-        npan = self._body.nedge
         nvort = len(self._wake)
         vx = uinf[0]*np.ones(nvort)
         vy = uinf[1]*np.ones(nvort)
         if (self._wake_body):
-            (us,vs) = velocity_source_body(self._body, sigk, self._wake.x,
-                self._wake.y)
-            (uv,vv) = velocity_vortex_body(self._body, gamk*np.ones(npan),
-                self._wake.x, self._wake.y)
-            vx += us + uv
-            vy += vs + vv
+            (ub,vb) = self.mirrored(lambda X,Y: self.velocity_body(sigk,
+                gamk, X, Y), self._wake.x, self._wake.y)
+            vx += ub
+            vy += vb
         if (self._wake_self):
             (us,vs) = self._wake.self_velocity()
             vx += us
             vy += vs
+            if (self._mirror is not None):
+                (ui,vi) = self._mirror.image_velocity(self._wake.velocity,
+                    self._wake.x, self._wake.y)
+                vx += ui
+                vy += vi
         self._wake.advect(vx,vy,dt)
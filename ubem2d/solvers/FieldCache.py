@@ -0,0 +1,234 @@
+from collections import namedtuple
+import numpy as np
+import numpy.linalg as nla
+from numpy.lib.stride_tricks import sliding_window_view
+from ubem2d.Errors import SizeMismatchError
+from ubem2d.geometry.MeshHelper import interior, boundary_cells
+from ubem2d.panel.BodyInfluence import velocity_source_body
+from ubem2d.panel.BodyInfluence import velocity_vortex_body
+from ubem2d.util.tiled_field import evaluate_tiled
+
+__all__ = ['FieldCache']
+
+def cubic_weights(t):
+    '''
+    Return the weights, of shape t.shape + (4,), of the cubic convolution
+    kernel (Keys, 1981) at the nodes -1,0,1,2 for the offsets t in [0,1).
+    '''
+    t2, t3 = t*t, t*t*t
+    return .5*np.stack([-t3 + 2*t2 - t, 3*t3 - 5*t2 + 2, -3*t3 + 4*t2 + t,
+        t3 - t2], axis=-1)
+
+class FieldCache():
+    '''
+    This class tabulates a steady velocity field on nested grids refined
+    toward the bodies, and answers queries at arbitrary points by bicubic
+    (cubic convolution) interpolation on the finest grid covering them.
+    Interpolation is third-order accurate where the field is smooth, but
+    not across a body or near its panels, where the field is singular or
+    meaningless: a grid cell is used only if none of the 16 nodes of its
+    stencil lies inside a body or within near cells of its boundary, and
+    points in other cells are evaluated exactly.
+
+    If estimate is True, the interpolation error is also measured at the
+    centers of every other cell of each grid (a quarter of the cost of the
+    grid), and each cell is given the largest error measured in its
+    neighbourhood, as an estimate of its interpolation error.
+    '''
+    def __init__(self, field, bodies, box = None, n = 64, levels = 3,
+        near = 2, uinf = None, estimate = True, tile = 16384,
+        workers = None):
+        '''
+        field: callable returning the velocity U,V at 1-d arrays x,y
+        bodies: the body or bodies in the flow
+        box: (xmin,xmax,ymin,ymax) of the coarsest grid; by default the
+            bounding box of the bodies padded by its larger side
+        n: nodes of the coarsest grid along the longer side of the box
+        levels: number of grids; each halves the spacing of the last, over
+            the bounding box of the bodies padded by half as much
+        near: cells about the boundaries whose points are evaluated exactly
+        uinf: onset flow, needed only for pressure
+        tile, workers: passed to evaluate_tiled when filling the grids
+        '''
+        if (type(bodies) not in [list,tuple]):
+            bodies = [bodies]
+        self._field = field
+        self._bodies = bodies
+        self._uinf = uinf
+        xmin = min([np.min(b.x) for b in bodies])
+        xmax = max([np.max(b.x) for b in bodies])
+        ymin = min([np.min(b.y) for b in bodies])
+        ymax = max([np.max(b.y) for b in bodies])
+        size = max(xmax - xmin, ymax - ymin)
+        if (box is None):
+            box = (xmin - size, xmax + size, ymin - size, ymax + size)
+        h = max(box[1] - box[0], box[3] - box[2])/(n - 1)
+        self._levels = []
+        for k in range(levels):
+            if (k > 0):
+                h, pad = h/2, size/2**k
+                box = (max(box[0], xmin - pad), min(box[1], xmax + pad),
+                    max(box[2], ymin - pad), min(box[3], ymax + pad))
+            self._levels.append(self.make_level(box, h, near, estimate,
+                tile, workers))
+
+    @classmethod
+    def from_system(cls, system, uinf, soln, bodies, **kwargs):
+        '''
+        Return the cache of the flow of a solved system (e.g. a
+        HessSmithSystem, with soln = system.solve(uinf)) past the bodies.
+        '''
+        return cls(lambda x,y: system.flow_external(uinf, soln, x, y),
+            bodies, uinf=uinf, **kwargs)
+
+    @classmethod
+    def from_body(cls, body, uinf, soln, **kwargs):
+        '''
+        Return the cache of the steady flow past a single body from a
+        solution with source strengths soln.sigma and, if present, bound
+        vorticity soln.gamma (e.g. from solve_hess_smith_body).
+        '''
+        gamma = getattr(soln, 'gamma', 0.)
+        def field(x, y):
+            (us,vs) = velocity_source_body(body, soln.sigma, x, y)
+            (uv,vv) = velocity_vortex_body(body, gamma*np.ones(body.nedge),
+                x, y)
+            return (uinf[0] + us + uv, uinf[1] + vs + vv)
+        return cls(field, body, uinf=uinf, **kwargs)
+
+    def make_level(self, box, h, near, estimate, tile, workers):
+        '''
+        Tabulate the field on the grid of spacing h covering box.
+        '''
+        nx = int(np.ceil((box[1] - box[0])/h)) + 1
+        ny = int(np.ceil((box[3] - box[2])/h)) + 1
+        (x0,y0) = box[0], box[2]
+        (X,Y) = np.meshgrid(x0 + h*np.arange(nx), y0 + h*np.arange(ny))
+        # Nodes inside or near a body; node (i,j) is the center of the cell
+        # of side h about it
+        bad = np.zeros((ny,nx), dtype=bool)
+        for (b,inside) in zip(self._bodies, interior(self._bodies, X, Y)):
+            bad |= inside
+            (xb,yb) = np.asarray(b.x, dtype=float), np.asarray(b.y,
+                dtype=float)
+            # Extend the grid of cells to cover the body
+            mx = int(max(0, np.ceil((x0 - xb.min())/h))) + 1
+            my = int(max(0, np.ceil((y0 - yb.min())/h))) + 1
+            px = int(max(0, np.ceil((xb.max() - X[0,-1])/h))) + 1
+            py = int(max(0, np.ceil((yb.max() - Y[-1,0])/h))) + 1
+            cells = boundary_cells(xb, yb, x0 - (mx + .5)*h,
+                y0 - (my + .5)*h, h, (ny + my + py, nx + mx + px), near)
+            bad |= cells[my:my+ny, mx:mx+nx]
+        # Cell (i,j), between nodes i,i+1 and j,j+1, is clean if the nodes
+        # i-1..i+2, j-1..j+2 of its stencil are good
+        clean = np.zeros((ny,nx), dtype=bool)
+        if (ny >= 4 and nx >= 4):
+            clean[1:-2,1:-2] = sliding_window_view(~bad, (4,4)).all(
+                axis=(-2,-1))
+        (U,V) = evaluate_tiled(self._field, X, Y, ~bad, tile, workers)
+        level = dict(x0=x0, y0=y0, h=h, shape=(ny,nx), U=U, V=V,
+            clean=clean, error=None)
+        if (estimate):
+            level['error'] = self.estimate_error(level, tile, workers)
+        return level
+
+    def estimate_error(self, level, tile, workers):
+        '''
+        Return the estimated interpolation error of each cell of a grid.
+        '''
+        (ny,nx) = level['shape']
+        (h,x0,y0) = level['h'], level['x0'], level['y0']
+        # Sample the centers of the clean cells with even indices
+        sample = np.zeros((ny,nx), dtype=bool)
+        sample[::2,::2] = level['clean'][::2,::2]
+        (i,j) = np.nonzero(sample)
+        (xc,yc) = x0 + h*(j + .5), y0 + h*(i + .5)
+        (U,V) = evaluate_tiled(self._field, xc, yc, tile=tile,
+            workers=workers)
+        (Ui,Vi) = self.interpolate(level, xc, yc, i, j)
+        E = np.zeros((ny,nx))
+        E[i,j] = np.hypot(U - Ui, V - Vi)
+        # Spread each sample over the cells within two of it
+        for k in range(2):
+            F = E.copy()
+            F[1:] = np.maximum(F[1:], E[:-1])
+            F[:-1] = np.maximum(F[:-1], E[1:])
+            E = F.copy()
+            E[:,1:] = np.maximum(E[:,1:], F[:,:-1])
+            E[:,:-1] = np.maximum(E[:,:-1], F[:,1:])
+        E[~level['clean']] = 0.
+        return E
+
+    def interpolate(self, level, x, y, i, j):
+        '''
+        Return the interpolated velocity at the points x,y in the cells
+        (i,j) of a grid.
+        '''
+        (h,x0,y0) = level['h'], level['x0'], level['y0']
+        wx = cubic_weights((x - x0)/h - j)
+        wy = cubic_weights((y - y0)/h - i)
+        rows = i[:,None,None] + np.arange(-1, 3)[None,:,None]
+        cols = j[:,None,None] + np.arange(-1, 3)[None,None,:]
+        return tuple(np.einsum('ni,nij,nj->n', wy, F[rows,cols], wx)
+            for F in (level['U'], level['V']))
+
+    @property
+    def levels(self):
+        '''
+        Return a list of the (x0, y0, h, shape) of the grids, coarsest first.
+        '''
+        return [namedtuple('grid','x0,y0,h,shape')(l['x0'], l['y0'], l['h'],
+            l['shape']) for l in self._levels]
+
+    @property
+    def nbytes(self):
+        return sum(l['U'].nbytes + l['V'].nbytes for l in self._levels)
+
+    def velocity(self, x, y, error = False):
+        '''
+        Return the velocity U,V at the points x,y (arrays of any equal
+        shape), and the estimated error of each if error is True (zero at
+        points evaluated exactly).
+        '''
+        (x,y) = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        if (x.shape != y.shape):
+            raise SizeMismatchError()
+        shape = x.shape
+        (x,y) = x.ravel(), y.ravel()
+        (U,V,E) = np.zeros(x.shape), np.zeros(x.shape), np.zeros(x.shape)
+        left = np.arange(len(x))
+        # The finest grid whose clean cells contain a point answers it
+        for level in reversed(self._levels):
+            if (len(left) == 0):
+                break
+            (ny,nx) = level['shape']
+            u = (x[left] - level['x0'])/level['h']
+            v = (y[left] - level['y0'])/level['h']
+            ok = (u >= 1) & (u < nx - 2) & (v >= 1) & (v < ny - 2)
+            (j,i) = np.zeros(len(left), dtype=int), np.zeros(len(left),
+                dtype=int)
+            j[ok], i[ok] = u[ok].astype(int), v[ok].astype(int)
+            ok[ok] = level['clean'][i[ok], j[ok]]
+            pts = left[ok]
+            (U[pts],V[pts]) = self.interpolate(level, x[pts], y[pts], i[ok],
+                j[ok])
+            if (level['error'] is not None):
+                E[pts] = level['error'][i[ok], j[ok]]
+            left = left[~ok]
+        if (len(left) > 0):
+            (U[left],V[left]) = self._field(x[left], y[left])
+        if (error):
+            return (U.reshape(shape), V.reshape(shape), E.reshape(shape))
+        return (U.reshape(shape), V.reshape(shape))
+
+    def __call__(self, x, y):
+        return self.velocity(x, y)
+
+    def pressure(self, x, y):
+        '''
+        Return the pressure coefficient (via Bernoulli) at the points x,y.
+        '''
+        if (self._uinf is None):
+            raise ValueError('The onset flow is needed for pressure')
+        (U,V) = self.velocity(x, y)
+        return 1. - (U**2 + V**2)/nla.norm(self._uinf)**2
@@ -3,15 +3,22 @@ import numpy as np
 import numpy.linalg as nla
 from ubem2d.panel.BodyInfluence import source_influence_matrices_body
 from ubem2d.panel.BodyInfluence import vortex_influence_matrices_body
+from ubem2d.panel.BodyInfluence import circulant_influence_matrices_body
 
 __all__ = ['solve_hess_smith_body']
 
-def solve_hess_smith_body(uinf, body, At=None, An=None, Bt=None, Bn=None):
+def solve_hess_smith_body(uinf, body, At=None, An=None, Bt=None, Bn=None,
+    circulant=False):
     '''
     Solve for the steady flow past an airfoil using the Hess-Smith method.
     The Kutta condition is that there be no pressure difference across the
     trailing edge of the airfoil, which implies (via Bernoulli) that no
     vorticity is being shed from the trailing edge.
+
+    If circulant is True, or is the order of the body's rotational symmetry,
+    the influence matrices are built and returned as block-circulant
+    matrices (see BlockCirculant), and the system is solved by FFT in
+    O(N log N) operations.  True detects the order of symmetry.
     '''
     # Compute influence matrices as needed
     if ((At is not None and An is None) or (At is None and An is not None)):
@@ -19,6 +26,10 @@ def solve_hess_smith_body(uinf, body, At=None, An=None, Bt=None, Bn=None):
     if ((Bt is not None and Bn is None) or (Bt is None and Bn is not None)):
         raise ValueError('Must specify zero or two influence matrices')
     tx,ty,nx,ny = body.tx, body.ty, body.nx, body.ny
+    if (At is None and Bt is None and circulant is not False):
+        order = None if circulant is True else int(circulant)
+        (At,An,Bt,Bn) = circulant_influence_matrices_body(body, order)
+        return _solve_circulant(uinf, body, At, An, Bt, Bn)
     if (At is None):
         (At,An) = source_influence_matrices_body(body)
     if (Bt is None):
@@ -56,3 +67,21 @@ def solve_hess_smith_body(uinf, body, At=None, An=None, Bt=None, Bn=None):
     # Return the pressure distribution, vorticity, and source strenghts
     return namedtuple('soln','sigma,gamma,cp,qt,qn,At,An,Bt,Bn')(sigma,gamma,
         cp,qt,qn,At,An,Bt,Bn)
+
+def _solve_circulant(uinf, body, At, An, Bt, Bn):
+    '''
+    Solve the Hess-Smith system with block-circulant influence matrices, by
+    block elimination of the Kutta row and column.
+    '''
+    tx,ty,nx,ny = body.tx, body.ty, body.nx, body.ny
+    n = body.nedge
+    rhs = -(uinf[0]*nx + uinf[1]*ny)
+    rhsn = -(uinf[0]*(tx[0]+tx[-1]) + uinf[1]*(ty[0]+ty[-1]))
+    Bt_sum, Bn_sum = Bt.row_sums(), Bn.row_sums()
+    (sigma, gamma) = An.solve_bordered(Bn_sum, At.row(0) + At.row(n-1),
+        Bt_sum[0] + Bt_sum[-1], rhs, rhsn)
+    qt = At.dot(sigma) + gamma*Bt_sum + uinf[0]*tx + uinf[1]*ty
+    qn = An.dot(sigma) + gamma*Bn_sum + uinf[0]*nx + uinf[1]*ny
+    cp = 1. - (qt/nla.norm(uinf))**2
+    return namedtuple('soln','sigma,gamma,cp,qt,qn,At,An,Bt,Bn')(sigma,gamma,
+        cp,qt,qn,At,An,Bt,Bn)
@@ -1,146 +1,271 @@
+import os
 import numpy as np
-import numpy.linalg as nla
 import scipy.linalg as sla
-from ubem2d.panel.PanelInfluence import velocity_source_panel
-from ubem2d.panel.PanelInfluence import velocity_vortex_panel
+from ubem2d.panel.PanelInfluence import influence_matrices_block
 from ubem2d.panel.BodyInfluence import velocity_source_body
 from ubem2d.panel.BodyInfluence import velocity_vortex_body
+from ubem2d.panel.BodyInfluence import circulant_influence_matrices_body
+from ubem2d.util.disk_array import disk_array
+from .PanelSystem import PanelSystem
 
 __all__ = ['HessSmithSystem']
 
-class HessSmithSystem:
-    def __init__(self, bodies):
-        if (type(bodies) not in [list,tuple]):
-            bodies = [bodies]
-        Nb = len(bodies)
-        Ns = [len(body) for body in bodies]
-
-        # Order panel data from the first body through the last body. Then
-        # compute start/end indices for each body.
-        x1 = np.concatenate([body.x[:-1] for body in bodies])
-        y1 = np.concatenate([body.y[:-1] for body in bodies])
-        tx = np.concatenate([body.tx for body in bodies])
-        ty = np.concatenate([body.ty for body in bodies])
-        nx = np.concatenate([body.nx for body in bodies])
-        ny = np.concatenate([body.ny for body in bodies])
-        edge = np.concatenate([body.edge for body in bodies])
-        xmid = np.concatenate([body.xmid for body in bodies])
-        ymid = np.concatenate([body.ymid for body in bodies])
-        a = np.concatenate([[0], np.cumsum(Ns)[:-1]]) # start indices
-        b = np.cumsum(Ns) - 1                         # end indices
-
-        # Compute tangential/normal source/vortex influence matrices
-        N = sum(Ns)  # Total number of panels across all bodies
-        At, An = np.zeros((N, N)), np.zeros((N, N))  # Source influences
-        Bt, Bn = np.zeros((N, N)), np.zeros((N, N))  # Vortex influences
-        for j in range(N):
-            (u,v) = velocity_source_panel(x1[j], y1[j], tx[j], ty[j], edge[j],
-                1., xmid, ymid)
-            At[:,j], An[:,j] = u*tx + v*ty, u*nx + v*ny
-            (u,v) = velocity_vortex_panel(x1[j], y1[j], tx[j], ty[j], edge[j],
-                1., xmid, ymid)
-            Bt[:,j], Bn[:,j] = u*tx + v*ty, u*nx + v*ny
-        for j in range(N):
-            # Update panel self-influences (based on hand computation)
-            At[j,j], Bn[j,j] = 0, 0
-            An[j,j], Bt[j,j] = .5, .5
-
-        # Compute Hess-Smith matrix
-        A = np.zeros((N+Nb, N+Nb))
-        A[:-Nb,:-Nb] = An
-        for k in range(Nb):
-            A[:-Nb,N+k] = np.sum(Bn[:,a[k]:b[k]+1],1)
-            A[N+k,:-Nb] = At[a[k],:] + At[b[k],:]
-            #print('ERROR! Lower-right off-diagonal entries incorrectly zero.')
-            A[N+k,N+k] = Bt[a[k],:].sum() + Bt[b[k],:].sum()
+class HessSmithSystem(PanelSystem):
+    '''
+    This class assembles and LU-factors the Hess-Smith system for the steady
+    flow past one or more bodies, and evaluates the resulting flow.
+
+    By default the influence matrices At, An, Bt, Bn are kept alongside the
+    LU factors.  In lean mode only the LU factors, At, and the per-body row
+    sums of Bt are kept, the system being assembled in column blocks
+    directly into the array which is then factored in place; this cuts the
+    storage from six to two dense N-by-N arrays.  If spill_dir is given in
+    lean mode, An, Bt, Bn are written to memory-mapped .npy files in that
+    directory as they are computed, rather than discarded.
+
+    For a single body with rotational symmetry, circulant may be True (to
+    detect the order of symmetry) or the order itself, in which case the
+    influence matrices are stored as block-circulant matrices (see
+    BlockCirculant) and each solve is done by FFT in O(N log N) operations.
+
+    If a MirrorPlane is given, the bodies are paired with their mirror
+    images (e.g. in a ground plane, or the other half of a symmetric
+    biplane), which are not discretized: the image panels enter the
+    influence matrices implicitly, so the system keeps its size N.  The
+    onset flow must then be parallel to the mirror plane.
+
+    If a pitch (px,py) is given, the bodies are the blades of a cascade:
+    an infinite row of copies offset by integer multiples of the pitch,
+    represented with the closed-form periodic panel kernel.  The onset flow
+    is then the vector mean of the flows far upstream and downstream, which
+    differ by the turning (and displacement) due to the row of blades.
+
+    The influence matrices are always dense here, since they are LU
+    factored.  For H-matrix storage, use KrylovHessSmithSystem with
+    operator='hmatrix', which solves the same system by GMRES.
+    '''
+    _block_size = 256   # Columns per block during blocked assembly
+
+    def __init__(self, bodies, lean = False, spill_dir = None,
+        circulant = False, mirror = None, pitch = None):
+        if (spill_dir is not None and not lean):
+            raise ValueError('Spilling matrices to disk requires lean mode')
+        if (mirror is not None and circulant is not False):
+            raise ValueError('Circulant mode does not support mirror planes')
+        if (pitch is not None and circulant is not False):
+            raise ValueError('Circulant mode does not support cascades')
+        self._pitch = pitch
+        self._mirror = mirror
+        self._lean = lean
+        self._circulant = circulant
+        self._spill_dir = spill_dir
+        self._setup_panels(bodies)
+        self._assemble()
+
+    @property
+    def At(self):
+        return self._At
+
+    @property
+    def An(self):
+        '''
+        Normal source influence matrix, or None if discarded in lean mode.
+        '''
+        return self._An
+
+    @property
+    def Bt(self):
+        '''
+        Tangential vortex influence matrix, or None if discarded in lean mode.
+        '''
+        return self._Bt
+
+    @property
+    def Bn(self):
+        '''
+        Normal vortex influence matrix, or None if discarded in lean mode.
+        '''
+        return self._Bn
+
+    def _influence_blocks(self, rows, cols):
+        '''
+        Return the blocks At,An,Bt,Bn of the tangential/normal source/vortex
+        influence matrices coupling the panel midpoints indexed by rows to
+        the panels indexed by cols (index arrays or slices).
+        '''
+        return influence_matrices_block(self._x1, self._y1, self._tx,
+            self._ty, self._nx, self._ny, self._edge, rows, cols,
+            self._mirror, self._pitch)
+
+    def _assemble(self):
+        '''
+        Compute tangential/normal source/vortex influence matrices and the
+        Hess-Smith matrix, and perform the LU factorization.
+        '''
+        N, Nb = self._N, self._Nb
+        if (self._circulant is not False):
+            return self._assemble_circulant()
+        # Allocate storage (Fortran order allows factorization in place)
+        A = np.zeros((N+Nb, N+Nb), order='F')
+        At = np.zeros((N,N), order='F')
+        if (not self._lean):
+            An, Bt, Bn = [np.zeros((N,N)) for i in range(3)]
+            block = N
+        elif (self._spill_dir is not None):
+            An, Bt, Bn = [disk_array((N,N), os.path.join(self._spill_dir,
+                name + '.npy')) for name in ['An','Bt','Bn']]
+            block = self._block_size
+        else:
+            An, Bt, Bn = None, None, None
+            block = self._block_size
+        self._assemble_blocks(A, At, An, Bt, Bn, block)
+        if (self._spill_dir is not None):
+            for M in [An, Bt, Bn]:
+                M.flush()
 
         # Store data for later usage
-        self._bodies = bodies
-        self._Nb = Nb
-        self._N = N
         self._At = At
         self._An = An
         self._Bt = Bt
         self._Bn = Bn
-        self._tx = tx
-        self._ty = ty
-        self._nx = nx
-        self._ny = ny
-        self._edge = edge
-        self._a = a
-        self._b = b
-        self._LU = sla.lu_factor(A)
+        self._LU = sla.lu_factor(A, overwrite_a=self._lean)
 
-    def solve(self, uinf):
+    def _assemble_circulant(self):
         '''
-        Return source strengths along each body and circulation per unit
-        length along each body.
+        Compute block-circulant influence matrices of a symmetric body.
+        '''
+        if (self._Nb != 1):
+            raise ValueError('Circulant mode requires a single body')
+        order = None if self._circulant is True else int(self._circulant)
+        (At,An,Bt,Bn) = circulant_influence_matrices_body(self._bodies[0],
+            order)
+        self._At = At
+        self._An = An
+        self._Bt = Bt
+        self._Bn = Bn
+        self._Bt_sum = Bt.row_sums()[:,None]
+        self._LU = None
+
+    def _assemble_blocks(self, A, At, An = None, Bt = None, Bn = None,
+        block = None):
+        '''
+        Fill the Hess-Smith matrix A and the influence matrices At, An, Bt,
+        Bn (the last three being optional) one block of columns at a time,
+        and compute the row sums of Bt over each body.  The arrays may be
+        memory maps, in which case only one block is held in RAM.
+        '''
+        N, Nb, a, b = self._N, self._Nb, self._a, self._b
+        body_index = np.repeat(np.arange(Nb), self._Ns)
+        if (block is None):
+            block = self._block_size
+        self._Bt_sum = np.zeros((N,Nb))  # Row sums of Bt over each body
+        Bn_sum = np.zeros((N,Nb))
+        kutta = np.zeros((Nb,N))
+        for j0 in range(0, N, block):
+            cols = slice(j0, min(j0+block, N))
+            (Atc,Anc,Btc,Bnc) = self._influence_blocks(slice(None), cols)
+            At[:,cols] = Atc
+            A[:N,cols] = Anc
+            kutta[:,cols] = Atc[a,:] + Atc[b,:]
+            for k in np.unique(body_index[cols]):
+                mask = (body_index[cols] == k)
+                self._Bt_sum[:,k] += np.sum(Btc[:,mask],1)
+                Bn_sum[:,k] += np.sum(Bnc[:,mask],1)
+            if (An is not None):
+                An[:,cols] = Anc
+            if (Bt is not None):
+                Bt[:,cols], Bn[:,cols] = Btc, Bnc
+        A[:N,N:] = Bn_sum
+        A[N:,:N] = kutta
+        A[N:,N:] = self._Bt_sum[a,:] + self._Bt_sum[b,:]
+
+    def rhs(self, uinf):
+        '''
+        Return the right-hand side of the Hess-Smith system for the given
+        onset flow.  The last Nb rows encode the Kutta condition of each
+        body; the remaining rows enforce flow tangency.
         '''
-        # Convenience variables
         N, Nb = self._N, self._Nb
         tx, ty, nx, ny = self._tx, self._ty, self._nx, self._ny
         a, b = self._a, self._b
-        # Construct right-hand side
+        if (self._mirror is not None):
+            self._mirror.check_onset(uinf)
         rhs = np.zeros(N + Nb)
         rhs[0:N] = -(uinf[0]*nx + uinf[1]*ny)
         for k in range(Nb):
             rhs[N+k] = -(uinf[0]*(tx[a[k]] + tx[b[k]]) +
                 uinf[1]*(ty[a[k]] + ty[b[k]]))
-        # Solve the system
-        soln = sla.lu_solve(self._LU, rhs)
-        # Extract source and circulation strenghts for each body
-        sigma = [soln[a[k]:b[k]+1] for k in range(Nb)]
-        gamma = soln[N:]
+        return rhs
+
+    def split(self, soln):
+        '''
+        Extract source and circulation strengths for each body from the
+        solution vector of the Hess-Smith system.
+        '''
+        a, b = self._a, self._b
+        sigma = [soln[a[k]:b[k]+1] for k in range(self._Nb)]
+        gamma = soln[self._N:]
         return (sigma, gamma)
 
+    def solve(self, uinf):
+        '''
+        Return source strengths along each body and circulation per unit
+        length along each body.
+        '''
+        rhs = self.rhs(uinf)
+        if (self._LU is None):
+            N = self._N
+            (sigma, gamma) = self._An.solve_bordered(self._Bn.row_sums(),
+                self._At.row(0) + self._At.row(N-1), self._Bt_sum[0,0] +
+                self._Bt_sum[-1,0], rhs[:N], rhs[N])
+            return self.split(np.append(sigma, gamma))
+        soln = sla.lu_solve(self._LU, rhs)
+        return self.split(soln)
+
     def flow_self(self, uinf, soln):
         '''
         Compute tangential flow at panel midpoints (normal flow is zero).
         '''
-        At, Bt, tx, ty = self._At, self._Bt, self._tx, self._ty
+        At, tx, ty = self._At, self._tx, self._ty
         a, b = self._a, self._b
         (sigma, gamma) = soln
         qt = uinf[0]*tx + uinf[1]*ty  # due to onset flow
-        qt += np.dot(At,np.concatenate(sigma))  # due to source terms
-        for k in range(self._Nb):  # due to circulation round each body
-            qt += gamma[k]*np.sum(Bt[:,a[k]:b[k]+1],1)
+        qt += At.dot(np.concatenate(sigma))  # due to source terms
+        qt += np.dot(self._Bt_sum,gamma)  # due to circulation round bodies
         return [qt[a[k]:b[k]+1] for k in range(self._Nb)]
 
-    def flow_external(self, uinf, soln, X, Y):
+    def _flow_external(self, uinf, soln, X, Y):
         '''
         Compute net flow U,V on mesh X,Y due to onset flow and all bodies.
         '''
         # Initialize to onset flow
         U,V = uinf[0]*np.ones(X.shape), uinf[1]*np.ones(Y.shape)
+        (u,v) = self.flow_bodies(soln, X, Y)
+        if (self._mirror is not None):
+            (ui,vi) = self._mirror.image_velocity(lambda X,Y:
+                self.flow_bodies(soln, X, Y), X, Y)
+            u, v = u + ui, v + vi
+        return U+u,V+v
+
+    def flow_bodies(self, soln, X, Y):
+        '''
+        Compute flow U,V on mesh X,Y due to the bodies alone (not their
+        mirror images, if any), including all blades of a cascade.
+        '''
+        U,V = np.zeros(X.shape), np.zeros(Y.shape)
         sigma, gamma = soln[0], soln[1]
         for k,body in enumerate(self._bodies):
             # Contribution from source distribution along bodies
-            u, v = velocity_source_body(body, sigma[k], X, Y)
+            u, v = velocity_source_body(body, sigma[k], X, Y, self._pitch)
             U += u
             V += v
             # Contribution from vorticity distribution along bodies
             u, v = velocity_vortex_body(body, gamma[k]*np.ones(body.nedge),
-                X, Y)
+                X, Y, self._pitch)
             U += u
             V += v
         return U,V
 
-    def pressure_self(self, uinf, soln):
-        '''
-        Compute pressure coefficient (via Bernoulli) around each body.
-        '''
-        qt = self.flow_self(uinf, soln)
-        return [1. - (qt[k]/nla.norm(uinf))**2 for k in range(self._Nb)]
-
-    def pressure_from_flow(self, uinf, soln, U, V):
-        '''
-        Compute field of pressure coefficients (via Bernoulli) from flow data.
-        '''
-        return 1. - (U**2 + V**2)/nla.norm(uinf)**2
-
-    def pressure(self, uinf, soln, X, Y):
-        '''
-        Compute pressure field on a mesh X,Y from solution.
-        '''
-        U,V = self.flow_external(uinf, soln, X, Y)
-        return self.pressure_from_flow(uinf, soln, U, V)
+    @property
+    def pitch(self):
+        return self._pitch
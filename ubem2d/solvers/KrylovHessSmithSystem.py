@@ -0,0 +1,251 @@
+from collections import namedtuple
+import os
+import numpy as np
+import scipy.linalg as sla
+import scipy.sparse.linalg as spla
+from ubem2d.geometry.ClusterTree import ClusterTree
+from ubem2d.panel.PanelInfluence import influence_hmatrices
+from ubem2d.panel.PanelTreecode import PanelTreecode
+from ubem2d.Errors import SolverError
+from ubem2d.util.disk_array import disk_array, blocked_dot
+from .HessSmithSystem import HessSmithSystem
+
+__all__ = ['KrylovHessSmithSystem']
+
+class KrylovHessSmithSystem(HessSmithSystem):
+    '''
+    This class solves the same Hess-Smith system as HessSmithSystem, but
+    with the preconditioned GMRES method instead of a dense LU factorization.
+    No dense matrix coupling all panels is ever formed: the product of the
+    Hess-Smith matrix with a vector is evaluated either with a treecode (see
+    PanelTreecode) or with hierarchical-matrix (H-matrix) compressions of
+    the influence matrices (see HMatrix).  The preconditioner is block-Jacobi,
+    built from the LU-factored self-influence system of each body, or, for
+    bodies of more than max_block panels, from the LU-factored diagonal
+    blocks of the leaves of a cluster tree over the body's panels.  The
+    method is intended for configurations of many bodies (cascades, schools
+    of foils) or for single bodies with tens of thousands of panels.
+
+    The treecode needs the least memory and setup time.  The H-matrix
+    operator costs more to build, but its matrix-vector products are faster,
+    so it pays off when many solves share one geometry.  In that case the
+    attributes _At and _An hold H-matrices rather than dense matrices.
+
+    For reference solutions too large for RAM even in lean mode, the 'disk'
+    operator assembles the Hess-Smith matrix and At in column blocks written
+    directly to memory-mapped files (A.npy, At.npy) in storage_dir, and
+    streams them from disk, a block of columns at a time, in each product.
+
+    Each solve is warm-started from the previous solution, if any.  The
+    iteration count and residual of the most recent solve are available via
+    the info property.
+    '''
+    def __init__(self, bodies, tol = 1.e-8, restart = 50, maxiter = 20,
+        warm_start = True, order = 24, eta = .5, leaf_size = 32,
+        operator = 'treecode', aca_tol = 1.e-10, max_block = 2000,
+        storage_dir = None):
+        '''
+        tol: relative residual at which the GMRES iteration is stopped
+        restart: number of GMRES iterations between restarts
+        maxiter: maximum number of restart cycles
+        warm_start: if True, start each solve from the previous solution
+        order, eta, leaf_size: treecode parameters (see PanelTreecode)
+        operator: 'treecode', 'hmatrix', or 'disk'
+        aca_tol: compression accuracy of the H-matrix blocks
+        max_block: largest body whose self-influence system is factored
+            whole by the preconditioner
+        storage_dir: directory of the matrix files of the 'disk' operator
+        '''
+        if (operator not in ['treecode', 'hmatrix', 'disk']):
+            raise ValueError('Unknown operator: {}'.format(operator))
+        if ((operator == 'disk') != (storage_dir is not None)):
+            raise ValueError('A storage directory is required by, and only '
+                'by, the disk operator')
+        self._storage_dir = storage_dir
+        self._operator = operator
+        self._aca_tol = aca_tol
+        self._max_block = max_block
+        self._tol = tol
+        self._restart = restart
+        self._maxiter = maxiter
+        self._warm_start = warm_start
+        self._order = order
+        self._eta = eta
+        self._leaf_size = leaf_size
+        self._x0 = None
+        self._info = None
+        super().__init__(bodies)
+
+    @property
+    def info(self):
+        '''
+        Named tuple (iterations, residual, converged) describing the most
+        recent solve, where residual is the relative residual norm.
+        '''
+        return self._info
+
+    def _assemble(self):
+        '''
+        Build the treecode or H-matrices, and the block-Jacobi preconditioner.
+        '''
+        N, Nb, a, b = self._N, self._Nb, self._a, self._b
+        self._body_index = np.repeat(np.arange(Nb), self._Ns)
+        # Kutta rows of the Hess-Smith matrix, computed exactly
+        rows = np.concatenate([a, b])
+        (At,An,Bt,Bn) = self._influence_blocks(rows, slice(None))
+        self._kutta = np.zeros((Nb, N+Nb))
+        for k in range(Nb):
+            self._kutta[k,:N] = At[k,:] + At[Nb+k,:]
+            for j in range(Nb):
+                self._kutta[k,N+j] = Bt[k,a[j]:b[j]+1].sum() + \
+                    Bt[Nb+k,a[j]:b[j]+1].sum()
+        if (self._operator == 'treecode'):
+            self._tree = PanelTreecode(self._x1, self._y1, self._tx,
+                self._ty, self._edge, self._order, self._eta, self._leaf_size)
+        elif (self._operator == 'disk'):
+            A = disk_array((N+Nb,N+Nb), os.path.join(self._storage_dir,
+                'A.npy'))
+            At = disk_array((N,N), os.path.join(self._storage_dir, 'At.npy'))
+            self._assemble_blocks(A, At)
+            A.flush()
+            At.flush()
+            self._A_disk, self._At = A, At
+        else:
+            (At,An,Bt,Bn) = influence_hmatrices(self._x1, self._y1, self._tx,
+                self._ty, self._nx, self._ny, self._edge, self._eta,
+                self._aca_tol, self._leaf_size)
+            self._At, self._An = At, An
+            # Vortex matrices enter only via sums over each body's panels
+            self._Bt_sum = np.zeros((N, Nb))
+            self._Bn_sum = np.zeros((N, Nb))
+            for k in range(Nb):
+                ek = (self._body_index == k).astype(float)
+                self._Bt_sum[:,k] = Bt.dot(ek)
+                self._Bn_sum[:,k] = Bn.dot(ek)
+        # Factor the self-influence system of each body, or of each leaf
+        self._blocks = Nb*[None]
+        for k in range(Nb):
+            if (self._Ns[k] <= self._max_block):
+                cols = slice(a[k], b[k]+1)
+                (At,An,Bt,Bn) = self._influence_blocks(cols, cols)
+                Ak = np.zeros((self._Ns[k]+1, self._Ns[k]+1))
+                Ak[:-1,:-1] = An
+                Ak[:-1,-1] = np.sum(Bn,1)
+                Ak[-1,:-1] = At[0,:] + At[-1,:]
+                Ak[-1,-1] = Bt[0,:].sum() + Bt[-1,:].sum()
+                self._blocks[k] = sla.lu_factor(Ak)
+            else:
+                tree = ClusterTree(self._xmid[a[k]:b[k]+1],
+                    self._ymid[a[k]:b[k]+1], self._leaf_size)
+                leaves = []
+                for leaf in tree.leaves():
+                    I = a[k] + tree.indices(leaf)
+                    An = self._influence_blocks(I, I)[1]
+                    leaves.append((I, sla.lu_factor(An)))
+                self._blocks[k] = [leaves, self._kutta[k,N+k]]
+        n = N + Nb
+        self._A = spla.LinearOperator((n,n), matvec=self.matvec,
+            dtype=float)
+        self._M = spla.LinearOperator((n,n), matvec=self.precondition,
+            dtype=float)
+
+    def flow_panels(self, sigma, gamma):
+        '''
+        Return the tangential and normal flow at the panel midpoints due to
+        source strengths sigma along each panel and vortex strengths gamma
+        along each body.
+        '''
+        if (self._operator == 'hmatrix'):
+            return (self._At.dot(sigma) + self._Bt_sum.dot(gamma),
+                self._An.dot(sigma) + self._Bn_sum.dot(gamma))
+        if (self._operator == 'disk'):
+            x = np.concatenate([sigma, gamma])
+            return (blocked_dot(self._At, sigma, self._block_size) +
+                self._Bt_sum.dot(gamma),
+                blocked_dot(self._A_disk, x, self._block_size)[:self._N])
+        gamma = np.asarray(gamma)[self._body_index]
+        (u,v) = self._tree.velocity(sigma, gamma)
+        # Panel self-influences (based on hand computation)
+        qt = u*self._tx + v*self._ty + .5*gamma
+        qn = u*self._nx + v*self._ny + .5*sigma
+        return (qt, qn)
+
+    def matvec(self, x):
+        '''
+        Return the product of the Hess-Smith matrix with the vector x.
+        '''
+        x = np.ravel(x)
+        N = self._N
+        if (self._operator == 'disk'):
+            return blocked_dot(self._A_disk, x, self._block_size)
+        if (self._operator == 'hmatrix'):
+            qn = self._An.dot(x[:N]) + self._Bn_sum.dot(x[N:])
+        else:
+            (qt,qn) = self.flow_panels(x[:N], x[N:])
+        return np.concatenate([qn, self._kutta.dot(x)])
+
+    def precondition(self, x):
+        '''
+        Apply the block-Jacobi preconditioner to the vector x.
+        '''
+        x = np.ravel(x)
+        N, a, b = self._N, self._a, self._b
+        y = np.zeros(x.shape)
+        for k in range(self._Nb):
+            if (type(self._blocks[k]) is list):
+                (leaves, d) = self._blocks[k]
+                for (I,lu) in leaves:
+                    y[I] = sla.lu_solve(lu, x[I])
+                y[N+k] = x[N+k]/d
+                continue
+            xk = np.append(x[a[k]:b[k]+1], x[N+k])
+            yk = sla.lu_solve(self._blocks[k], xk)
+            y[a[k]:b[k]+1], y[N+k] = yk[:-1], yk[-1]
+        return y
+
+    def solve(self, uinf, x0 = None):
+        '''
+        Return source strengths along each body and circulation per unit
+        length along each body.  The iteration starts from x0 if given,
+        otherwise from the previous solution if warm starts are enabled.
+        '''
+        rhs = self.rhs(uinf)
+        if (x0 is None and self._warm_start):
+            x0 = self._x0
+        elif (x0 is not None):
+            x0 = np.concatenate([np.concatenate(x0[0]), x0[1]])
+        iters = [0]
+        def count(pr_norm):
+            iters[0] += 1
+        soln, status = spla.gmres(self._A, rhs, x0=x0, rtol=self._tol,
+            restart=self._restart, maxiter=self._maxiter, M=self._M,
+            callback=count, callback_type='pr_norm')
+        residual = np.linalg.norm(rhs - self.matvec(soln))/np.linalg.norm(rhs)
+        self._info = namedtuple('info','iterations,residual,converged')(
+            iters[0], residual, status == 0)
+        if (status != 0):
+            raise SolverError('GMRES failed to converge: residual {}'.format(
+                residual))
+        self._x0 = soln
+        return self.split(soln)
+
+    def flow_self(self, uinf, soln):
+        '''
+        Compute tangential flow at panel midpoints (normal flow is zero).
+        '''
+        (sigma, gamma) = soln
+        (qt,qn) = self.flow_panels(np.concatenate(sigma), gamma)
+        qt += uinf[0]*self._tx + uinf[1]*self._ty
+        a, b = self._a, self._b
+        return [qt[a[k]:b[k]+1] for k in range(self._Nb)]
+
+    def _flow_external(self, uinf, soln, X, Y):
+        '''
+        Compute net flow U,V on mesh X,Y due to onset flow and all bodies.
+        '''
+        if (self._operator != 'treecode'):
+            return super()._flow_external(uinf, soln, X, Y)
+        (sigma, gamma) = soln
+        gamma = np.asarray(gamma)[self._body_index]
+        (U,V) = self._tree.velocity(np.concatenate(sigma), gamma, X, Y)
+        return (U + uinf[0], V + uinf[1])
@@ -0,0 +1,124 @@
+import numpy as np
+import scipy.linalg as sla
+from ubem2d.panel.LinearVortexInfluence import linear_vortex_influence_matrices
+from ubem2d.panel.LinearVortexInfluence import \
+    velocity_linear_vortex_panel_matrices
+from .PanelSystem import PanelSystem
+
+__all__ = ['LinearVortexSystem']
+
+class LinearVortexSystem(PanelSystem):
+    '''
+    This class assembles and LU-factors the linear-strength vortex panel
+    system for the steady flow past one or more bodies, and evaluates the
+    resulting flow.  The vortex strength is continuous along each body and
+    linear on each panel, so a body of n panels has n+1 unknown corner
+    strengths: flow tangency at the n panel midpoints is supplemented by the
+    Kutta condition gamma[0] + gamma[n] = 0, i.e. equal speeds leaving the
+    upper and lower trailing-edge surfaces.
+
+    Because the strength is second-order accurate along the surface, lift
+    and moment converge with several times fewer panels than in the
+    Hess-Smith method (see HessSmithSystem), which shrinks the dense
+    factorization cubically.
+    '''
+    def __init__(self, bodies):
+        self._setup_panels(bodies)
+        self._assemble()
+
+    @property
+    def Ct(self):
+        '''
+        Tangential influence matrix of the corner strengths at the midpoints.
+        '''
+        return self._Ct
+
+    @property
+    def Cn(self):
+        '''
+        Normal influence matrix of the corner strengths at the midpoints.
+        '''
+        return self._Cn
+
+    def _setup_panels(self, bodies):
+        '''
+        Order panel data as in PanelSystem, and number the corners of each
+        body (one more than its panels).
+        '''
+        super()._setup_panels(bodies)
+        # Corner k of body j has index k + cumulative corners of bodies < j
+        self._c = np.concatenate([[0], np.cumsum(self._Ns + 1)[:-1]])
+        first = np.concatenate([self._c[k] + np.arange(self._Ns[k])
+            for k in range(self._Nb)])
+        self._nodes = (first, first + 1)
+
+    def _assemble(self):
+        '''
+        Compute the influence matrices and the system matrix, and perform
+        the LU factorization.
+        '''
+        N, Nb, c = self._N, self._Nb, self._c
+        (Ct,Cn) = linear_vortex_influence_matrices(self._x1, self._y1,
+            self._tx, self._ty, self._nx, self._ny, self._edge, self._nodes)
+        A = np.zeros((N+Nb, N+Nb))
+        A[:N,:] = Cn
+        for k in range(Nb):
+            A[N+k, c[k]] = 1.
+            A[N+k, c[k] + self._Ns[k]] = 1.
+        self._Ct = Ct
+        self._Cn = Cn
+        self._LU = sla.lu_factor(A)
+
+    def rhs(self, uinf):
+        '''
+        Return the right-hand side of the system for the given onset flow.
+        The last Nb rows encode the Kutta condition of each body; the
+        remaining rows enforce flow tangency.
+        '''
+        rhs = np.zeros(self._N + self._Nb)
+        rhs[:self._N] = -(uinf[0]*self._nx + uinf[1]*self._ny)
+        return rhs
+
+    def split(self, soln):
+        '''
+        Extract the corner vortex strengths of each body from the solution
+        vector of the system.
+        '''
+        c, Ns = self._c, self._Ns
+        return [soln[c[k]:c[k]+Ns[k]+1] for k in range(self._Nb)]
+
+    def solve(self, uinf):
+        '''
+        Return the vortex strengths at the corners of each body.
+        '''
+        return self.split(sla.lu_solve(self._LU, self.rhs(uinf)))
+
+    def circulation(self, soln):
+        '''
+        Return the circulation round each body.
+        '''
+        circ = []
+        for (body, gamma) in zip(self._bodies, soln):
+            circ.append(np.sum(.5*(gamma[:-1] + gamma[1:])*body.edge))
+        return np.array(circ)
+
+    def flow_self(self, uinf, soln):
+        '''
+        Compute tangential flow at panel midpoints (normal flow is zero).
+        '''
+        a, b = self._a, self._b
+        qt = uinf[0]*self._tx + uinf[1]*self._ty
+        qt += self._Ct.dot(np.concatenate(soln))
+        return [qt[a[k]:b[k]+1] for k in range(self._Nb)]
+
+    def _flow_external(self, uinf, soln, X, Y):
+        '''
+        Compute net flow U,V on mesh X,Y due to onset flow and all bodies.
+        '''
+        (Wa,Wb) = velocity_linear_vortex_panel_matrices(self._x1, self._y1,
+            self._tx, self._ty, self._edge, X, Y)
+        gamma = np.concatenate(soln)
+        W = Wa.dot(gamma[self._nodes[0]]) + Wb.dot(gamma[self._nodes[1]])
+        U = uinf[0] + W.real.reshape(X.shape)
+        V = uinf[1] - W.imag.reshape(Y.shape)
+        return U,V
@@ -0,0 +1,182 @@
+from collections import namedtuple
+import numpy as np
+import numpy.linalg as nla
+import scipy.sparse.linalg as spla
+from ubem2d.Errors import SolverError
+from ubem2d.panel.DoubletInfluence import panel_side
+from ubem2d.panel.DoubletInfluence import potential_panel_matrices
+from ubem2d.panel.DoubletInfluence import potential_doublet_wake
+from ubem2d.panel.DoubletInfluence import velocity_doublet_panel_matrices
+from .PanelSystem import PanelSystem
+
+__all__ = ['MorinoSystem']
+
+class MorinoSystem(PanelSystem):
+    '''
+    This class implements the potential-based (Morino) panel method for the
+    steady flow past one or more bodies: constant-strength doublets and
+    sources on each panel, with the perturbation potential set to zero
+    inside each body (a Dirichlet condition at the panel midpoints).  The
+    sources are then known, sigma = -uinf.n, and the doublet strengths are
+    the surface perturbation potential itself.  Each body sheds a
+    semi-infinite wake of constant doublet strength along its trailing-edge
+    bisector, equal to the jump in surface potential across the trailing
+    edge (the Kutta condition); the surface potential on either side is
+    extrapolated linearly to the trailing edge from the two nearest
+    midpoints.
+
+    The doublet influence matrix is one half the identity plus a compact
+    operator (a second-kind system), so GMRES converges in a number of
+    iterations nearly independent of the number of panels.
+    '''
+    def __init__(self, bodies, tol = 1.e-10, restart = 50, maxiter = 200):
+        self._tol = tol
+        self._restart = restart
+        self._maxiter = maxiter
+        self._info = None
+        self._setup_panels(bodies)
+        self._assemble()
+
+    @property
+    def info(self):
+        '''
+        Named tuple (iterations, residual, converged) describing the most
+        recent solve, where residual is the relative residual norm.
+        '''
+        return self._info
+
+    def _setup_panels(self, bodies):
+        '''
+        Order panel data as in PanelSystem. Then compute the side of each
+        panel and the wake of each body.
+        '''
+        super()._setup_panels(bodies)
+        self._side = panel_side(self._tx, self._ty, self._nx, self._ny)
+        # Wakes leave the first corner along the trailing-edge bisector, with
+        # the first panel's side of the wake taken as its positive side
+        a, b = self._a, self._b
+        self._wx, self._wy = self._x1[a], self._y1[a]
+        dx, dy = self._tx[b] - self._tx[a], self._ty[b] - self._ty[a]
+        d = np.hypot(dx, dy)
+        self._wdx, self._wdy = dx/d, dy/d
+        self._wside = np.sign(self._wdx*(self._ymid[a] - self._wy) -
+            self._wdy*(self._xmid[a] - self._wx))
+        # Wake strengths are wake.dot(mu), wake having rows of four entries
+        e = self._edge
+        ra, rb = e[a]/(e[a] + e[a+1]), e[b]/(e[b] + e[b-1])
+        self._wake = np.zeros((self._Nb, self._N))
+        for k in range(self._Nb):
+            self._wake[k, [a[k], a[k]+1, b[k], b[k]-1]] = [1 + ra[k],
+                -ra[k], -1 - rb[k], rb[k]]
+
+    def _assemble(self):
+        '''
+        Compute the doublet and source potential influence matrices at the
+        interior limits of the panel midpoints, and the system matrix.
+        '''
+        (C,B) = potential_panel_matrices(self._x1, self._y1, self._tx,
+            self._ty, self._edge, self._side, self._xmid, self._ymid, True)
+        for k in range(self._Nb):
+            Cw = potential_doublet_wake(self._wx[k], self._wy[k],
+                self._wdx[k], self._wdy[k], self._wside[k], self._xmid,
+                self._ymid)
+            C += np.outer(Cw, self._wake[k])
+        self._A = C
+        self._B = B
+
+    def sources(self, uinf):
+        '''
+        Return the source strengths, which are fixed by the onset flow.
+        '''
+        return -(uinf[0]*self._nx + uinf[1]*self._ny)
+
+    def rhs(self, uinf):
+        '''
+        Return the right-hand side of the system for the given onset flow.
+        '''
+        return -self._B.dot(self.sources(uinf))
+
+    def split(self, soln):
+        '''
+        Extract the doublet strengths of each body from a solution vector.
+        '''
+        a, b = self._a, self._b
+        return [soln[a[k]:b[k]+1] for k in range(self._Nb)]
+
+    def solve(self, uinf, mu0 = None):
+        '''
+        Return the doublet strengths (surface perturbation potential) along
+        each body, found by GMRES starting from mu0 if given.
+        '''
+        count = [0]
+        def callback(res):
+            count[0] += 1
+        x0 = None if mu0 is None else np.concatenate(mu0)
+        rhs = self.rhs(uinf)
+        mu, status = spla.gmres(self._A, rhs, x0=x0, rtol=self._tol, atol=0.,
+            restart=self._restart, maxiter=self._maxiter, callback=callback,
+            callback_type='pr_norm')
+        residual = nla.norm(rhs - self._A.dot(mu))/nla.norm(rhs)
+        self._info = namedtuple('info','iterations,residual,converged')(
+            count[0], residual, status == 0)
+        if (status != 0):
+            raise SolverError('GMRES failed to converge: residual {}'.format(
+                residual))
+        return self.split(mu)
+
+    def circulation(self, soln):
+        '''
+        Return the (counterclockwise) circulation round each body, which is
+        the jump in potential across its wake.
+        '''
+        return -self._wside*self._wake.dot(np.concatenate(soln))
+
+    def potential_self(self, uinf, soln):
+        '''
+        Return the total velocity potential at the panel midpoints of each
+        body (onset flow plus perturbation).
+        '''
+        a, b = self._a, self._b
+        phi = uinf[0]*self._xmid + uinf[1]*self._ymid
+        return [phi[a[k]:b[k]+1] + soln[k] for k in range(self._Nb)]
+
+    def flow_self(self, uinf, soln):
+        '''
+        Compute tangential flow at panel midpoints (normal flow is zero),
+        by differentiating the surface potential along each body.
+        '''
+        qt = []
+        for k,body in enumerate(self._bodies):
+            s = np.cumsum(body.edge) - .5*body.edge
+            qt.append(uinf[0]*body.tx + uinf[1]*body.ty +
+                np.gradient(soln[k], s, edge_order=2))
+        return qt
+
+    def _flow_external(self, uinf, soln, X, Y):
+        '''
+        Compute net flow U,V on mesh X,Y due to onset flow and all bodies.
+        '''
+        (Wd,Ws) = velocity_doublet_panel_matrices(self._x1, self._y1,
+            self._tx, self._ty, self._edge, self._side, X, Y)
+        mu = np.concatenate(soln)
+        W = Wd.dot(mu) + Ws.dot(self.sources(uinf))
+        W = W.reshape(X.shape)
+        # Wakes act as point vortices at the trailing edges
+        Z = X + 1j*Y
+        for (k,G) in enumerate(self.circulation(soln)):
+            W += -.5j*G/np.pi/(Z - (self._wx[k] + 1j*self._wy[k]))
+        return uinf[0] + W.real, uinf[1] - W.imag
+
+    def potential(self, uinf, soln, X, Y):
+        '''
+        Compute the total velocity potential on mesh X,Y.  The potential is
+        discontinuous across the wakes.
+        '''
+        (C,B) = potential_panel_matrices(self._x1, self._y1, self._tx,
+            self._ty, self._edge, self._side, X, Y)
+        mu = np.concatenate(soln)
+        phi = C.dot(mu) + B.dot(self.sources(uinf))
+        for (k,mu_w) in enumerate(self._wake.dot(mu)):
+            phi += mu_w*potential_doublet_wake(self._wx[k], self._wy[k],
+                self._wdx[k], self._wdy[k], self._wside[k], X, Y).ravel()
+        return uinf[0]*X + uinf[1]*Y + phi.reshape(X.shape)
@@ -0,0 +1,74 @@
+import numpy as np
+import numpy.linalg as nla
+from ubem2d.util.tiled_field import evaluate_tiled
+
+__all__ = ['PanelSystem']
+
+class PanelSystem:
+    '''
+    This class holds what the steady panel methods share: the panel data of
+    one or more bodies, ordered from the first body through the last; the
+    evaluation of the flow on a mesh, masked or in tiles; and the pressure
+    coefficients (via Bernoulli).  A subclass assembles and solves its
+    system, and provides flow_self and _flow_external, the flow at every
+    point of a mesh.
+    '''
+    def _setup_panels(self, bodies):
+        '''
+        Order panel data from the first body through the last body. Then
+        compute start/end indices for each body.
+        '''
+        if (type(bodies) not in [list,tuple]):
+            bodies = [bodies]
+        Ns = [len(body) for body in bodies]
+        self._bodies = bodies
+        self._Nb = len(bodies)
+        self._N = sum(Ns)  # Total number of panels across all bodies
+        self._Ns = np.array(Ns)
+        self._x1 = np.concatenate([body.x[:-1] for body in bodies])
+        self._y1 = np.concatenate([body.y[:-1] for body in bodies])
+        self._tx = np.concatenate([body.tx for body in bodies])
+        self._ty = np.concatenate([body.ty for body in bodies])
+        self._nx = np.concatenate([body.nx for body in bodies])
+        self._ny = np.concatenate([body.ny for body in bodies])
+        self._edge = np.concatenate([body.edge for body in bodies])
+        self._xmid = np.concatenate([body.xmid for body in bodies])
+        self._ymid = np.concatenate([body.ymid for body in bodies])
+        self._a = np.concatenate([[0], np.cumsum(Ns)[:-1]]) # start indices
+        self._b = np.cumsum(Ns) - 1                         # end indices
+
+    def flow_external(self, uinf, soln, X, Y, mask = None, tile = None,
+        workers = None):
+        '''
+        Compute net flow U,V on mesh X,Y due to onset flow and all bodies.
+        If a boolean mask of the shape of X is given (e.g. exterior(bodies,
+        X,Y)), the flow is computed only where it is True, and is NaN
+        elsewhere.  If a tile size is given, the mesh is evaluated in tiles
+        of about that many points on workers threads (see evaluate_tiled).
+        '''
+        if (mask is None and tile is None):
+            return self._flow_external(uinf, soln, X, Y)
+        return evaluate_tiled(lambda X,Y: self._flow_external(uinf, soln, X,
+            Y), X, Y, mask, tile, workers)
+
+    def pressure_self(self, uinf, soln):
+        '''
+        Compute pressure coefficient (via Bernoulli) around each body.
+        '''
+        qt = self.flow_self(uinf, soln)
+        return [1. - (qt[k]/nla.norm(uinf))**2 for k in range(self._Nb)]
+
+    def pressure_from_flow(self, uinf, soln, U, V):
+        '''
+        Compute field of pressure coefficients (via Bernoulli) from flow data.
+        '''
+        return 1. - (U**2 + V**2)/nla.norm(uinf)**2
+
+    def pressure(self, uinf, soln, X, Y, mask = None, tile = None,
+        workers = None):
+        '''
+        Compute pressure field on a mesh X,Y from solution (NaN where a
+        given mask is False; see flow_external for the other arguments).
+        '''
+        U,V = self.flow_external(uinf, soln, X, Y, mask, tile, workers)
+        return self.pressure_from_flow(uinf, soln, U, V)
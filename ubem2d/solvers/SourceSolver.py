@@ -2,10 +2,11 @@ from collections import namedtuple
 import numpy as np
 import numpy.linalg as nla
 from ubem2d.panel.PanelInfluence import source_influence_matrices
+from ubem2d.panel.BodyInfluence import circulant_influence_matrices_body
 
 __all__ = ['solve_source_body']
 
-def solve_source_body(Uinf, body, At = None, An = None):
+def solve_source_body(Uinf, body, At = None, An = None, circulant = False):
     '''
     Solve for the steady flow past a body using the source panel method.
 
@@ -23,16 +24,28 @@ def solve_source_body(Uinf, body, At = None, An = None):
     qn: the net normal flow speed at panel midpoints
     At: the tangential influence matrix
     An: the normal influence matrix
+
+    If circulant is True, or is the order of the body's rotational symmetry
+    (e.g. nedge for a CircularCylinder), the influence matrices are built
+    and returned as block-circulant matrices (see BlockCirculant), and the
+    system is solved by FFT in O(N log N) operations.  True detects the
+    order of symmetry.
     '''
     # Check if influence matrices are provided; create them if not
     if ((At is None and An is not None) or (At is not None and An is None)):
         raise ValueError('Must specify zero or two influence matrices')
-    if (An is None or At is None):
+    if ((An is None or At is None) and circulant is not False):
+        order = None if circulant is True else int(circulant)
+        (At,An) = circulant_influence_matrices_body(body, order)[0:2]
+    elif (An is None or At is None):
         (At,An) = source_influence_matrices(body.x[:-1],body.y[:-1],
             body.tx, body.ty, body.nx, body.ny, body.edge)
 
     rhs = -(Uinf[0]*body.nx + Uinf[1]*body.ny)
-    sigma = nla.solve(An,rhs)
+    if (hasattr(An, 'solve')):
+        sigma = An.solve(rhs)
+    else:
+        sigma = nla.solve(An,rhs)
     qt = At.dot(sigma) + Uinf[0]*body.tx + Uinf[1]*body.ty
     qn = An.dot(sigma) + Uinf[0]*body.nx + Uinf[1]*body.ny
     cp = 1. - (qt/nla.norm(Uinf))**2
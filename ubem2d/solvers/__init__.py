@@ -1,4 +1,9 @@
 from ubem2d.solvers.SourceSolver import *
+from ubem2d.solvers.PanelSystem import *
 from ubem2d.solvers.HessSmithSolver import *
 from ubem2d.solvers.HessSmithSystem import *
+from ubem2d.solvers.KrylovHessSmithSystem import *
+from ubem2d.solvers.LinearVortexSystem import *
+from ubem2d.solvers.MorinoSystem import *
 from ubem2d.solvers.BasuHancockSolver import *
+from ubem2d.solvers.FieldCache import *
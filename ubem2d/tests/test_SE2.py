@@ -2,7 +2,8 @@ import unittest
 import math
 import numpy as np
 import random as rd
-from ubem2d.motion.SE2 import SE2 
+from ubem2d.motion.SE2 import SE2
+import ubem2d as ubem
 
 class test_SE2(unittest.TestCase):
     def random(self):
@@ -148,5 +149,79 @@ class test_SE2(unittest.TestCase):
             self.assertAlmostEqual(h1.x, h2.x)
             self.assertAlmostEqual(h1.y, h2.y)
     
+class test_SE2Array(unittest.TestCase):
+    def random(self, shape):
+        return ubem.SE2Array(np.random.rand(*shape), np.random.rand(*shape),
+            np.random.rand(*shape))
+
+    def test_agrees_with_SE2(self):
+        g, h = self.random((6,)), self.random((6,))
+        x, y = np.random.rand(5), np.random.rand(5)
+        gh, ginv = g*h, g.inv()
+        (X,Y) = g.map_point(x, y, .3, -.2)
+        self.assertEqual(X.shape, (6,5))
+        for i in range(6):
+            self.assertEqual(gh[i], g[i]*h[i])
+            self.assertEqual(ginv[i], g[i].inv())
+            self.assertTrue(np.allclose(g.mat()[i], g[i].mat()))
+            (xi,yi) = g[i].map_point(x, y, .3, -.2)
+            self.assertTrue(np.allclose(X[i], xi) and np.allclose(Y[i], yi))
+        # Mixed products with single elements broadcast
+        self.assertEqual((g[2]*h)[4], g[2]*h[4])
+        self.assertEqual((g*h[1])[3], g[3]*h[1])
+        # Updates between successive samples compose to the trajectory
+        steps = g.steps()
+        for i in range(1, 6):
+            k = steps[i-1]*g[i-1]
+            self.assertAlmostEqual(k.theta, g[i].theta)
+            self.assertAlmostEqual(k.x, g[i].x)
+            self.assertAlmostEqual(k.y, g[i].y)
+
+    def test_batches(self):
+        # Motions of three bodies at four times, each body with its points
+        g = self.random((4,3))
+        x, y = np.random.rand(3,7), np.random.rand(3,7)
+        (X,Y) = g.map_point(x, y)
+        self.assertEqual(X.shape, (4,3,7))
+        (u,v) = g[2,1].map_vector(x[1], y[1])
+        self.assertTrue(np.allclose(g.map_vector(x, y)[0][2,1], u))
+        self.assertEqual(ubem.SE2Array.from_list(list(g[:,0])), g[:,0])
+
+    def test_rigid_motion(self):
+        motion = ubem.RigidMotion(lambda t: t, np.cos, np.sin)
+        t = np.linspace(0, 1, 11)
+        g = motion(t)
+        self.assertIsInstance(g, ubem.SE2Array)
+        self.assertEqual(len(g), 11)
+        self.assertEqual(motion(.3), SE2(.3, math.cos(.3), math.sin(.3)))
+        body = ubem.naca4('0012', 20)
+        (X,Y) = body.trajectory(g, 0, 0)
+        for i in [0,5,10]:
+            moved = ubem.naca4('0012', 20).glide(g[i], 0, 0)
+            self.assertTrue(np.allclose(X[i], moved.x))
+            self.assertTrue(np.allclose(Y[i], moved.y))
+        moved = ubem.naca4('0012', 20).glide(ubem.SE2Array(.1, 1, 2))
+        self.assertTrue(np.allclose(moved.x, ubem.naca4('0012', 20).glide(
+            SE2(.1, 1, 2)).x))
+        with self.assertRaises(ValueError):
+            body.glide(g)
+
+class test_glide(unittest.TestCase):
+    def test_rigid_update(self):
+        # Cached panel data moved rigidly agree with those recomputed from
+        # the moved corners
+        moved = ubem.naca4('2412', 60)
+        for i in range(50):
+            moved.pitch(.03, .25).heave(.01)
+        fresh = ubem.Airfoil(moved.x.copy(), moved.y.copy(), moved.le)
+        for attr in ['tx','ty','nx','ny','edge','xmid','ymid','theta','beta',
+            'perimeter']:
+            self.assertTrue(np.allclose(getattr(moved, attr),
+                getattr(fresh, attr), rtol=0, atol=1.e-13), attr)
+        # Non-rigid changes still recompute everything
+        moved.scale(2.)
+        self.assertAlmostEqual(moved.perimeter, 2*fresh.perimeter)
+        self.assertTrue(np.allclose(moved.nx, fresh.nx))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import ubem2d as ubem
+
+class test_airfoil_database(unittest.TestCase):
+    def write_files(self, directory, foils):
+        '''
+        Write the airfoils alternately in the Selig and Lednicer formats.
+        '''
+        for (k,foil) in enumerate(foils):
+            (x,y,le) = foil.x, foil.y, foil.le
+            with open(os.path.join(directory, 'foil{}.dat'.format(k)),
+                'w') as fid:
+                fid.write('Airfoil {}\n'.format(k))
+                if (k%2 == 0):
+                    np.savetxt(fid, np.c_[x,y])
+                else:
+                    fid.write('{}. {}.\n\n'.format(le + 1, len(x) - le))
+                    np.savetxt(fid, np.c_[x[le::-1],y[le::-1]])
+                    fid.write('\n')
+                    np.savetxt(fid, np.c_[x[le:],y[le:]])
+
+    def test_build_and_open(self):
+        foils = list(ubem.naca_batch(['0012','23012','2412','4415'],
+            [60,61,80,81]))
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, 'coords')
+            os.mkdir(src)
+            self.write_files(src, foils)
+            with open(os.path.join(src, 'junk.dat'), 'w') as fid:
+                fid.write('Not an airfoil\n')
+            db = ubem.AirfoilDatabase.build(os.path.join(tmp, 'db'), src)
+            self.assertEqual(len(db), 4)
+            self.assertFalse('junk' in db)
+            db = ubem.AirfoilDatabase(os.path.join(tmp, 'db'))
+            for (k,foil) in enumerate(foils):
+                opened = db['foil{}'.format(k)]
+                self.assertEqual(opened.le, foil.le)
+                self.assertTrue(np.allclose(opened.x, foil.x, atol=1.e-15))
+                self.assertTrue(np.allclose(opened.y, foil.y, atol=1.e-15))
+                self.assertEqual(db.titles[k], 'Airfoil {}'.format(k))
+            # Corners are views of the memory maps
+            (x,y) = db.corners(2)
+            self.assertFalse(x.flags.owndata)
+            self.assertFalse(x.flags.writeable)
+            batch = db.batch(['foil3','foil1'])
+            self.assertEqual(list(batch.npan), [81,61])
+            with self.assertRaises(KeyError):
+                db['foil9']
+            del db, batch, x, y, opened
+
+    def test_load_from_file(self):
+        foil = ubem.naca4('2412', 41)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'foil.txt')
+            foil.export_to_file(path)
+            loaded = ubem.Airfoil.load_from_file(path)
+        self.assertTrue(np.array_equal(loaded.x, foil.x))
+        self.assertTrue(np.array_equal(loaded.y, foil.y))
+        self.assertEqual(loaded.le, foil.le)
@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+import ubem2d as ubem
+
+def brute_force_diameter(x, y):
+    d = np.hypot(x[:,None] - x[None,:], y[:,None] - y[None,:])
+    return d.max()
+
+class test_convex_hull(unittest.TestCase):
+    def test_hull(self):
+        x = np.array([0, 1, 1, 0, .5, .5, 1, 0, .5])
+        y = np.array([0, 0, 1, 1, .5, 0, 1, 0, 1])
+        self.assertEqual(list(ubem.convex_hull(x, y)), [0, 1, 2, 3])
+        # Degenerate point sets
+        self.assertEqual(len(ubem.convex_hull([0, 1, 2], [0, 1, 2])), 2)
+        self.assertEqual(len(ubem.convex_hull([1, 1], [2, 2])), 1)
+
+    def test_diameter(self):
+        rng = np.random.default_rng(3)
+        for n in [2, 3, 10, 200]:
+            x, y = rng.standard_normal(n), rng.standard_normal(n)
+            (d,i,j) = ubem.hull_diameter(x, y)
+            self.assertAlmostEqual(d, brute_force_diameter(x, y), places=14)
+            self.assertAlmostEqual(d, np.hypot(x[i] - x[j], y[i] - y[j]),
+                places=14)
+        # Points on a circle, a line, and a single point
+        t = np.linspace(0, 2*np.pi, 101)
+        self.assertAlmostEqual(ubem.hull_diameter(np.cos(t), np.sin(t))[0],
+            2., places=12)
+        self.assertAlmostEqual(ubem.hull_diameter([0, 1, 3, 2],
+            [0, 1, 3, 2])[0], 3*np.sqrt(2), places=14)
+        self.assertEqual(ubem.hull_diameter([1.], [1.])[0], 0.)
+
+    def test_scatter_diameter(self):
+        foil = ubem.naca4('2412', 2000)
+        self.assertAlmostEqual(foil.diameter, brute_force_diameter(foil.x,
+            foil.y), places=14)
+        # The cached diameter follows rigid motions and scaling
+        foil.pitch(.3).heave(.2)
+        self.assertAlmostEqual(foil.diameter, brute_force_diameter(foil.x,
+            foil.y), places=12)
+        foil.scale(2.)
+        self.assertAlmostEqual(foil.diameter, brute_force_diameter(foil.x,
+            foil.y), places=12)
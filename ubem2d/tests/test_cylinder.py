@@ -56,5 +56,40 @@ class test_circular_cylinder_flow(unittest.TestCase):
             self.assertAlmostEqual(CL,0)
             self.assertAlmostEqual(CM,0)
 
+class test_circulant_solvers(unittest.TestCase):
+    def test_rotational_symmetry(self):
+        self.assertEqual(ubem.CircularCylinder(50).rotational_symmetry(), 50)
+        trefoil = ubem.Cylinder(lambda t: 1 + .2*np.cos(3*t), 60)
+        self.assertEqual(trefoil.rotational_symmetry(), 3)
+        self.assertEqual(ubem.naca4('0012',50).rotational_symmetry(), 1)
+
+    def test_agrees_with_dense(self):
+        uinf = (1,.3)
+        trefoil = ubem.Cylinder(lambda t: 1 + .2*np.cos(3*t), 60)
+        for body in [ubem.CircularCylinder(64), trefoil]:
+            dense = ubem.solve_source_body(uinf, body)
+            fft = ubem.solve_source_body(uinf, body, circulant=True)
+            self.assertTrue(np.allclose(fft.An.to_dense(), dense.An))
+            self.assertTrue(np.allclose(fft.sigma, dense.sigma))
+            self.assertTrue(np.allclose(fft.cp, dense.cp))
+            dense = ubem.solve_hess_smith_body(uinf, body)
+            fft = ubem.solve_hess_smith_body(uinf, body, circulant=True)
+            self.assertTrue(np.allclose(fft.sigma, dense.sigma))
+            self.assertAlmostEqual(fft.gamma, dense.gamma)
+            self.assertTrue(np.allclose(fft.cp, dense.cp))
+        system = ubem.HessSmithSystem(trefoil, circulant=3)
+        (sigma,gamma) = system.solve(uinf)
+        self.assertTrue(np.allclose(sigma[0], dense.sigma))
+        self.assertAlmostEqual(gamma[0], dense.gamma)
+
+    def test_large_cylinder(self):
+        # Declared symmetry; the dense path could not reach this size
+        uinf = (1,0)
+        cyl = ubem.CircularCylinder(20000)
+        soln = ubem.solve_source_body(uinf, cyl, circulant=cyl.nedge)
+        th = np.arctan2(cyl.ymid, cyl.xmid)
+        self.assertLess(np.abs(soln.qn).max(), 1.e-12)
+        self.assertLess(np.abs(soln.cp - (1.-4.*np.sin(th)**2)).max(), 1.e-8)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+import ubem2d as ubem
+
+class test_field_cache(unittest.TestCase):
+    def setUp(self):
+        self.bodies = [ubem.naca4('2412', 80), ubem.CircularCylinder(40, .2,
+            1.8, .3)]
+        self.uinf = (1., .1)
+        self.system = ubem.HessSmithSystem(self.bodies)
+        self.soln = self.system.solve(self.uinf)
+        rng = np.random.default_rng(1)
+        (x,y) = rng.uniform(-1.5, 3.5, 4000), rng.uniform(-1.5, 1.5, 4000)
+        mask = ubem.exterior(self.bodies, x, y)
+        (self.x,self.y) = x[mask], y[mask]
+
+    def test_velocity(self):
+        cache = ubem.FieldCache.from_system(self.system, self.uinf,
+            self.soln, self.bodies, n=48)
+        (U,V,E) = cache.velocity(self.x, self.y, error=True)
+        (Ue,Ve) = self.system.flow_external(self.uinf, self.soln, self.x,
+            self.y)
+        err = np.hypot(U - Ue, V - Ve)
+        self.assertLess(err.max(), 1e-2)
+        self.assertLess(np.median(err), 1e-5)
+        # Points answered exactly report no error, and interpolated points
+        # mostly lie within a small multiple of their estimates
+        self.assertTrue(np.all(err[E == 0] < 1e-12))
+        self.assertGreater(np.mean(err <= 3*E + 1e-12), .9)
+        # Points hugging the leading edge are evaluated exactly
+        (xl,yl) = np.linspace(-.02, .05, 50), np.full(50, .04)
+        self.assertTrue(np.allclose(cache(xl, yl),
+            self.system.flow_external(self.uinf, self.soln, xl, yl),
+            rtol=0, atol=1e-12))
+        cp = cache.pressure(self.x, self.y)
+        self.assertTrue(np.allclose(cp, 1 - (U**2 + V**2)/np.dot(self.uinf,
+            self.uinf)))
+
+    def test_body_solution(self):
+        foil = self.bodies[0]
+        soln = ubem.solve_hess_smith_body(self.uinf, foil)
+        cache = ubem.FieldCache.from_body(foil, self.uinf, soln, n=48,
+            estimate=False)
+        (U,V) = cache.velocity(self.x, self.y)
+        (us,vs) = ubem.velocity_source_body(foil, soln.sigma, self.x, self.y)
+        (uv,vv) = ubem.velocity_vortex_body(foil, soln.gamma*np.ones(
+            foil.nedge), self.x, self.y)
+        err = np.hypot(U - us - uv - self.uinf[0], V - vs - vv - self.uinf[1])
+        self.assertLess(np.median(err), 1e-5)
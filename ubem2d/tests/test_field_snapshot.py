@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+import ubem2d as ubem
+
+class test_field_snapshot(unittest.TestCase):
+    def test_fit(self):
+        rng = np.random.default_rng(0)
+        (x,y) = rng.standard_normal(10), rng.standard_normal(10)
+        g = ubem.SE2(.7, -.3, 1.2)
+        h = ubem.SE2.fit(x, y, *g.map_point(x, y))
+        self.assertTrue(np.allclose(h.r3(), g.r3(), rtol=0, atol=1e-14))
+
+    def test_frames(self):
+        foil = ubem.naca4('2412', 40)
+        wake = ubem.PointVortexWake(eps=1.e-6)
+        solver = ubem.BasuHancockSolver(foil, wake)
+        (X,Y) = ubem.mesh(foil, 12, 12)
+        mask = ubem.exterior(foil, X, Y)
+        snaps = [ubem.FieldSnapshot(foil, X, Y, mask),
+            ubem.FieldSnapshot(foil, X, Y, mask, np.float32)]
+        uinf = (1,0)
+        (sigma,gamma) = solver.step(0, uinf)[:2]
+        for k in range(3):
+            foil.pitch(.02, .25)
+            foil.translate(0, .01)
+            (sigma,gamma) = solver.step(.1, uinf)[:2]
+            (Xk,Yk) = snaps[0].mesh(foil)
+            (u,v) = solver.velocity_body(sigma, gamma, Xk[mask], Yk[mask])
+            (uw,vw) = wake.velocity(Xk[mask], Yk[mask])
+            (u,v) = u + uw + uinf[0], v + vw + uinf[1]
+            for (snap,tol) in zip(snaps, [1e-12, 1e-5]):
+                (Xs,Ys,U,V) = snap.flow(foil, uinf, sigma, gamma, wake)
+                self.assertTrue(np.allclose(Xs[mask], Xk[mask]))
+                self.assertTrue(np.all(np.isnan(U[~mask])))
+                self.assertLess(np.abs(U[mask] - u).max(), tol)
+                self.assertLess(np.abs(V[mask] - v).max(), tol)
@@ -1,5 +1,7 @@
 import unittest
 import math
+import os
+import tempfile
 import numpy as np
 import numpy.linalg as nla
 import ubem2d as ubem
@@ -43,5 +45,257 @@ class test_naca_flow(unittest.TestCase):
                     self.assertEqual(Bn[i,i],0)
                     self.assertEqual(Bt[i,i],.5)
 
+class test_krylov_hess_smith(unittest.TestCase):
+    def test_agrees_with_direct_solve(self):
+        # Define onset flow and a staggered school of airfoils
+        uinf = (1,.1)
+        bodies = [ubem.naca4('2412',60).heave(k).surge(.5*k)
+            for k in range(3)]
+
+        # Solve with dense LU and with preconditioned GMRES
+        direct = ubem.HessSmithSystem(bodies)
+        krylov = ubem.KrylovHessSmithSystem(bodies)
+        (sigma0,gamma0) = direct.solve(uinf)
+        (sigma1,gamma1) = krylov.solve(uinf)
+        self.assertTrue(krylov.info.converged)
+        self.assertLess(krylov.info.residual, 1.e-8)
+        self.assertTrue(np.allclose(gamma0, gamma1, atol=1.e-7))
+        for k in range(len(bodies)):
+            self.assertTrue(np.allclose(sigma0[k], sigma1[k], atol=1.e-7))
+
+        # A warm start from the converged solution needs no iterations
+        krylov.solve(uinf)
+        self.assertEqual(krylov.info.iterations, 0)
+
+class test_lean_hess_smith(unittest.TestCase):
+    def test_agrees_with_full_storage(self):
+        uinf = (1,.1)
+        bodies = [ubem.naca4('2412',200).heave(k) for k in range(2)]
+        full = ubem.HessSmithSystem(bodies)
+        with tempfile.TemporaryDirectory() as spill_dir:
+            for lean in [ubem.HessSmithSystem(bodies, lean=True),
+                ubem.HessSmithSystem(bodies, lean=True, spill_dir=spill_dir)]:
+                (sigma0,gamma0) = full.solve(uinf)
+                (sigma1,gamma1) = lean.solve(uinf)
+                self.assertTrue(np.allclose(gamma0, gamma1, atol=1.e-12))
+                qt0 = full.flow_self(uinf, (sigma0,gamma0))
+                qt1 = lean.flow_self(uinf, (sigma1,gamma1))
+                for k in range(len(bodies)):
+                    self.assertTrue(np.allclose(sigma0[k], sigma1[k],
+                        atol=1.e-12))
+                    self.assertTrue(np.allclose(qt0[k], qt1[k], atol=1.e-12))
+            # Discarded matrices are unavailable; spilled ones are on disk
+            self.assertIsNone(ubem.HessSmithSystem(bodies, lean=True).An)
+            self.assertTrue(np.array_equal(lean.Bn, full.Bn))
+            self.assertTrue(np.array_equal(
+                np.load(os.path.join(spill_dir,'An.npy')), full.An))
+
+class test_out_of_core(unittest.TestCase):
+    def test_influence_matrices_on_disk(self):
+        foil = ubem.naca4('2412',100)
+        (At,An) = ubem.source_influence_matrices_body(foil)
+        (Bt,Bn) = ubem.vortex_influence_matrices_body(foil)
+        with tempfile.TemporaryDirectory() as path:
+            out = [ubem.disk_array((100,100), os.path.join(path, name))
+                for name in ['At.npy','An.npy','Bt.npy','Bn.npy']]
+            ubem.source_influence_matrices_body(foil, out[:2])
+            ubem.vortex_influence_matrices_body(foil, out[2:])
+            for (M,D) in zip(out, [At,An,Bt,Bn]):
+                self.assertTrue(np.array_equal(M, D))
+
+    def test_disk_operator(self):
+        uinf = (1,.1)
+        bodies = [ubem.naca4('2412',150).heave(k) for k in range(2)]
+        direct = ubem.HessSmithSystem(bodies)
+        with tempfile.TemporaryDirectory() as path:
+            disk = ubem.KrylovHessSmithSystem(bodies, operator='disk',
+                storage_dir=path)
+            (sigma0,gamma0) = direct.solve(uinf)
+            (sigma1,gamma1) = disk.solve(uinf)
+            self.assertTrue(disk.info.converged)
+            self.assertTrue(np.allclose(gamma0, gamma1, atol=1.e-7))
+            qt0 = direct.flow_self(uinf, (sigma0,gamma0))
+            qt1 = disk.flow_self(uinf, (sigma1,gamma1))
+            for k in range(len(bodies)):
+                self.assertTrue(np.allclose(sigma0[k], sigma1[k], atol=1.e-7))
+                self.assertTrue(np.allclose(qt0[k], qt1[k], atol=1.e-7))
+        with self.assertRaises(ValueError):
+            ubem.KrylovHessSmithSystem(bodies, operator='disk')
+
+class test_mirror_plane(unittest.TestCase):
+    def test_agrees_with_explicit_image(self):
+        # Airfoil in ground effect, with and without explicit image panels
+        uinf = (1,0)
+        ground = ubem.MirrorPlane()
+        foil = ubem.naca4('2412',80).rotate(-.1).heave(.3)
+        (x,y) = ground.reflect(foil.x, foil.y)
+        image = ubem.Body(x[::-1].copy(), y[::-1].copy())
+        explicit = ubem.HessSmithSystem([foil, image])
+        mirrored = ubem.HessSmithSystem(foil, mirror=ground)
+        (sigma0,gamma0) = explicit.solve(uinf)
+        (sigma1,gamma1) = mirrored.solve(uinf)
+        self.assertAlmostEqual(gamma0[0], gamma1[0])
+        self.assertAlmostEqual(gamma0[1], -gamma1[0])
+        self.assertTrue(np.allclose(sigma0[0], sigma1[0]))
+        self.assertTrue(np.allclose(sigma0[1][::-1], sigma1[0]))
+
+        # No flow through the ground plane
+        X = np.linspace(-1,2,7)
+        (U,V) = mirrored.flow_external(uinf, (sigma1,gamma1), X, 0*X)
+        self.assertTrue(np.allclose(V, 0.))
+        with self.assertRaises(ValueError):
+            mirrored.solve((1,.1))
+
+    def test_basu_hancock(self):
+        ground = ubem.MirrorPlane()
+        foil = ubem.naca4('0012',100).rotate(-.1).heave(.2)
+        steady = ubem.HessSmithSystem(foil, mirror=ground).solve((1,0))
+        solver = ubem.BasuHancockSolver(foil,
+            ubem.PointVortexWake(eps=1.e-6), mirror=ground)
+        (sigma,gamma) = solver.step(0, (1,0))[0:2]
+        self.assertTrue(np.allclose(sigma, steady[0][0]))
+        self.assertAlmostEqual(gamma, steady[1][0])
+        for k in range(3):
+            foil.heave(-.01)
+            solver.step(.05, (1,0))
+
+class test_cascade(unittest.TestCase):
+    def test_periodic_kernel(self):
+        # Closed-form row of panels agrees with a symmetric partial sum
+        foil = ubem.naca4('2412',20)
+        pitch = (.3,.8)
+        X, Y = np.array([.3,2.,-1.]), np.array([.9,5.,.1])
+        args = (foil.x[:-1],foil.y[:-1],foil.tx,foil.ty,foil.edge)
+        (U,V) = ubem.periodic_correction_panel_matrices(*args,X,Y,pitch)
+        Us, Vs = np.zeros(U.shape), np.zeros(V.shape)
+        for n in list(range(-4000,0)) + list(range(1,4001)):
+            (u,v) = ubem.velocity_source_panel_matrices(args[0]+n*pitch[0],
+                args[1]+n*pitch[1],*args[2:],X,Y)
+            Us, Vs = Us + u, Vs + v
+        self.assertLess(np.abs(U-Us).max(), 1.e-3)
+        self.assertLess(np.abs(V-Vs).max(), 1.e-3)
+
+    def test_cascade_solve(self):
+        foil = ubem.naca4('0012',60)
+        foil.rotate(-.1)
+        (sigma,gamma) = ubem.HessSmithSystem(foil).solve((1,0))
+        # Widely spaced blades do not interact
+        system = ubem.HessSmithSystem(foil, pitch=(0,1.e4))
+        self.assertAlmostEqual(system.solve((1,0))[1][0], gamma[0])
+        # Close spacing reduces the circulation; flow is periodic
+        system = ubem.HessSmithSystem(foil, pitch=(0,1))
+        soln = system.solve((1,0))
+        self.assertLess(abs(soln[1][0]), .7*abs(gamma[0]))
+        X, Y = np.array([-.5,1.5]), np.array([.6,-.3])
+        (U,V) = system.flow_external((1,0), soln, X, Y)
+        (U1,V1) = system.flow_external((1,0), soln, X, Y+1)
+        self.assertTrue(np.allclose(U,U1) and np.allclose(V,V1))
+
+    def test_periodic_wake(self):
+        pitch = (.4,1.1)
+        wake = ubem.PeriodicPointVortexWake(pitch, np.array([1.,-.5]),
+            np.array([.3,2.]), np.array([.1,-.7]))
+        x, y = np.array([0.,1.,5.]), np.array([0.,.5,-30.])
+        (u,v) = wake.velocity(x,y)
+        n = np.arange(-4000,4001)
+        us, vs = np.zeros(3), np.zeros(3)
+        for (g,x0,y0) in zip(wake.gam,wake.x,wake.y):
+            dx = x[:,None] - x0 - n*pitch[0]
+            dy = y[:,None] - y0 - n*pitch[1]
+            us -= np.sum(g*dy/(2*np.pi*(dx*dx + dy*dy)), axis=1)
+            vs += np.sum(g*dx/(2*np.pi*(dx*dx + dy*dy)), axis=1)
+        self.assertTrue(np.allclose(u, us, atol=1.e-3))
+        self.assertTrue(np.allclose(v, vs, atol=1.e-3))
+
+    def test_basu_hancock(self):
+        pitch = (0,1.5)
+        foil = ubem.naca4('0012',60).rotate(-.1)
+        steady = ubem.HessSmithSystem(foil, pitch=pitch).solve((1,0))
+        solver = ubem.BasuHancockSolver(foil,
+            ubem.PeriodicPointVortexWake(pitch), pitch=pitch)
+        (sigma,gamma) = solver.step(0, (1,0))[0:2]
+        self.assertTrue(np.allclose(sigma, steady[0][0]))
+        self.assertAlmostEqual(gamma, steady[1][0])
+        for k in range(3):
+            foil.heave(-.01)
+            solver.step(.05, (1,0))
+
+class test_linear_vortex(unittest.TestCase):
+    def cosine_naca00(self, n, th = .12):
+        # Symmetric NACA airfoil with full cosine spacing of its corners
+        t = np.linspace(0, np.pi, n//2+1)
+        x = .5*(1 + np.cos(t))
+        yt = 5*th*(.2969*np.sqrt(x) + np.polyval([-.1036,.2843,-.3516,
+            -.1260,0.], x))
+        return ubem.Airfoil(np.concatenate([x,x[-2::-1]]),
+            np.concatenate([yt,-yt[-2::-1]]), n//2, ubem.Orientation.CW)
+
+    def test_converges_with_fewer_panels(self):
+        uinf = (math.cos(.14), math.sin(.14))
+        foil = self.cosine_naca00(320)
+        system = ubem.LinearVortexSystem(foil)
+        ref = system.circulation(system.solve(uinf))[0]
+        foil = self.cosine_naca00(40)
+        system = ubem.LinearVortexSystem(foil)
+        soln = system.solve(uinf)
+        self.assertAlmostEqual(soln[0][0] + soln[0][-1], 0.)
+        err_lv = abs(system.circulation(soln)[0] - ref)
+        foil = self.cosine_naca00(160)
+        (sigma,gamma) = ubem.HessSmithSystem(foil).solve(uinf)
+        err_hs = abs(gamma[0]*foil.perimeter - ref)
+        self.assertLess(err_lv, err_hs)
+
+    def test_multiple_bodies(self):
+        uinf = (1,0)
+        foils = [ubem.naca4('2412',60).rotate(-.1),
+            ubem.naca4('0012',40).scale(.5).translate(1.2,-.3)]
+        system = ubem.LinearVortexSystem(foils)
+        soln = system.solve(uinf)
+        self.assertEqual([len(g) for g in soln], [61,41])
+        # Flow tangency at the midpoints
+        gamma = np.concatenate(soln)
+        for (k,foil) in enumerate(foils):
+            a = sum(f.nedge for f in foils[:k])
+            qn = system.Cn[a:a+foil.nedge,:].dot(gamma) + foil.nx
+            self.assertTrue(np.allclose(qn, 0.))
+        # Field agrees with the Hess-Smith solution away from the bodies
+        X, Y = np.array([-1.,.5,3.]), np.array([.5,1.,-1.])
+        (U,V) = system.flow_external(uinf, soln, X, Y)
+        hs = ubem.HessSmithSystem(foils)
+        (Uh,Vh) = hs.flow_external(uinf, hs.solve(uinf), X, Y)
+        self.assertTrue(np.allclose(U, Uh, atol=1.e-2))
+        self.assertTrue(np.allclose(V, Vh, atol=1.e-2))
+
+class test_morino(unittest.TestCase):
+    def test_agrees_with_hess_smith(self):
+        uinf = (math.cos(.14), math.sin(.14))
+        iterations = []
+        for n in [80,320]:
+            foil = ubem.naca4('2412',n)
+            system = ubem.MorinoSystem(foil)
+            mu = system.solve(uinf)
+            iterations.append(system.info.iterations)
+            self.assertTrue(system.info.converged)
+            self.assertLess(system.info.residual, 1.e-9)
+            hs = ubem.HessSmithSystem(foil)
+            (sigma,gamma) = hs.solve(uinf)
+            self.assertAlmostEqual(system.circulation(mu)[0],
+                gamma[0]*foil.perimeter, delta=.02)
+        # Second-kind system: iteration count barely grows with n
+        self.assertLess(iterations[1], iterations[0] + 10)
+
+    def test_potential(self):
+        uinf = (1,.1)
+        foils = [ubem.naca4('0012',60), ubem.naca4('0012',60).heave(1)]
+        system = ubem.MorinoSystem(foils)
+        mu = system.solve(uinf)
+        self.assertEqual(len(system.potential_self(uinf, mu)), 2)
+        # Field velocity is the gradient of the field potential
+        X, Y, h = np.array([-.5,.5,2.]), np.array([.5,-.4,.2]), 1.e-6
+        (U,V) = system.flow_external(uinf, mu, X, Y)
+        phi = lambda X,Y: system.potential(uinf, mu, X, Y)
+        self.assertTrue(np.allclose(U, (phi(X+h,Y) - phi(X-h,Y))/(2*h)))
+        self.assertTrue(np.allclose(V, (phi(X,Y+h) - phi(X,Y-h))/(2*h)))
+
 if __name__ == '__main__':
     unittest.main()
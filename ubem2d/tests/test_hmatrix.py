@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+import ubem2d as ubem
+
+class test_hmatrix(unittest.TestCase):
+    def test_influence_matrices(self):
+        # Compare compressed and dense influence matrices of an airfoil
+        foil = ubem.naca4('2412',400)
+        (At,An) = ubem.source_influence_matrices_body(foil)
+        (Bt,Bn) = ubem.vortex_influence_matrices_body(foil)
+        H = ubem.influence_hmatrices_body(foil, tol=1.e-10)
+        x = np.random.default_rng(0).standard_normal(len(foil))
+        for (h,D) in zip(H,(At,An,Bt,Bn)):
+            self.assertEqual(h.shape, D.shape)
+            self.assertLess(h.compression, 1.)
+            self.assertTrue(np.allclose(h.to_dense(), D, atol=1.e-8))
+            self.assertTrue(np.allclose(h.dot(x), D.dot(x), atol=1.e-8))
+            self.assertTrue(np.allclose(h.row(0), D[0,:], atol=1.e-8))
+
+    def test_krylov_hess_smith(self):
+        uinf = (1,.1)
+        bodies = [ubem.naca4('2412',200).heave(k) for k in range(2)]
+        direct = ubem.HessSmithSystem(bodies)
+        hmat = ubem.KrylovHessSmithSystem(bodies, operator='hmatrix',
+            max_block=100)
+        (sigma0,gamma0) = direct.solve(uinf)
+        (sigma1,gamma1) = hmat.solve(uinf)
+        self.assertTrue(hmat.info.converged)
+        self.assertTrue(np.allclose(gamma0, gamma1, atol=1.e-7))
+        for k in range(len(bodies)):
+            self.assertTrue(np.allclose(sigma0[k], sigma1[k], atol=1.e-7))
+        qt0, qt1 = direct.flow_self(uinf, (sigma0,gamma0)), \
+            hmat.flow_self(uinf, (sigma1,gamma1))
+        for k in range(len(bodies)):
+            self.assertTrue(np.allclose(qt0[k], qt1[k], atol=1.e-7))
+
+    def test_basu_hancock(self):
+        # Dense and H-matrix storage give the same unsteady solution
+        solns = []
+        for hmatrix in [False, True]:
+            foil = ubem.naca4('0012',200)
+            solver = ubem.BasuHancockSolver(foil,
+                ubem.PointVortexWake(eps=1.e-6), hmatrix=hmatrix)
+            steps = [solver.step(0, (1,0))]
+            for k in range(3):
+                foil.heave(.01)
+                steps.append(solver.step(.05, (1,0)))
+            solns.append(steps)
+        for (s0,s1) in zip(*solns):
+            self.assertTrue(np.allclose(s0[0], s1[0], atol=1.e-9))
+            self.assertAlmostEqual(s0[1], s1[1], places=10)
+            self.assertTrue(np.allclose(s0[2], s1[2], atol=1.e-9))
+
+if __name__ == '__main__':
+    unittest.main()
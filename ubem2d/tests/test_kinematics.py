@@ -0,0 +1,105 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import ubem2d as ubem
+
+class test_kinematics(unittest.TestCase):
+    def test_fourier_derivatives(self):
+        f = ubem.FourierSeries(1.3, [5,2.5,1], [0,.3,-1])
+        t = np.linspace(0, 2, 7)
+        h = 1.e-5
+        (y, dy, d2y) = f.evaluate(t, (0,1,2))
+        self.assertTrue(np.allclose(y, f(t), rtol=0, atol=1.e-13))
+        self.assertTrue(np.allclose(dy, (f(t+h) - f(t-h))/(2*h), atol=1.e-5))
+        self.assertTrue(np.allclose(d2y, f.derivative(t, 2)))
+        self.assertTrue(np.allclose(d2y, -(2*np.pi*1.3)**2*f(t, [0]) -
+            (4*np.pi*1.3)**2*f(t, [1]) - (6*np.pi*1.3)**2*f(t, [2])))
+        self.assertEqual(f.modes(t)[0].shape, (7,3))
+        self.assertIsInstance(f.derivative(.3), float)
+
+    def test_rigid_motion_velocity(self):
+        ftheta = ubem.FourierSeries(.5, [.2])
+        motion = ubem.RigidMotion(ftheta, np.cos, np.sin)
+        (w,u,v) = motion.velocity(np.array([.3,.7]))
+        self.assertTrue(np.allclose(w, ftheta.derivative([.3,.7])))
+        self.assertTrue(np.allclose(u, -np.sin([.3,.7])))
+        self.assertTrue(np.allclose(v, np.cos([.3,.7])))
+        # Velocity of material points agrees with differenced positions
+        body = ubem.naca4('0012', 20)
+        (X0,Y0) = body.trajectory(motion(np.array([.5 - 1.e-6, .5 + 1.e-6])),
+            0, 0)
+        (X,Y) = body.trajectory(motion(np.array([.5])), 0, 0)
+        (U,V) = motion.point_velocity(.5, X[0], Y[0])
+        self.assertTrue(np.allclose(U, (X0[1] - X0[0])/2.e-6, atol=1.e-6))
+        self.assertTrue(np.allclose(V, (Y0[1] - Y0[0])/2.e-6, atol=1.e-6))
+
+    def run_gait(self, spc, analytic, ncycles = 2):
+        freq, pamps, pphases, hamps, hphases = .5, [5], [90], [.2], [0]
+        dt = 1./(spc*freq)
+        motion = ubem.fourier_pitch_heave(ubem.time_stepper(dt,
+            1 + spc*ncycles), freq, pamps, pphases, hamps, hphases)
+        rates = None
+        if (analytic):
+            rates = ubem.fourier_pitch_heave_rates(freq, pamps, pphases,
+                hamps, hphases)
+        data = np.array([d for (k,d) in ubem.airfoil_stepper(
+            ubem.naca4('0012', 40), motion, .25, ubem.PointVortexWake(
+            eps=1.e-6), (1,0), rates)])
+        return data[1+spc:,0].mean()
+
+    def test_analytic_velocity_in_stepper(self):
+        # Mean thrust over the second cycle converges faster in the time
+        # step with the analytic airfoil velocity
+        CT = self.run_gait(80, True)
+        err_fd = abs(self.run_gait(20, False) - CT)
+        err_analytic = abs(self.run_gait(20, True) - CT)
+        self.assertLess(err_analytic, .5*err_fd)
+
+    def test_velocity_forms(self):
+        sols = []
+        for form in ['callable', 'arrays']:
+            foil = ubem.naca4('2412', 30)
+            solver = ubem.BasuHancockSolver(foil, ubem.PointVortexWake(
+                eps=1.e-6))
+            solver.step(0, (1,0))
+            foil.pitch(.01, .25)
+            if (form == 'callable'):
+                velocity = lambda X,Y: foil.pitch_heave_velocity(.1, 0, .25,
+                    X, Y)
+            else:
+                velocity = foil.pitch_heave_velocity(.1, 0, .25)
+            sols.append(solver.step(.1, (1,0), velocity))
+        self.assertTrue(np.allclose(sols[0][0], sols[1][0]))
+        self.assertAlmostEqual(sols[0][1], sols[1][1])
+
+class test_motion_table(unittest.TestCase):
+    def test_table(self):
+        args = (.5, [5,2], [90,0], [.2], [0])
+        dt, n = .1, 41
+        table = ubem.MotionTable.fourier(args[0], dt, n, *args[1:])
+        gen = list(ubem.fourier_pitch_heave(ubem.time_stepper(dt, n), *args))
+        self.assertEqual(len(table), len(gen))
+        # Tables may be iterated repeatedly
+        for k in range(2):
+            for ((t,(alp,y)), (tg,(alpg,yg))) in zip(table, gen):
+                self.assertAlmostEqual(t, tg, places=12)
+                self.assertAlmostEqual(alp, alpg, places=12)
+                self.assertAlmostEqual(y, yg, places=12)
+        rates = ubem.fourier_pitch_heave_rates(*args)
+        self.assertTrue(np.allclose(rates(table.t)[0], table.pitch_rate))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'table.npy')
+            table.save(path)
+            loaded = ubem.MotionTable.load(path)
+        self.assertTrue(np.array_equal(loaded.heave_rate, table.heave_rate))
+
+    def test_stepper(self):
+        args = (.5, [5], [90], [.2], [0])
+        dt, n = .1, 11
+        table = ubem.MotionTable.fourier(args[0], dt, n, *args[1:],
+            rates=False)
+        gen = ubem.fourier_pitch_heave(ubem.time_stepper(dt, n), *args)
+        runs = [np.array([d for (k,d) in ubem.airfoil_stepper(
+            ubem.naca4('0012', 30), motion, .25)]) for motion in [table, gen]]
+        self.assertTrue(np.allclose(runs[0], runs[1], rtol=0, atol=1.e-10))
@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+import ubem2d as ubem
+
+class test_mesh_helper(unittest.TestCase):
+    def setUp(self):
+        self.L_shape = ubem.BrokenLine([0.,1,1,.5,.5,0,0],
+            [1.,1,1.5,1.5,1.25,1.25,1])
+        self.cylinder = ubem.CircularCylinder(100,.5,0,0)
+
+    def test_interior(self):
+        # Points inside the L, in its notch, and outside its box
+        x = np.array([.25, .75, .25, .75, 2., -1.])
+        y = np.array([1.1, 1.4, 1.4, 1.1, 1.1, 0.])
+        inside = ubem.interior(self.L_shape, x, y)
+        self.assertEqual(list(inside), [True, True, False, True, False,
+            False])
+        # A mesh over several bodies
+        (X,Y) = ubem.mesh([self.cylinder, self.L_shape], 60, 60)
+        (I,J) = ubem.interior([self.cylinder, self.L_shape], X, Y)
+        self.assertEqual(I.shape, X.shape)
+        r = np.hypot(X, Y)
+        self.assertTrue(np.all(I[r < .49]))
+        self.assertFalse(np.any(I[r > .5]))
+        self.assertFalse(np.any(I & J))
+        self.assertTrue(np.array_equal(ubem.exterior([self.cylinder,
+            self.L_shape], X, Y), ~(I | J)))
+        B = ubem.boundary([self.cylinder, self.L_shape], X, Y)
+        self.assertTrue(np.array_equal(B[1], (~J).astype(int)))
+
+    def test_masked_flow(self):
+        # The mask is handled by PanelSystem for every steady solver
+        bodies = [ubem.naca4('2412', 60)]
+        uinf = (1.,.1)
+        (X,Y) = ubem.mesh(bodies, 20, 20)
+        mask = ubem.exterior(bodies, X, Y)
+        for cls in [ubem.HessSmithSystem, ubem.KrylovHessSmithSystem,
+            ubem.LinearVortexSystem, ubem.MorinoSystem]:
+            system = cls(bodies)
+            self.assertIsInstance(system, ubem.PanelSystem)
+            soln = system.solve(uinf)
+            (U,V) = system.flow_external(uinf, soln, X, Y)
+            (Um,Vm) = system.flow_external(uinf, soln, X, Y, mask)
+            self.assertTrue(np.all(np.isnan(Um[~mask])))
+            self.assertTrue(np.allclose(Um[mask], U[mask], rtol=0,
+                atol=1e-14))
+            self.assertTrue(np.allclose(Vm[mask], V[mask], rtol=0,
+                atol=1e-14))
+            P = system.pressure(uinf, soln, X, Y, mask)
+            self.assertTrue(np.all(np.isnan(P[~mask])))
+            self.assertTrue(np.allclose(P[mask], system.pressure_from_flow(
+                uinf, soln, U, V)[mask], rtol=0, atol=1e-13))
+
+    def test_mask_cache(self):
+        for body in [ubem.naca4('2412', 100), self.L_shape]:
+            cache = ubem.InteriorMaskCache(body, 64)
+            (X,Y) = ubem.mesh(body, 80, 80, .2)
+            for k in range(3):
+                body.rotate(.4, .3, .1)
+                body.translate(.05, -.02)
+                self.assertTrue(np.array_equal(cache.interior(X, Y,
+                    cache.frame(body)), ubem.interior(body, X, Y)))
@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+import ubem2d as ubem
+
+class test_naca(unittest.TestCase):
+    def test_batch(self):
+        codes = ['2412','0012','23012','23112','0012-64','2412-34']
+        npan = [80,81,80,100,80,80]
+        batch = ubem.naca_batch(codes, npan, clamp=[True,False]*3)
+        self.assertEqual(len(batch), len(codes))
+        self.assertEqual(list(batch.npan), npan)
+        for (k,foil) in enumerate(batch):
+            single = ubem.naca(codes[k], npan[k], clamp=(k%2 == 0))
+            self.assertTrue(np.array_equal(foil.x, single.x))
+            self.assertTrue(np.array_equal(foil.y, single.y))
+            self.assertEqual(foil.le, single.le)
+        # Panel data agree with those of the airfoils
+        (x1,y1,tx,ty,nx,ny,edge,xmid,ymid) = batch.panels()
+        a = batch.panel_offsets()
+        foil = batch[3]
+        self.assertTrue(np.allclose(nx[a[3]:a[4]], foil.nx))
+        self.assertTrue(np.allclose(edge[a[3]:a[4]], foil.edge))
+        with self.assertRaises(ubem.SizeMismatchError):
+            batch.stacked()
+        (x,y) = ubem.naca_batch(['0012','4412'], 40, thickness=.1).stacked()
+        self.assertEqual(x.shape, (2,41))
+        self.assertAlmostEqual(np.ptp(y[0]), .1, places=3)
+
+    def test_series(self):
+        # The 230 mean line has its maximum camber near 15% chord
+        foil = ubem.naca5('23012', 400)
+        xu, yu = foil.x[foil.le::-1], foil.y[foil.le::-1]
+        yc = .5*(yu + foil.y[foil.le:])
+        self.assertAlmostEqual(xu[np.argmax(yc)], .15, places=2)
+        self.assertAlmostEqual(yc.max(), .0184, places=3)
+        # Leading-edge radius index 6 at 30% chord is nearly the 4-digit
+        # section; the maximum thickness lies at the given position
+        foil = ubem.naca('0012-63', 400)
+        self.assertLess(np.abs(foil.y - ubem.naca4('0012', 400).y).max(),
+            2.e-3)
+        foil = ubem.naca4_modified('0012-65', 400)
+        self.assertAlmostEqual(foil.x[np.argmax(foil.y)], .5, places=2)
+        self.assertAlmostEqual(foil.y.max(), .06, places=5)
+        for code in ['26012','23212','0012-67','12']:
+            with self.assertRaises(ValueError):
+                ubem.naca(code, 40)
@@ -0,0 +1,45 @@
+import unittest
+import math
+import numpy as np
+import ubem2d as ubem
+
+class test_repanel(unittest.TestCase):
+    def test_airfoil(self):
+        foil = ubem.naca4('2412',200)
+        for n in [40,61]:
+            new = ubem.repanel(foil, n, ubem.paneling_density(foil))
+            self.assertIsInstance(new, ubem.Airfoil)
+            self.assertEqual(new.nedge, n)
+            # Trailing and leading edges are kept
+            self.assertEqual((new.x[0],new.y[0]), (foil.x[0],foil.y[0]))
+            self.assertEqual((new.x[-1],new.y[-1]), (foil.x[-1],foil.y[-1]))
+            self.assertEqual(new.leading_edge, foil.leading_edge)
+            # Panels cluster near the leading edge
+            self.assertLess(new.edge[new.le], .5*new.edge.max())
+
+    def test_smooth_and_sharp_bodies(self):
+        ellipse = ubem.Ellipse(100, 1, .5)
+        new = ubem.repanel(ellipse, 30, ubem.paneling_density(ellipse))
+        self.assertTrue(new.closed)
+        self.assertLess(np.abs(new.x**2 + (new.y/.5)**2 - 1).max(), 1.e-5)
+        rect = ubem.Rectangle()
+        new = ubem.repanel(rect, 24)
+        corners = set(zip(rect.x[[0,10,20,30]], rect.y[[0,10,20,30]]))
+        self.assertTrue(corners <= set(zip(new.x, new.y)))
+        with self.assertRaises(ValueError):
+            ubem.repanel(rect, 3)
+
+    def test_adaptive(self):
+        uinf = (math.cos(.14), math.sin(.14))
+        foil = ubem.naca4('2412',400)
+        result = ubem.adaptive_repanel(foil, uinf, tol=5.e-3)
+        self.assertTrue(result.converged)
+        n = [h[0] for h in result.history]
+        self.assertEqual(n[-1], result.body.nedge)
+        self.assertTrue(all(np.diff(n) > 0))
+        self.assertLess(n[-1], foil.nedge)
+        (CL,CM) = result.history[-1][1]
+        self.assertAlmostEqual(CL, 1.222, delta=.02)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+import ubem2d as ubem
+
+def synthetic(n, s, m):
+    # Known first-order errors in panels and steps, geometric transient
+    c = np.arange(1, m+1)
+    values = np.array([.8 + 2/n + 3/s + .2*.3**c,
+        .13 - 1/n + .5/s - .05*.3**c]).T
+    k = np.arange(1 + s*m)
+    times = 1.e-3 + 1.e-6*n*n + 1.e-7*n*k
+    times[0] += 1.e-8*n**3
+    return (values, times)
+
+def true_error(n, s, m):
+    return np.array([2/n + 3/s + .2*.3**m, 1/n + .5/s + .05*.3**m])
+
+class test_resolution_planner(unittest.TestCase):
+    def test_cost_model(self):
+        samples = [(n, synthetic(n, 24, 3)[1]) for n in [32,64,48]]
+        cost = ubem.fit_cost_model(samples)
+        exact = sum(synthetic(200, 100, 4)[1])
+        self.assertAlmostEqual(cost(200, 100, 4)/exact, 1., delta=.01)
+
+    def test_plan(self):
+        tol = .01
+        plan = ubem.plan_resolution(synthetic, tol)
+        self.assertTrue(plan.feasible)
+        (n, s, m) = (plan.npan, plan.steps_per_cycle, plan.cycles)
+        self.assertTrue(np.allclose(plan.error, true_error(n, s, m)))
+        self.assertTrue(np.all(true_error(n, s, m) <= tol))
+        self.assertGreater(true_error(n, s, m - 1).max(), tol)
+        # Within a small budget the tolerance cannot be met
+        poor = ubem.plan_resolution(synthetic, tol, budget=.5)
+        self.assertFalse(poor.feasible)
+        self.assertLessEqual(poor.runtime, .5)
+
+    def test_cycle_converged(self):
+        # A quantity whose cycles agree exactly has no cycle error
+        def converged(n, s, m):
+            (values, times) = synthetic(n, s, m)
+            values[:,1] = .13 - 1/n + .5/s
+            return (values, times)
+        runs = [(n, s, converged(n, s, 3)[0]) for (n,s) in
+            [(32,24), (64,24), (32,48)]]
+        with np.errstate(all='raise'):
+            error = ubem.fit_error_model(*runs)
+            e = error(100, 100, 5)
+        self.assertTrue(np.all(np.isfinite(e)))
+        self.assertAlmostEqual(e[1], 1/100 + .5/100)
+        plan = ubem.plan_resolution(converged, .01)
+        self.assertTrue(plan.feasible)
+        self.assertTrue(np.all(np.isfinite(plan.error)))
+
+    def test_fourier_simulation(self):
+        simulate = ubem.fourier_simulation(lambda n: ubem.naca4('0012',n),
+            1., 5, 0, .2, -90, pp=.25)
+        (values, times) = simulate(12, 8, 2)
+        self.assertEqual(values.shape, (2,2))
+        self.assertEqual(len(times), 17)
+        self.assertTrue(np.all(times > 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import math
+import numpy as np
+import ubem2d as ubem
+
+class test_richardson(unittest.TestCase):
+    def test_extrapolate(self):
+        # The leading error term is removed
+        f = lambda n: np.array([1. + 2./n + 3./n**2, -.5 - 1./n])
+        p = ubem.observed_order(f(50), f(100), f(200), 2.)
+        self.assertAlmostEqual(p[1], 1., places=12)
+        self.assertLess(abs(p[0] - 1.), .1)
+        (g, err) = ubem.richardson_extrapolate(f(100), f(200), 2., p)
+        self.assertAlmostEqual(g[1], -.5, places=12)
+        self.assertLess(abs(g[0] - 1.), 1.e-3)
+        # Alternating changes fall back on the formal order
+        p = ubem.observed_order(1., 2., 1.5, 2., order=2.)
+        self.assertEqual(p, 2.)
+
+    def test_ladder(self):
+        uinf = (math.cos(.1), math.sin(.1))
+        make = lambda n: ubem.naca4('2412', n)
+        cache = {}
+        result = ubem.richardson_ladder(make, uinf, cache=cache)
+        self.assertEqual([h[0] for h in result.history], [50,100,200])
+        # Fine-grid reference
+        foil = make(3200)
+        system = ubem.HessSmithSystem(foil)
+        cp = system.pressure_self(uinf, system.solve(uinf))[0]
+        CL = ubem.airfoil_cdclcm(uinf, foil, cp, .25)[1]
+        CL200 = result.history[-1][1][1]
+        self.assertLess(abs(result.coefs[1] - CL), .1*abs(CL200 - CL))
+        self.assertLess(abs(result.coefs[1] - CL), 2*result.error[1])
+        # The cached levels are reused
+        systems = [cache[n][1] for n in [50,100,200]]
+        ubem.richardson_ladder(make, (1,0), cache=cache)
+        self.assertEqual(systems, [cache[n][1] for n in [50,100,200]])
+        with self.assertRaises(ValueError):
+            ubem.richardson_ladder(make, uinf, [50,100,150])
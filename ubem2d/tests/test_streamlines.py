@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+import ubem2d as ubem
+
+class test_streamlines(unittest.TestCase):
+    def test_cylinder(self):
+        # Streamlines of the flow past a cylinder conserve the stream function
+        a = .5
+        def velocity(x, y):
+            w = 1 - a*a/(x + 1j*y)**2
+            return (w.real, -w.imag)
+        y0 = np.linspace(-1, 1, 21)
+        sl = ubem.trace_streamlines(velocity, np.full(21, -3.), y0, 8.,
+            ubem.CircularCylinder(100, a, 0, 0), (-4, 4, -3, 3), tol=1e-8)
+        self.assertEqual(len(sl.offsets), 22)
+        self.assertEqual(sl.reason[10], 'body')
+        for k in range(21):
+            if (k == 10):
+                continue
+            self.assertEqual(sl.reason[k], 'domain')
+            (x,y) = (sl.x[sl.offsets[k]:sl.offsets[k+1]],
+                sl.y[sl.offsets[k]:sl.offsets[k+1]])
+            self.assertGreater(np.min(x*x + y*y), a*a)
+            psi = y*(1 - a*a/(x*x + y*y))
+            self.assertLess(np.abs(psi - psi[0]).max(), 1e-7)
+
+    def test_vortex(self):
+        # Streamlines of a point vortex are circles, traced either way
+        velocity = lambda x,y: (-y/(x*x + y*y), x/(x*x + y*y))
+        for direction in [1, -1]:
+            sl = ubem.trace_streamlines(velocity, [1., 0.], [0., 2.],
+                2*np.pi, direction=direction)
+            self.assertEqual(list(sl.reason), ['length', 'length'])
+            r = np.hypot(sl.x, sl.y)
+            self.assertLess(np.abs(r[:sl.offsets[1]] - 1).max(), 1e-8)
+            self.assertLess(np.abs(r[sl.offsets[1]:] - 2).max(), 1e-8)
+            self.assertAlmostEqual(sl.y[sl.offsets[1]-1], 0., places=8)
+
+    def test_pathlines(self):
+        # An oscillating uniform flow, u = cos(t), carries x to sin(t)
+        velocity = lambda x,y,t: (np.cos(t) + 0*x, 0*y)
+        pl = ubem.trace_streamlines(velocity, [0., 1.], [0., 0.], 2.,
+            t0=.5)
+        self.assertAlmostEqual(pl.x[pl.offsets[1]-1], np.sin(2.5) -
+            np.sin(.5), places=8)
+        self.assertAlmostEqual(pl.x[-1], 1 + np.sin(2.5) - np.sin(.5),
+            places=8)
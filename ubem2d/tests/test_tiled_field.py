@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+import ubem2d as ubem
+
+class test_tiled_field(unittest.TestCase):
+    def test_tiles(self):
+        for shape in [(7,5), (100,3), (23,)]:
+            seen = np.zeros(shape, dtype=int)
+            for t in ubem.mesh_tiles(shape, 10):
+                seen[t] += 1
+            self.assertTrue(np.all(seen == 1))
+
+    def test_evaluate(self):
+        f = lambda x,y: (x*y, x + 1j*y)
+        (X,Y) = np.meshgrid(np.linspace(-1, 1, 37), np.linspace(-1, 1, 29))
+        mask = X**2 + Y**2 > .25
+        for workers in [1, 3]:
+            (A,B) = ubem.evaluate_tiled(f, X, Y, tile=50, workers=workers)
+            self.assertTrue(np.array_equal(A, X*Y))
+            self.assertTrue(np.array_equal(B, X + 1j*Y))
+            out = (np.zeros(X.shape), np.zeros(X.shape, dtype=complex))
+            (A,B) = ubem.evaluate_tiled(f, X, Y, mask, 50, workers, out)
+            self.assertIs(A, out[0])
+            self.assertTrue(np.array_equal(A[mask], (X*Y)[mask]))
+            self.assertTrue(np.all(np.isnan(A[~mask])))
+            self.assertTrue(np.all(np.isnan(B[~mask])))
+
+    def test_other_shapes(self):
+        f = lambda x,y: (x*y,)
+        X = np.linspace(-1, 1, 60).reshape(3,4,5)
+        Y = X[:,::-1].copy()
+        for (x,y) in [(X,Y), (X[0,0],Y[0,0]), (X[0,0,0],Y[0,0,0])]:
+            (A,) = ubem.evaluate_tiled(f, x, y, tile=7, workers=1)
+            self.assertEqual(np.shape(A), np.shape(x))
+            self.assertTrue(np.array_equal(A, x*y))
+        # Masked, into an output that is not contiguous
+        mask = X > 0
+        out = (np.zeros((3,4,10))[:,:,::2],)
+        (A,) = ubem.evaluate_tiled(f, X, Y, mask, 7, 1, out)
+        self.assertIs(A, out[0])
+        self.assertTrue(np.array_equal(A[mask], (X*Y)[mask]))
+        self.assertTrue(np.all(np.isnan(A[~mask])))
+
+    def test_flow_external(self):
+        bodies = [ubem.naca4('2412', 40), ubem.CircularCylinder(30, .3, 2, 0)]
+        system = ubem.HessSmithSystem(bodies)
+        uinf = (1.,.1)
+        soln = system.solve(uinf)
+        (X,Y) = ubem.mesh(bodies, 40, 30)
+        mask = ubem.exterior(bodies, X, Y)
+        (U,V) = system.flow_external(uinf, soln, X, Y)
+        (Ut,Vt) = system.flow_external(uinf, soln, X, Y, mask, tile=64,
+            workers=4)
+        self.assertTrue(np.array_equal(Ut[mask], U[mask]))
+        self.assertTrue(np.array_equal(Vt[mask], V[mask]))
+        self.assertTrue(np.all(np.isnan(Ut[~mask])))
+        cp = system.pressure(uinf, soln, X, Y, tile=100)
+        self.assertTrue(np.allclose(cp, system.pressure(uinf, soln, X, Y),
+            rtol=0, atol=1e-14))
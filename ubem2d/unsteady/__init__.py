@@ -1,5 +1,8 @@
 from ubem2d.unsteady.airfoil_simulation import *
 from ubem2d.unsteady.motions import *
+from ubem2d.unsteady.motion_table import *
+from ubem2d.unsteady.field_snapshot import *
 from ubem2d.unsteady.animate_motion import *
 from ubem2d.unsteady.plots import *
 from ubem2d.unsteady.time_step import *
+from ubem2d.unsteady.resolution_planner import *
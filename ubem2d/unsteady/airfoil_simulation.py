@@ -1,7 +1,9 @@
 import numpy as np
 from ubem2d.aerodynamics.ForceAndMoment import airfoil_cdclcm
 from ubem2d.aerodynamics.ForceAndMoment import drag_lift_vectors
+from ubem2d.fluids.PointVortexWake import PointVortexWake
 from ubem2d.solvers.BasuHancockSolver import BasuHancockSolver
+from ubem2d.unsteady.motion_table import MotionTable
 
 __all__ = ['airfoil_sensor', 'airfoil_stepper']
 
@@ -27,26 +29,63 @@ def airfoil_sensor(uinf, foil, pp, cp, gamma, dalp, dy, dt):
     bound_circ = gamma*foil.perimeter
     return CT, CL, CM, Ein, Eout, bound_circ
 
-def airfoil_stepper(foil, motion, pp=0., wake=None, uinf=(1,0)):
+def airfoil_stepper(foil, motion, pp=0., wake=None, uinf=(1,0), rates=None):
     '''
     A generator which returns the kinematic data (time, pitch, heave) and
     the post-solution data given:
 
     foil:   Airfoil object in its initial orientation
-    motion: Generator which returns tuple: time, (pitch,heave)
+    motion: Generator which returns tuple: time, (pitch,heave), or a
+            MotionTable, whose increments (and rates, if it has them, in
+            place of the rates argument) are then read from its arrays
     pp:     Pitch position (0=LE, .5=midchord, 1=TE)
     uinf:   Background flow
+    rates:  Callable which returns the pitch and heave rates at a time (see
+            fourier_pitch_heave_rates); the airfoil's velocity is then exact
+            rather than differenced over each step
     '''
     if (wake is None):
-        wake = ubem.PointVortexWake(eps=1.e-6)
+        wake = PointVortexWake(eps=1.e-6)
     solver = BasuHancockSolver(foil, wake)
-    t0, alp0, y0 = 0, 0, 0
-    for t, (alp, y) in motion:
-        dt, dalp, dy = t-t0, (alp-alp0)*np.pi/180, (y-y0)*foil.chord
+    if (isinstance(motion, MotionTable) and (rates is None or
+        motion.has_rates)):
+        steps = motion_table_steps(motion, foil.chord)
+    else:
+        steps = motion_steps(motion, foil.chord, rates)
+    for (t, alp, y, dt, dalp, dy, dalpdt, dydt) in steps:
         foil.pitch(dalp, pp)
         foil.heave(dy)
-        sig, gam, cp = solver.step(dt, uinf)[0:3]
+        velocity = None
+        if (dalpdt is not None):
+            velocity = foil.pitch_heave_velocity(dalpdt*np.pi/180,
+                dydt*foil.chord, pp)
+        sig, gam, cp = solver.step(dt, uinf, velocity)[0:3]
         CT, CL, CM, Ein, Eout, bcirc = airfoil_sensor(uinf, foil, pp, cp, gam,
             dalp, dy, dt)
-        t0, alp0, y0 = t, alp, y
         yield ((t, alp, y), (CT, CL, CM, Ein, Eout, bcirc))
+
+def motion_steps(motion, chord, rates = None):
+    '''
+    Yield the time, pitch and heave of each step of a motion generator, the
+    increments in each from the previous step (in radians and scaled by
+    the chord), and the pitch and heave rates if a callable for them is
+    given (else None).
+    '''
+    t0, alp0, y0 = 0, 0, 0
+    for t, (alp, y) in motion:
+        dt, dalp, dy = t-t0, (alp-alp0)*np.pi/180, (y-y0)*chord
+        (dalpdt, dydt) = (None, None) if rates is None else rates(t)
+        yield (t, alp, y, dt, dalp, dy, dalpdt, dydt)
+        t0, alp0, y0 = t, alp, y
+
+def motion_table_steps(table, chord):
+    '''
+    Yield the same data as motion_steps for a MotionTable, all computed in
+    advance from its arrays.
+    '''
+    (dt, dalp, dy) = table.increments(chord)
+    columns = [table.t, table.pitch, table.heave, dt, dalp, dy]
+    if (table.has_rates):
+        columns += [table.pitch_rate, table.heave_rate]
+        return iter(np.array(columns).T.tolist())
+    return ((*row, None, None) for row in np.array(columns).T.tolist())
@@ -0,0 +1,118 @@
+import numpy as np
+from ubem2d.motion.SE2 import SE2
+from ubem2d.panel.PanelInfluence import velocity_source_panel_matrices
+from ubem2d.Errors import SizeMismatchError
+
+__all__ = ['FieldSnapshot']
+
+class FieldSnapshot():
+    '''
+    This class evaluates the flow of an unsteady run on a mesh attached to
+    the (rigid) airfoil, for rendering the field at each frame.  The
+    velocities induced at the mesh by unit source panels are computed once,
+    in the body frame, where they do not change as the airfoil moves; each
+    frame's body contribution is then a matrix-vector product with the
+    current source strengths and bound vorticity, rotated into place, and
+    only the wake vortices are summed directly.  The pose of the airfoil at
+    each frame is fitted from its corners (see SE2.fit), so the body may be
+    moved by any sequence of rigid motions.
+
+    Mirror planes and cascades are not supported, since the images of a
+    moving body do not move rigidly with it.
+    '''
+    def __init__(self, body, X, Y, mask = None, dtype = np.float64,
+        block = 4096):
+        '''
+        body: the airfoil, in the pose in which the mesh is given
+        X, Y: mesh points attached to the body
+        mask: boolean array of the shape of X selecting the points to
+            evaluate (e.g. exterior(body,X,Y)); the flow is NaN elsewhere
+        dtype: float type of the stored matrices (np.float32 halves memory
+            and the cost of each frame, at single-precision accuracy)
+        block: number of mesh points whose matrices are computed at once
+        '''
+        X, Y = np.asarray(X, dtype=float), np.asarray(Y, dtype=float)
+        if (X.shape != Y.shape):
+            raise SizeMismatchError()
+        if (mask is None):
+            mask = np.ones(X.shape, dtype=bool)
+        mask = np.asarray(mask, dtype=bool)
+        if (mask.shape != X.shape):
+            raise SizeMismatchError('Mask must have the shape of the mesh')
+        self._shape = X.shape
+        self._mask = mask
+        self._X0, self._Y0 = X[mask], Y[mask]
+        self._x0, self._y0 = body.x.copy(), body.y.copy()
+        (x1,y1) = body.x[:-1], body.y[:-1]
+        (m,n) = len(self._X0), body.nedge
+        self._U = np.empty((m,n), dtype=dtype)
+        self._V = np.empty((m,n), dtype=dtype)
+        for a in range(0, m, block):
+            b = min(a + block, m)
+            (U,V) = velocity_source_panel_matrices(x1, y1, body.tx, body.ty,
+                body.edge, self._X0[a:b], self._Y0[a:b])
+            self._U[a:b], self._V[a:b] = U, V
+        # Bound vorticity is uniform, so only the row sums enter
+        self._Usum = self._U.sum(1, dtype=float)
+        self._Vsum = self._V.sum(1, dtype=float)
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def mask(self):
+        return self._mask
+
+    @property
+    def nbytes(self):
+        return self._U.nbytes + self._V.nbytes
+
+    def frame(self, body):
+        '''
+        Return the rigid motion (an SE2) carrying the body from its pose at
+        construction to its current pose.
+        '''
+        return SE2.fit(self._x0, self._y0, body.x, body.y)
+
+    def mesh(self, body):
+        '''
+        Return the current positions X,Y of the mesh points.
+        '''
+        (x,y) = self.frame(body).map_point(self._X0, self._Y0)
+        return (self.fill(x), self.fill(y))
+
+    def fill(self, values):
+        '''
+        Return an array of the shape of the mesh with the given values at
+        the selected points, and NaN elsewhere.
+        '''
+        F = np.full(self._shape, np.nan)
+        F[self._mask] = values
+        return F
+
+    def flow_body(self, sigma, gamma):
+        '''
+        Return the velocity U,V at the selected mesh points due to the
+        source strengths sigma and bound vorticity gamma, in the body frame.
+        '''
+        sigma = np.asarray(sigma).astype(self._U.dtype)
+        U = self._U.dot(sigma) - gamma*self._Vsum
+        V = self._V.dot(sigma) + gamma*self._Usum
+        return (U.astype(float), V.astype(float))
+
+    def flow(self, body, uinf, sigma, gamma, wake = None):
+        '''
+        Return the current positions X,Y of the mesh points and the net
+        flow U,V there, due to the onset flow uinf, the body's source
+        strengths sigma and bound vorticity gamma (as returned by a step of
+        BasuHancockSolver), and the wake, if given.
+        '''
+        g = self.frame(body)
+        (x,y) = g.map_point(self._X0, self._Y0)
+        (u,v) = g.map_vector(*self.flow_body(sigma, gamma))
+        u, v = u + uinf[0], v + uinf[1]
+        if (wake is not None):
+            (uw,vw) = wake.velocity(x, y)
+            u, v = u + uw, v + vw
+        return (self.fill(x), self.fill(y), self.fill(u), self.fill(v))
@@ -0,0 +1,103 @@
+import numpy as np
+from ubem2d.unsteady.motions import fourier_pitch_heave_series
+from ubem2d.Errors import SizeMismatchError
+
+__all__ = ['MotionTable']
+
+class MotionTable():
+    '''
+    This class tabulates the times, pitch angles (degrees) and heaves of an
+    airfoil motion, and optionally their rates, for a whole run.  Unlike the
+    generators of fourier_pitch_heave, a table is computed once with array
+    operations and may be iterated over any number of times, so one table
+    serves every run of a sweep sharing the same kinematics.  Iterating
+    yields (time, (pitch,heave)), as those generators do, and airfoil_stepper
+    also reads the increments and rates straight from the table.
+    '''
+    def __init__(self, t, pitch, heave, pitch_rate = None,
+        heave_rate = None):
+        '''
+        t: times of the steps
+        pitch, heave: pitch angle (degrees) and heave at each time
+        pitch_rate, heave_rate: their time derivatives, if known (both or
+            neither)
+        '''
+        columns = [t, pitch, heave]
+        if ((pitch_rate is None) != (heave_rate is None)):
+            raise ValueError('Give both pitch and heave rates, or neither')
+        if (pitch_rate is not None):
+            columns += [pitch_rate, heave_rate]
+        columns = [np.asarray(c, dtype=float) for c in columns]
+        if (any(c.shape != columns[0].shape for c in columns) or
+            columns[0].ndim != 1):
+            raise SizeMismatchError('Columns must be 1-d and of equal length')
+        self._data = np.array(columns)
+        self._data.flags.writeable = False
+
+    @classmethod
+    def fourier(cls, freq, dt, nsteps, pamps = None, pphases = None,
+        hamps = None, hphases = None, t0 = 0., rates = True):
+        '''
+        Tabulate the motion of fourier_pitch_heave (with the same arguments)
+        at the nsteps times t0 + k*dt, and its rates if rates is True.  All
+        modes are evaluated at all times at once (see FourierSeries.modes).
+        '''
+        (pitch,heave) = fourier_pitch_heave_series(freq, pamps, pphases,
+            hamps, hphases)
+        t = t0 + dt*np.arange(nsteps)
+        orders = (0,1) if rates else (0,)
+        return cls(t, *[y for pair in zip(pitch.evaluate(t, orders),
+            heave.evaluate(t, orders)) for y in pair])
+
+    @classmethod
+    def load(cls, path):
+        '''
+        Load a table saved by save().
+        '''
+        return cls(*np.load(path))
+
+    def save(self, path):
+        '''
+        Save the table as a single array in the .npy format.
+        '''
+        np.save(path, self._data)
+
+    @property
+    def t(self):
+        return self._data[0]
+
+    @property
+    def pitch(self):
+        return self._data[1]
+
+    @property
+    def heave(self):
+        return self._data[2]
+
+    @property
+    def has_rates(self):
+        return len(self._data) == 5
+
+    @property
+    def pitch_rate(self):
+        return self._data[3] if self.has_rates else None
+
+    @property
+    def heave_rate(self):
+        return self._data[4] if self.has_rates else None
+
+    def __len__(self):
+        return self._data.shape[1]
+
+    def __iter__(self):
+        for (t, alp, y) in self._data[:3].T.tolist():
+            yield t, (alp, y)
+
+    def increments(self, chord = 1.):
+        '''
+        Return the time step, pitch increment (radians) and heave increment
+        (scaled by the chord) of each step, the first being taken from zero
+        as in airfoil_stepper.
+        '''
+        d = np.diff(self._data[:3], axis=1, prepend=0.)
+        return (d[0], d[1]*np.pi/180, d[2]*chord)
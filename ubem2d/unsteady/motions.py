@@ -4,7 +4,8 @@ from ubem2d.math.FourierSeries import FourierSeries
 from ubem2d.util.arrayify import arrayify
 from ubem2d.unsteady.time_step import time_stepper
 
-__all__ = ['fourier_pitch', 'fourier_heave', 'fourier_pitch_heave']
+__all__ = ['fourier_pitch', 'fourier_heave', 'fourier_pitch_heave',
+    'fourier_pitch_heave_rates', 'fourier_pitch_heave_series']
 
 def fourier_pitch(time, freq, pamps, pphases):
     return fourier_pitch_heave(time, freq, pamps, pphases)
@@ -23,6 +24,27 @@ def fourier_pitch_heave(time, freq, pamps=None, pphases=None, hamps=None,
     hamps:      Heave amplitudes
     hphases:    Heave phases (degrees)
     '''
+    (pitch,heave) = fourier_pitch_heave_series(freq, pamps, pphases, hamps,
+        hphases)
+    return function_stepper(time, lambda t: (pitch(t), heave(t)))
+
+def fourier_pitch_heave_rates(freq, pamps=None, pphases=None, hamps=None,
+    hphases=None):
+    '''
+    This returns a callable which gives the pitch rate (degrees per unit
+    time) and heave rate at a time t, for the motion of fourier_pitch_heave
+    with the same arguments.
+    '''
+    (pitch,heave) = fourier_pitch_heave_series(freq, pamps, pphases, hamps,
+        hphases)
+    return lambda t: (pitch.derivative(t), heave.derivative(t))
+
+def fourier_pitch_heave_series(freq, pamps=None, pphases=None, hamps=None,
+    hphases=None):
+    '''
+    This returns the pitch and heave FourierSeries of the motion of
+    fourier_pitch_heave with the same arguments (phases in degrees).
+    '''
     if (pamps is not None):
         pamps = arrayify(pamps)
     if (pphases is not None):
@@ -33,7 +55,7 @@ def fourier_pitch_heave(time, freq, pamps=None, pphases=None, hamps=None,
         hphases = arrayify(hphases)*np.pi/180
     pitch = FourierSeries(freq, pamps, pphases)
     heave = FourierSeries(freq, hamps, hphases)
-    return function_stepper(time, lambda t: (pitch(t), heave(t)))
+    return (pitch, heave)
 
 if __name__ == '__main__':
     import numpy as np
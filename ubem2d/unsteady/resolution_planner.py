@@ -0,0 +1,164 @@
+import time
+from collections import namedtuple
+import numpy as np
+from scipy.optimize import nnls
+from ubem2d.fluids.PointVortexWake import PointVortexWake
+from ubem2d.unsteady.airfoil_simulation import airfoil_stepper
+from ubem2d.unsteady.motion_table import MotionTable
+
+__all__ = ['fourier_simulation', 'fit_cost_model', 'fit_error_model',
+    'plan_resolution']
+
+ResolutionPlan = namedtuple('ResolutionPlan',
+    'npan,steps_per_cycle,cycles,runtime,error,feasible')
+
+def fourier_simulation(make_foil, freq, pamps = None, pphases = None,
+    hamps = None, hphases = None, pp = 0., uinf = (1,0), eps = 1.e-6):
+    '''
+    Return a callable simulate(npan, spc, ncycles) which runs an unsteady
+    simulation of the airfoil make_foil(npan) in the periodic pitch/heave
+    motion given as in fourier_pitch_heave, with spc steps per cycle, for
+    ncycles cycles.  It returns an array of the cycle-averaged thrust
+    coefficient and propulsive efficiency of each cycle, and the wall-clock
+    time of each step (the first including the solver's setup).
+    '''
+    def simulate(npan, spc, ncycles):
+        foil = make_foil(npan)
+        dt = 1./(spc*freq)
+        nsteps = 1 + spc*ncycles
+        motion = MotionTable.fourier(freq, dt, nsteps, pamps, pphases, hamps,
+            hphases, rates=False)
+        frames = airfoil_stepper(foil, motion, pp, PointVortexWake(eps=eps),
+            uinf)
+        out = np.zeros((nsteps, 6))
+        times = np.zeros(nsteps)
+        t0 = time.perf_counter()
+        for i, (kin, data) in enumerate(frames):
+            t1 = time.perf_counter()
+            out[i], times[i], t0 = data, t1 - t0, t1
+        values = np.zeros((ncycles, 2))
+        for c in range(ncycles):
+            cycle = out[1+c*spc:1+(c+1)*spc]
+            values[c] = (np.mean(cycle[:,0]), np.sum(cycle[:,4])/
+                np.sum(cycle[:,3]))
+        return (values, times)
+    return simulate
+
+def fit_cost_model(samples):
+    '''
+    Fit the runtime of an unsteady simulation from samples (npan, times),
+    times being the wall-clock time of each step of a run with npan panels.
+    The kth step is modelled as costing c0 + c1*n + c2*n^2 + c3*n*k +
+    c4*k^2, for the linear solve with the panels and the velocities induced
+    by and on a wake of k vortices, and the first step additionally s*n^3
+    for the setup, with non-negative coefficients fit by least squares.
+
+    Return a callable cost(npan, spc, ncycles) giving the predicted runtime.
+    '''
+    rows, rhs, setup = [], [], []
+    for (n, times) in samples:
+        k = np.arange(len(times), dtype=float)
+        rows.append(np.array([np.ones(len(k)), n*np.ones(len(k)),
+            n*n*np.ones(len(k)), n*k, k*k]).T)
+        rhs.append(times)
+    M, t = np.concatenate(rows), np.concatenate(rhs)
+    scale = M.max(0)
+    (c, res) = nnls(M/scale, t)
+    c = c/scale
+    for (n, times) in samples:
+        setup.append(max(times[0] - c[0] - c[1]*n - c[2]*n*n, 0.)/n**3)
+    s = np.mean(setup)
+    def cost(npan, spc, ncycles):
+        n = np.asarray(npan, dtype=float)
+        S = np.asarray(spc, dtype=float)*ncycles   # Steps after the first
+        # Sums over k = 0..S of 1, k and k^2
+        K0, K1, K2 = S + 1, S*(S + 1)/2, S*(S + 1)*(2*S + 1)/6
+        return (s*n**3 + (c[0] + c[1]*n + c[2]*n*n)*K0 + c[3]*n*K1 +
+            c[4]*K2)
+    return cost
+
+def fit_error_model(base, panels, steps, orders = (1,1)):
+    '''
+    Fit the error of cycle-averaged quantities from three calibration runs
+    base = (npan, spc, values), panels = (2*npan, spc, values) and steps =
+    (npan, 2*spc, values), values being the array of cycle averages of each
+    run as returned by fourier_simulation, all for the same cycles.  The
+    error is modelled as A*npan^-p + B*spc^-q + C*rho^m after m cycles,
+    (p,q) being the given orders of convergence: A and B are found from the
+    change in the last cycle's values under refinement, and C and rho from
+    the geometric decay of the change between successive cycles of the
+    base run.
+
+    Return a callable error(npan, spc, ncycles) giving the predicted error
+    of each quantity, in its last axis.
+    '''
+    (n0, s0, Q) = base
+    (n1, s1, Qn) = panels
+    (n2, s2, Qs) = steps
+    (p, q) = orders
+    A = np.abs(Q[-1] - Qn[-1])/abs(n0**-p - n1**-p)
+    B = np.abs(Q[-1] - Qs[-1])/abs(s0**-q - s2**-q)
+    d = np.abs(np.diff(Q, axis=0))
+    K = len(Q)
+    if (K >= 3):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rho = (d[-1]/d[0])**(1./(K - 2))
+        rho = np.clip(np.nan_to_num(rho, nan=.5), .01, .95)
+    else:
+        rho = .5*np.ones(Q.shape[1])
+    # Change between cycles k and k+1 (of 1..K) is d[-1]*rho^(k-K+1); the
+    # error after m cycles is the sum of the changes from cycle m onward,
+    # which vanishes for quantities whose last two cycles agree
+    C = np.where(d[-1] == 0, 0., d[-1]*rho**(1 - K)/(1 - rho))
+    def error(npan, spc, ncycles):
+        n = np.asarray(npan, dtype=float)[...,None]
+        s = np.asarray(spc, dtype=float)[...,None]
+        m = np.asarray(ncycles, dtype=float)[...,None]
+        return A*n**-p + B*s**-q + C*rho**m
+    return error
+
+def plan_resolution(simulate, tol, budget = None, npan = 32,
+    steps_per_cycle = 24, probe_cycles = 3, orders = (1,1), max_npan = 1000,
+    max_steps_per_cycle = 1000, max_cycles = 20):
+    '''
+    Recommend the number of panels, steps per cycle and cycles for an
+    unsteady simulation (see fourier_simulation for the form of simulate)
+    which meets the tolerance tol (a scalar, or one per quantity) on the
+    cycle-averaged quantities at the least predicted runtime, within the
+    wall-clock budget in seconds if given.
+
+    Three calibration runs of probe_cycles cycles are made: at (npan,
+    steps_per_cycle), and with each doubled in turn.  Cost and error models
+    are fit to them (see fit_cost_model and fit_error_model), and a grid of
+    resolutions is searched.  If no resolution meets the tolerance within
+    the budget, the most accurate one within the budget is returned, with
+    feasible False.
+    '''
+    runs = [(npan, steps_per_cycle), (2*npan, steps_per_cycle),
+        (npan, 2*steps_per_cycle)]
+    results = [simulate(n, s, probe_cycles) for (n, s) in runs]
+    cost = fit_cost_model([(n, times) for ((n, s), (values, times)) in
+        zip(runs, results)])
+    error = fit_error_model(*[(n, s, values) for ((n, s), (values, times))
+        in zip(runs, results)], orders=orders)
+    # Search a geometric grid of resolutions
+    grid = lambda a, b: np.unique(np.round(a*2.**(np.arange(0,
+        4*np.log2(b/a) + 1)/4)).astype(int))
+    N, S, M = np.meshgrid(grid(npan/2, max_npan), grid(steps_per_cycle/2,
+        max_steps_per_cycle), np.arange(1, max_cycles + 1), indexing='ij')
+    T = cost(N, S, M)
+    E = error(N, S, M)
+    ok = np.all(E <= np.asarray(tol), axis=-1)
+    affordable = np.ones(T.shape, dtype=bool) if (budget is None) else \
+        (T <= budget)
+    feasible = bool(np.any(ok & affordable))
+    if (feasible):
+        i = np.argmin(np.where(ok & affordable, T, np.inf))
+    elif (np.any(affordable)):
+        i = np.argmin(np.where(affordable, np.max(E/np.asarray(tol),
+            axis=-1), np.inf))
+    else:
+        i = np.argmin(T)
+    i = np.unravel_index(i, T.shape)
+    return ResolutionPlan(int(N[i]), int(S[i]), int(M[i]), float(T[i]),
+        E[i], feasible)
@@ -1,3 +1,5 @@
 from ubem2d.util.read_data import *
 from ubem2d.util.arrayify import *
 from ubem2d.util.coroutines import *
+from ubem2d.util.disk_array import *
+from ubem2d.util.tiled_field import *
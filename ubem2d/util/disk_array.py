@@ -0,0 +1,32 @@
+import os
+import numpy as np
+
+__all__ = ['disk_array', 'blocked_dot']
+
+def disk_array(shape, path = None, fortran_order = True):
+    '''
+    Return a zero-initialized array of floats of the given shape.  If a path
+    is given, the array is a memory map onto a new .npy file at that path
+    (which may later be reopened with np.load(path, mmap_mode='r')), so that
+    it may exceed the available RAM; otherwise it is an ordinary array.
+    '''
+    order = 'F' if fortran_order else 'C'
+    if (path is None):
+        return np.zeros(shape, order=order)
+    directory = os.path.dirname(os.path.abspath(path))
+    if (not os.path.isdir(directory)):
+        raise ValueError('No such directory: {}'.format(directory))
+    return np.lib.format.open_memmap(path, mode='w+', dtype=float,
+        shape=shape, fortran_order=fortran_order)
+
+def blocked_dot(M, x, block = 256):
+    '''
+    Return the product of the matrix M with the vector x, reading M a block
+    of columns at a time.  For a Fortran-ordered memory map this streams the
+    matrix from disk sequentially, holding only one block in RAM.
+    '''
+    y = np.zeros(M.shape[0])
+    for j0 in range(0, M.shape[1], block):
+        j1 = min(j0 + block, M.shape[1])
+        y += np.asarray(M[:,j0:j1]).dot(x[j0:j1])
+    return y
@@ -0,0 +1,112 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from ubem2d.Errors import SizeMismatchError
+
+__all__ = ['mesh_tiles', 'evaluate_tiled']
+
+def mesh_tiles(shape, tile = 16384):
+    '''
+    Return a list of index tuples partitioning an array of the given shape
+    into tiles of about tile entries: rectangular blocks of rows and columns
+    for a 2-d array (so that a tile covers a compact patch of a mesh), and
+    otherwise runs of consecutive entries, which index the flattened array
+    (e.g. X.reshape(-1)) for shapes other than 1-d.
+    '''
+    size = int(np.prod(shape))
+    if (len(shape) != 2):
+        return [np.s_[a:min(a + tile, size)] for a in range(0, size, tile)]
+    (m,n) = shape
+    # Square-ish blocks, but no wider than the mesh
+    cols = min(n, max(1, int(np.sqrt(tile))))
+    rows = min(m, max(1, tile//cols))
+    return [np.s_[i:min(i + rows, m), j:min(j + cols, n)]
+        for i in range(0, m, rows) for j in range(0, n, cols)]
+
+def evaluate_tiled(f, X, Y, mask = None, tile = 16384, workers = None,
+    out = None, fill = np.nan):
+    '''
+    Evaluate the field f(x,y), which returns a tuple of arrays of the shape
+    of the 1-d point arrays x,y, on the points X,Y one tile at a time (see
+    mesh_tiles), so that the temporaries of f scale with the tile rather
+    than with the mesh.  Tiles are run on a pool of workers threads (all
+    cores by default; 1 runs them in turn), which overlap because NumPy
+    releases the GIL in its array operations, so f must not modify shared
+    state.  If a boolean mask of the shape of X is given, f is evaluated
+    only where it is True, tiles with no such points are skipped, and other
+    entries are set to fill.  Results are written into out, a tuple of
+    preallocated arrays of the shape of X, if given.  If tile is None the
+    mesh is evaluated as a single tile.  Meshes of other than 2 dimensions
+    (including scalars) are evaluated as their flattened arrays.
+    '''
+    (X,Y) = np.asarray(X), np.asarray(Y)
+    if (X.shape != Y.shape):
+        raise SizeMismatchError()
+    if (mask is not None):
+        mask = np.asarray(mask, dtype=bool)
+        if (mask.shape != X.shape):
+            raise SizeMismatchError('Mask must have the shape of the mesh')
+    if (X.ndim not in [1,2]):
+        # Tiles of other shapes are runs of the flattened mesh
+        shape = X.shape
+        (X,Y) = X.reshape(-1), Y.reshape(-1)
+        mask = None if mask is None else mask.reshape(-1)
+        if (out is not None):
+            if (any(F.shape != shape for F in out)):
+                raise SizeMismatchError('Outputs must have the shape of the '
+                    'mesh')
+            flat = tuple(F.reshape(-1) for F in out)
+        else:
+            flat = None
+        flat = evaluate_tiled(f, X, Y, mask, tile, workers, flat, fill)
+        if (out is None):
+            return tuple(F.reshape(shape) for F in flat)
+        # Copy back into outputs that could not be flattened as views
+        for (F,G) in zip(out, flat):
+            if (not np.shares_memory(F, G)):
+                F[...] = G.reshape(shape)
+        return tuple(out)
+    tiles = mesh_tiles(X.shape, X.size if tile is None else tile)
+    if (mask is not None):
+        tiles = [t for t in tiles if mask[t].any()]
+    def evaluate(t):
+        (x,y) = X[t].ravel(), Y[t].ravel()
+        if (mask is not None):
+            m = mask[t].ravel()
+            (x,y) = x[m], y[m]
+        return f(x, y)
+    def store(t, values):
+        # Tiles are basic slices, so F[t] is a view into F
+        for (F,v) in zip(out, values):
+            if (mask is None):
+                F[t] = np.reshape(v, F[t].shape)
+            else:
+                F[t][mask[t]] = v
+    # The first tile fixes the number and types of the outputs
+    if (len(tiles) > 0):
+        first = evaluate(tiles[0])
+    else:
+        first = f(np.zeros(0), np.zeros(0))
+    if (out is None):
+        out = tuple(np.full(X.shape, fill, dtype=np.result_type(v, fill))
+            for v in first)
+    else:
+        if (len(out) != len(first) or any(F.shape != X.shape for F in out)):
+            raise SizeMismatchError('Outputs must have the shape of the mesh')
+        if (mask is not None):
+            for F in out:
+                F[~mask] = fill
+    if (len(tiles) == 0):
+        return tuple(out)
+    store(tiles[0], first)
+    rest = tiles[1:]
+    if (workers is None):
+        workers = os.cpu_count() or 1
+    if (workers <= 1 or len(rest) <= 1):
+        for t in rest:
+            store(t, evaluate(t))
+    else:
+        # Tiles are disjoint, so the workers store their own results
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda t: store(t, evaluate(t)), rest))
+    return tuple(out)